@@ -0,0 +1,97 @@
+# benchmarks/cli_startup.py
+"""
+Measure CLI startup and enforce an import-time budget.
+
+For each command line, runs `python -X importtime -m src.cli.main ...` to
+sum the import cost of the CLI, lists the heaviest modules it pulled in and
+fails if the total is over --budget-ms or if any module from the
+supabase/postgrest/httpx stack was loaded. Then times full process wall
+clock against a bare interpreter (`python -c pass`).
+
+    python -m benchmarks.cli_startup
+    python -m benchmarks.cli_startup --budget-ms 40 --runs 20 -- payment settle --help
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict
+
+# Module prefixes that must not load for parser-only invocations
+HEAVY_MODULES = (
+    "supabase", "postgrest", "httpx", "gotrue", "realtime", "storage3", "numpy", "pyarrow", "psycopg", "psycopg_pool",
+)
+
+DEFAULT_COMMANDS = [
+    ["--help"],
+    ["product", "--help"],
+    ["payment", "settle", "--help"],
+    ["report", "revenue", "--bogus"],
+]
+
+_ROW = re.compile(r"import time:\s+(\d+) \|\s+\d+ \|\s*(\S+)")
+
+
+def importtime(*args) -> Dict[str, int]:
+    """
+    Run `python -X importtime <args>` and return {module: self time in us}.
+    """
+    proc = subprocess.run([sys.executable, "-X", "importtime", *args], capture_output=True, text=True, env=_env())
+    return {m[2]: int(m[1]) for m in map(_ROW.match, proc.stderr.splitlines()) if m}
+
+
+def wall_clock(cmd, runs: int) -> float:
+    """Median wall-clock seconds of running cmd."""
+    samples = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        subprocess.run(cmd, capture_output=True, env=_env())
+        samples.append(time.perf_counter() - t0)
+    return statistics.median(samples)
+
+
+def _env():
+    return dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget-ms", type=float, default=50.0, help="max import time per command (default 50)")
+    parser.add_argument("--runs", type=int, default=10, help="wall-clock samples per command")
+    parser.add_argument("--top", type=int, default=8, help="heaviest modules to list")
+    parser.add_argument("argv", nargs="*", help="CLI arguments to measure (default: a few parser-only commands)")
+    args = parser.parse_args()
+
+    commands = [args.argv] if args.argv else DEFAULT_COMMANDS
+    # modules a bare interpreter imports anyway (site, encodings, .pth hooks)
+    baseline_modules = importtime("-c", "pass")
+    bare = wall_clock([sys.executable, "-c", "pass"], args.runs)
+    print(f"bare interpreter: {bare * 1000:.1f} ms")
+
+    failed = False
+    for argv in commands:
+        modules = importtime("-m", "src.cli.main", *argv)
+        own = {name: us for name, us in modules.items() if name not in baseline_modules}
+        total_ms = sum(own.values()) / 1000
+        heavy = sorted(n for n in own if n.split(".")[0] in HEAVY_MODULES)
+        wall = wall_clock([sys.executable, "-m", "src.cli.main", *argv], args.runs)
+
+        over = total_ms > args.budget_ms
+        failed = failed or over or bool(heavy)
+        status = "FAIL" if over or heavy else "ok"
+        print(f"\nretail-cli {' '.join(argv)}")
+        print(f"  imports {total_ms:8.1f} ms (budget {args.budget_ms:.0f} ms)  "
+              f"wall {wall * 1000:8.1f} ms (+{(wall - bare) * 1000:.1f} ms over bare)  {status}")
+        for name, us in sorted(own.items(), key=lambda kv: -kv[1])[:args.top]:
+            print(f"    {us / 1000:8.2f} ms  {name}")
+        if heavy:
+            print(f"  heavy modules loaded: {', '.join(heavy[:10])}{' ...' if len(heavy) > 10 else ''}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+# benchmarks/datasets.py
+"""
+Deterministic synthetic datasets for benchmarks/service_suite.py.
+
+A scale is a number of orders; customers, products and order lines grow with
+it. Rows are bulk-loaded straight into a FakeSupabase database, then the
+sales_by_* rollups are rebuilt and the triggers installed, so the result
+looks like a long-running shop:
+
+    sb = FakeSupabase("bench-1m.db")
+    load(sb, SCALES["1m"])          # once; later runs reuse the file
+"""
+import datetime
+import random
+from typing import Dict
+
+from benchmarks.fake_supabase import FakeSupabase
+from src.services.constants import PAYMENT_METHODS
+
+SCALES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+
+CATEGORIES = ("Electronics", "Books", "Home", "Garden", "Toys", "Sports", "Beauty", "Grocery")
+CITIES = ("Pune", "Mumbai", "Delhi", "Chennai", "Kolkata", "Bengaluru", "Hyderabad")
+# share of orders per final state
+PAID_SHARE = 0.7
+CANCELLED_SHARE = 0.1
+HISTORY_DAYS = 365
+_BATCH = 20_000
+
+
+def sizes(orders: int) -> Dict[str, int]:
+    return {
+        "orders": orders,
+        "customers": max(100, orders // 10),
+        "products": min(50_000, max(200, orders // 100)),
+    }
+
+
+def load(sb: FakeSupabase, orders: int, seed: int = 42) -> Dict[str, int]:
+    """
+    Fill an empty database with `orders` orders and matching rows.
+    Returns the row count per table. No-op if customers already exist.
+    """
+    conn = sb.conn
+    if conn.execute("select 1 from customers limit 1").fetchone():
+        return counts(sb)
+
+    rng = random.Random(seed)
+    n = sizes(orders)
+    now = datetime.datetime.now(datetime.timezone.utc)
+    start = now - datetime.timedelta(days=HISTORY_DAYS)
+
+    def iso(ts: datetime.datetime) -> str:
+        return ts.isoformat(timespec="microseconds")
+
+    with sb.transaction():
+        conn.executemany(
+            "insert into customers (cust_id, name, email, phone, city, created_at) values (?, ?, ?, ?, ?, ?)",
+            (
+                (i, f"Customer {i}", f"customer{i}@example.com", f"9{i:09d}", rng.choice(CITIES), iso(start))
+                for i in range(1, n["customers"] + 1)
+            ),
+        )
+        prices = [round(rng.uniform(1, 500), 2) for _ in range(n["products"])]
+        conn.executemany(
+            "insert into products (prod_id, name, sku, price, stock, category, created_at, stock_changed_at) "
+            "values (?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                (i, f"Product {i}", f"SKU-{i:07d}", prices[i - 1], rng.randint(0, 1000),
+                 CATEGORIES[i % len(CATEGORIES)], iso(start), iso(start))
+                for i in range(1, n["products"] + 1)
+            ),
+        )
+
+        span = (now - start).total_seconds()
+        item_id = 0
+        for lo in range(1, orders + 1, _BATCH):
+            order_rows, item_rows, payment_rows = [], [], []
+            for order_id in range(lo, min(lo + _BATCH, orders + 1)):
+                placed = start + datetime.timedelta(seconds=span * (order_id - 1) / orders)
+                lines = {}
+                for _ in range(rng.randint(1, 4)):
+                    lines[rng.randint(1, n["products"])] = rng.randint(1, 3)
+                total = 0.0
+                for prod_id, quantity in lines.items():
+                    item_id += 1
+                    price = prices[prod_id - 1]
+                    total += price * quantity
+                    item_rows.append((item_id, order_id, prod_id, quantity, price))
+                total = round(total, 2)
+                roll = rng.random()
+                if roll < PAID_SHARE:
+                    status, pay_status = "COMPLETED", "PAID"
+                    paid_at, method = iso(placed + datetime.timedelta(minutes=5)), rng.choice(PAYMENT_METHODS)
+                elif roll < PAID_SHARE + CANCELLED_SHARE:
+                    status, pay_status, paid_at, method = "CANCELLED", "CANCELLED", None, None
+                else:
+                    status, pay_status, paid_at, method = "PLACED", "PENDING", None, None
+                order_rows.append((order_id, rng.randint(1, n["customers"]), iso(placed), status, total))
+                payment_rows.append((order_id, order_id, total, method, pay_status, paid_at))
+            conn.executemany(
+                "insert into orders (order_id, cust_id, order_date, status, total_amount) values (?, ?, ?, ?, ?)",
+                order_rows,
+            )
+            conn.executemany(
+                "insert into order_items (item_id, order_id, prod_id, quantity, price) values (?, ?, ?, ?, ?)",
+                item_rows,
+            )
+            conn.executemany(
+                "insert into payments (payment_id, order_id, amount, method, status, paid_at) "
+                "values (?, ?, ?, ?, ?, ?)",
+                payment_rows,
+            )
+        sb.rpc_rebuild_sales_rollups()
+    conn.execute("analyze")
+    sb.install_triggers()
+    return counts(sb)
+
+
+def counts(sb: FakeSupabase) -> Dict[str, int]:
+    return {
+        table: sb.conn.execute(f"select count(*) from {table}").fetchone()[0]
+        for table in ("customers", "products", "orders", "order_items", "payments")
+    }
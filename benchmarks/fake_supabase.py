@@ -0,0 +1,1075 @@
+# benchmarks/fake_supabase.py
+"""
+In-process stand-in for the Supabase client, backed by SQLite.
+
+FakeSupabase implements the slice of the PostgREST query builder the DAOs
+use (select with embedded resources, eq/neq/gt/gte/lt/lte/in_/ilike/is_/or_
+filters, order/limit/offset/range, insert/upsert/update/delete returning
+rows) plus Python ports of the RPCs in sql/. Every execute() is one
+simulated round trip and can be delayed by an injected network latency, so
+the real services can be benchmarked without a Supabase project:
+
+    sb = FakeSupabase(latency_ms=20)
+    ProductService(dao=ProductDAO(sb=sb), stock_dao=StockDAO(sb=sb))
+"""
+import datetime
+import json
+import random
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from postgrest.exceptions import APIError
+
+SCHEMA = """
+create table if not exists customers (
+    cust_id integer primary key autoincrement,
+    name text not null,
+    email text not null unique,
+    phone text,
+    city text,
+    created_at text not null default (strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now'))
+);
+create table if not exists products (
+    prod_id integer primary key autoincrement,
+    name text not null,
+    sku text not null unique,
+    price real not null check (price > 0),
+    stock integer not null default 0 check (stock >= 0),
+    category text,
+    created_at text not null default (strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now')),
+    stock_changed_at text not null default (strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now'))
+);
+create table if not exists orders (
+    order_id integer primary key autoincrement,
+    cust_id integer not null references customers (cust_id),
+    order_date text not null default (strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now')),
+    status text not null default 'PLACED',
+    total_amount real
+);
+create table if not exists order_items (
+    item_id integer primary key autoincrement,
+    order_id integer not null references orders (order_id),
+    prod_id integer not null references products (prod_id),
+    quantity integer not null,
+    price real not null
+);
+create table if not exists payments (
+    payment_id integer primary key autoincrement,
+    order_id integer not null references orders (order_id),
+    amount real not null,
+    method text,
+    status text not null default 'PENDING',
+    paid_at text
+);
+create table if not exists payment_transitions (
+    idempotency_key text primary key,
+    order_id integer not null,
+    from_status text not null,
+    to_status text not null,
+    created_at text not null default (strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now'))
+);
+create table if not exists outbox_events (
+    event_id integer primary key autoincrement,
+    event_type text not null,
+    order_id integer not null references orders (order_id) on delete cascade,
+    payload text not null default '{}',
+    status text not null default 'PENDING',
+    attempts integer not null default 0,
+    available_at text not null default (strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now')),
+    last_error text,
+    created_at text not null default (strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now')),
+    processed_at text
+);
+create table if not exists sales_by_product (
+    prod_id integer primary key,
+    units_sold integer not null default 0,
+    revenue real not null default 0,
+    order_count integer not null default 0
+);
+create table if not exists sales_by_customer (
+    cust_id integer primary key,
+    order_count integer not null default 0,
+    total_spent real not null default 0,
+    last_order_at text
+);
+create table if not exists sales_by_day (
+    day text primary key,
+    order_count integer not null default 0,
+    units_sold integer not null default 0,
+    revenue real not null default 0,
+    paid_revenue real not null default 0
+);
+
+-- same indexes as sql/
+create index if not exists products_stock_prod_id_idx on products (stock, prod_id);
+create index if not exists products_category_stock_idx on products (category, stock);
+create index if not exists products_stock_changed_at_idx on products (stock_changed_at, prod_id);
+create index if not exists orders_cust_id_order_date_idx on orders (cust_id, order_date desc);
+create index if not exists orders_order_date_idx on orders (order_date);
+create index if not exists order_items_order_id_idx on order_items (order_id);
+create index if not exists outbox_events_pending_idx on outbox_events (available_at, event_id) where status = 'PENDING';
+create index if not exists payments_order_id_idx on payments (order_id);
+create index if not exists payments_status_paid_at_idx on payments (status, paid_at);
+create index if not exists sales_by_product_units_idx on sales_by_product (units_sold desc);
+create index if not exists sales_by_customer_orders_idx on sales_by_customer (order_count desc, cust_id);
+"""
+
+# Ports of the sql/004 rollup triggers and the sql/009 stock_changed_at
+# trigger. Created after bulk loads (see benchmarks/datasets.py).
+TRIGGERS = """
+create trigger if not exists products_stock_changed_at
+after update of stock on products
+when new.stock is not old.stock
+begin
+    update products set stock_changed_at = strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now') where prod_id = new.prod_id;
+end;
+
+create trigger if not exists rollup_orders_insert
+after insert on orders
+when new.status <> 'CANCELLED'
+begin
+    insert into sales_by_customer (cust_id, order_count, total_spent, last_order_at)
+    values (new.cust_id, 1, coalesce(new.total_amount, 0), new.order_date)
+    on conflict (cust_id) do update
+    set order_count = order_count + 1,
+        total_spent = total_spent + excluded.total_spent,
+        last_order_at = max(coalesce(last_order_at, ''), excluded.last_order_at);
+    insert into sales_by_day (day, order_count) values (substr(new.order_date, 1, 10), 1)
+    on conflict (day) do update set order_count = order_count + 1;
+end;
+
+create trigger if not exists rollup_orders_cancel
+after update of status on orders
+when old.status <> 'CANCELLED' and new.status = 'CANCELLED'
+begin
+    update sales_by_customer
+    set order_count = order_count - 1, total_spent = total_spent - coalesce(old.total_amount, 0)
+    where cust_id = old.cust_id;
+    update sales_by_product
+    set units_sold = units_sold - (select sum(quantity) from order_items i
+                                   where i.order_id = old.order_id and i.prod_id = sales_by_product.prod_id),
+        revenue = revenue - (select sum(quantity * price) from order_items i
+                             where i.order_id = old.order_id and i.prod_id = sales_by_product.prod_id),
+        order_count = order_count - 1
+    where prod_id in (select prod_id from order_items where order_id = old.order_id);
+    update sales_by_day
+    set order_count = order_count - 1,
+        units_sold = units_sold - (select coalesce(sum(quantity), 0) from order_items where order_id = old.order_id),
+        revenue = revenue - (select coalesce(sum(quantity * price), 0) from order_items where order_id = old.order_id)
+    where day = substr(old.order_date, 1, 10);
+end;
+
+create trigger if not exists rollup_order_items
+after insert on order_items
+when (select status from orders where order_id = new.order_id) <> 'CANCELLED'
+begin
+    insert into sales_by_product (prod_id, units_sold, revenue, order_count)
+    values (new.prod_id, new.quantity, new.quantity * new.price,
+            not exists (select 1 from order_items i where i.order_id = new.order_id
+                        and i.prod_id = new.prod_id and i.item_id < new.item_id))
+    on conflict (prod_id) do update
+    set units_sold = units_sold + excluded.units_sold,
+        revenue = revenue + excluded.revenue,
+        order_count = order_count + excluded.order_count;
+    insert into sales_by_day (day, units_sold, revenue)
+    values ((select substr(order_date, 1, 10) from orders where order_id = new.order_id),
+            new.quantity, new.quantity * new.price)
+    on conflict (day) do update
+    set units_sold = units_sold + excluded.units_sold, revenue = revenue + excluded.revenue;
+end;
+
+create trigger if not exists rollup_payments_insert
+after insert on payments
+when new.status = 'PAID'
+begin
+    insert into sales_by_day (day, paid_revenue)
+    values (substr(coalesce(new.paid_at, (select order_date from orders where order_id = new.order_id)), 1, 10), new.amount)
+    on conflict (day) do update set paid_revenue = paid_revenue + excluded.paid_revenue;
+end;
+
+create trigger if not exists rollup_payments_paid
+after update of status on payments
+when new.status = 'PAID' and old.status is not 'PAID'
+begin
+    insert into sales_by_day (day, paid_revenue)
+    values (substr(coalesce(new.paid_at, (select order_date from orders where order_id = new.order_id)), 1, 10), new.amount)
+    on conflict (day) do update set paid_revenue = paid_revenue + excluded.paid_revenue;
+end;
+
+create trigger if not exists rollup_payments_unpaid
+after update of status on payments
+when old.status = 'PAID' and new.status <> 'PAID'
+begin
+    update sales_by_day set paid_revenue = paid_revenue - old.amount
+    where day = substr(coalesce(old.paid_at, (select order_date from orders where order_id = old.order_id)), 1, 10);
+end;
+"""
+
+# (table, embedded table) -> (local column, foreign column, one-to-many)
+RELATIONS = {
+    ("orders", "customers"): ("cust_id", "cust_id", False),
+    ("orders", "order_items"): ("order_id", "order_id", True),
+    ("orders", "payments"): ("order_id", "order_id", True),
+    ("order_items", "products"): ("prod_id", "prod_id", False),
+    ("order_items", "orders"): ("order_id", "order_id", False),
+    ("payments", "orders"): ("order_id", "order_id", False),
+    ("customers", "orders"): ("cust_id", "cust_id", True),
+    ("sales_by_product", "products"): ("prod_id", "prod_id", False),
+    ("sales_by_customer", "customers"): ("cust_id", "cust_id", False),
+}
+
+_IDENT = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+_IN_CHUNK = 500
+
+
+def now_iso(offset_s: float = 0.0) -> str:
+    now = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(seconds=offset_s)
+    return now.isoformat(timespec="microseconds")
+
+
+def _ident(name: str) -> str:
+    if not _IDENT.match(name):
+        raise APIError({"message": f"invalid identifier: {name}", "code": "42601"})
+    return f'"{name}"'
+
+
+def _split_top(text: str, sep: str = ",") -> List[str]:
+    """Split on sep outside parentheses and double quotes."""
+    parts, depth, quoted, buf, i = [], 0, False, [], 0
+    while i < len(text):
+        ch = text[i]
+        if quoted:
+            buf.append(ch)
+            if ch == "\\" and i + 1 < len(text):
+                buf.append(text[i + 1])
+                i += 1
+            elif ch == '"':
+                quoted = False
+        elif ch == '"':
+            quoted = True
+            buf.append(ch)
+        elif ch == "(":
+            depth += 1
+            buf.append(ch)
+        elif ch == ")":
+            depth -= 1
+            buf.append(ch)
+        elif ch == sep and depth == 0:
+            parts.append("".join(buf).strip())
+            buf = []
+        else:
+            buf.append(ch)
+        i += 1
+    if buf or parts:
+        parts.append("".join(buf).strip())
+    return [p for p in parts if p]
+
+
+def _unquote(value: str) -> str:
+    value = value.strip()
+    if len(value) >= 2 and value[0] == value[-1] == '"':
+        return re.sub(r"\\(.)", r"\1", value[1:-1])
+    return value
+
+
+# ------------------------
+# select= parsing
+# ------------------------
+class _Field:
+    __slots__ = ("alias", "name", "embed", "inner", "children")
+
+    def __init__(self, alias, name, embed=False, inner=False, children=None):
+        self.alias = alias
+        self.name = name
+        self.embed = embed
+        self.inner = inner
+        self.children = children or []
+
+
+def parse_select(columns: str) -> List[_Field]:
+    fields = []
+    for part in _split_top(columns or "*"):
+        alias = None
+        head = part
+        paren = part.find("(")
+        colon = part.find(":")
+        if colon != -1 and (paren == -1 or colon < paren):
+            alias, head = part[:colon].strip(), part[colon + 1:].strip()
+        if "(" in head:
+            name, inner = head[:head.index("(")].strip(), head[head.index("(") + 1:head.rindex(")")]
+            is_inner = name.endswith("!inner")
+            name = name.split("!")[0]
+            fields.append(_Field(alias or name, name, True, is_inner, parse_select(inner)))
+        else:
+            fields.append(_Field(alias or head, head))
+    return fields
+
+
+# ------------------------
+# Filters
+# ------------------------
+_OPS = {"eq": "=", "neq": "<>", "gt": ">", "gte": ">=", "lt": "<", "lte": "<="}
+
+
+def _condition(column: str, op: str, value: Any, negate: bool = False) -> Tuple[str, List]:
+    col = _ident(column)
+    if op in _OPS:
+        sql, params = f"{col} {_OPS[op]} ?", [value]
+    elif op == "in":
+        values = list(value)
+        sql, params = (f"{col} in ({','.join('?' * len(values))})", values) if values else ("0", [])
+    elif op == "ilike":
+        sql, params = f"{col} like ? escape '\\'", [value]
+    elif op == "like":
+        sql, params = f"{col} glob ?", [str(value).replace("%", "*").replace("_", "?")]
+    elif op == "is":
+        keyword = {None: "null", "null": "null", True: "1", "true": "1", False: "0", "false": "0"}[value]
+        sql, params = (f"{col} is null", []) if keyword == "null" else (f"{col} = {keyword}", [])
+    else:
+        raise APIError({"message": f"unsupported operator: {op}", "code": "PGRST100"})
+    return (f"not ({sql})", params) if negate else (sql, params)
+
+
+def _logic_tree(expr: str, conjunction: str = "or") -> Tuple[str, List]:
+    """Translate a PostgREST or=(...) / and(...) expression into SQL."""
+    clauses, params = [], []
+    for term in _split_top(expr):
+        m = re.match(r"^(not\.)?(and|or)\((.*)\)$", term, re.S)
+        if m:
+            sql, p = _logic_tree(m.group(3), m.group(2))
+            sql = f"not ({sql})" if m.group(1) else sql
+        else:
+            column, rest = term.split(".", 1)
+            negate = rest.startswith("not.")
+            if negate:
+                rest = rest[4:]
+            op, raw = rest.split(".", 1)
+            if op == "in":
+                value = [_unquote(v) for v in _split_top(raw.strip()[1:-1])]
+            elif op == "is":
+                value = raw
+            else:
+                value = _unquote(raw)
+                value = value.replace("*", "%") if op in ("like", "ilike") else value
+            sql, p = _condition(column, op, value, negate)
+        clauses.append(f"({sql})")
+        params.extend(p)
+    return f" {conjunction} ".join(clauses) or "1", params
+
+
+class FakeResponse:
+    def __init__(self, data, count: Optional[int] = None):
+        self.data = data
+        self.count = count
+
+
+# ------------------------
+# Query builder
+# ------------------------
+class FakeQuery:
+    """Chainable stand-in for postgrest's request builders."""
+
+    def __init__(self, client: "FakeSupabase", table: str):
+        self._client = client
+        self._table = table
+        self._op = "select"
+        self._fields = parse_select("*")
+        self._payload = None
+        self._on_conflict = None
+        self._where: List[Tuple[str, List]] = []
+        self._embed_where: Dict[str, List[Tuple[str, List]]] = {}
+        self._order: List[str] = []
+        self._limit: Optional[int] = None
+        self._offset: Optional[int] = None
+        self._count = None
+        self._negate = False
+
+    # operations
+    def select(self, columns: str = "*", count=None, **kwargs) -> "FakeQuery":
+        self._fields = parse_select(columns)
+        self._count = count
+        return self
+
+    def insert(self, payload, returning=None, **kwargs) -> "FakeQuery":
+        self._op, self._payload = "insert", payload
+        return self
+
+    def upsert(self, payload, on_conflict: str = "", returning=None, **kwargs) -> "FakeQuery":
+        self._op, self._payload, self._on_conflict = "upsert", payload, on_conflict
+        return self
+
+    def update(self, fields: Dict, returning=None, **kwargs) -> "FakeQuery":
+        self._op, self._payload = "update", fields
+        return self
+
+    def delete(self, returning=None, **kwargs) -> "FakeQuery":
+        self._op = "delete"
+        return self
+
+    # filters
+    def _filter(self, column: str, op: str, value) -> "FakeQuery":
+        negate, self._negate = self._negate, False
+        if "." in column:
+            embedded, column = column.split(".", 1)
+            self._embed_where.setdefault(embedded, []).append(_condition(column, op, value, negate))
+        else:
+            self._where.append(_condition(column, op, value, negate))
+        return self
+
+    @property
+    def not_(self) -> "FakeQuery":
+        self._negate = True
+        return self
+
+    def eq(self, column, value):
+        return self._filter(column, "eq", value)
+
+    def neq(self, column, value):
+        return self._filter(column, "neq", value)
+
+    def gt(self, column, value):
+        return self._filter(column, "gt", value)
+
+    def gte(self, column, value):
+        return self._filter(column, "gte", value)
+
+    def lt(self, column, value):
+        return self._filter(column, "lt", value)
+
+    def lte(self, column, value):
+        return self._filter(column, "lte", value)
+
+    def in_(self, column, values):
+        return self._filter(column, "in", values)
+
+    def ilike(self, column, pattern):
+        return self._filter(column, "ilike", pattern)
+
+    def like(self, column, pattern):
+        return self._filter(column, "like", pattern)
+
+    def is_(self, column, value):
+        return self._filter(column, "is", value)
+
+    def or_(self, filters: str, reference_table: Optional[str] = None):
+        self._where.append(_logic_tree(filters))
+        return self
+
+    # modifiers
+    def order(self, column: str, desc: bool = False, nullsfirst: bool = False, **kwargs) -> "FakeQuery":
+        self._order.append(f"{_ident(column)} {'desc' if desc else 'asc'}")
+        return self
+
+    def limit(self, size: int, **kwargs) -> "FakeQuery":
+        self._limit = size
+        return self
+
+    def offset(self, size: int) -> "FakeQuery":
+        self._offset = size
+        return self
+
+    def range(self, start: int, end: int, **kwargs) -> "FakeQuery":
+        self._offset, self._limit = start, end - start + 1
+        return self
+
+    def single(self) -> "FakeQuery":
+        self._limit = 1
+        return self
+
+    maybe_single = single
+
+    def execute(self) -> FakeResponse:
+        self._client.round_trip()
+        with self._client.lock:
+            try:
+                return getattr(self, f"_run_{self._op}")()
+            except sqlite3.IntegrityError as e:
+                code = "23505" if "UNIQUE" in str(e) else "23502" if "NOT NULL" in str(e) else "23514"
+                raise APIError({"message": str(e), "code": code})
+
+    # execution
+    def _where_sql(self) -> Tuple[str, List]:
+        clauses, params = [], []
+        for sql, p in self._where:
+            clauses.append(sql)
+            params.extend(p)
+        for field in self._fields:
+            if field.embed and field.inner:
+                local, foreign, _ = RELATIONS[(self._table, field.name)]
+                sub, sub_params = self._embedded_where(field.name)
+                clauses.append(f"{_ident(local)} in (select {_ident(foreign)} from {_ident(field.name)} where {sub})")
+                params.extend(sub_params)
+        return (" where " + " and ".join(clauses)) if clauses else "", params
+
+    def _embedded_where(self, name: str) -> Tuple[str, List]:
+        conds = self._embed_where.get(name, [])
+        return " and ".join(sql for sql, _ in conds) or "1", [v for _, p in conds for v in p]
+
+    def _run_select(self) -> FakeResponse:
+        where, params = self._where_sql()
+        sql = f"select * from {_ident(self._table)}{where}"
+        if self._order:
+            sql += " order by " + ", ".join(self._order)
+        if self._limit is not None or self._offset:
+            sql += f" limit {int(self._limit) if self._limit is not None else -1} offset {int(self._offset or 0)}"
+        rows = self._client.query(sql, params)
+        count = None
+        if self._count:
+            count = self._client.query(f"select count(*) as n from {_ident(self._table)}{where}", params)[0]["n"]
+        return FakeResponse(self._shape(self._table, rows, self._fields), count)
+
+    def _shape(self, table: str, rows: List[Dict], fields: List[_Field]) -> List[Dict]:
+        """Project columns and attach embedded resources (one IN query per embed)."""
+        embedded = {}
+        for field in fields:
+            if field.embed:
+                embedded[field.alias] = self._fetch_embedded(table, rows, field)
+        out = []
+        for row in rows:
+            shaped = {}
+            for field in fields:
+                if field.embed:
+                    local, _, many = RELATIONS[(table, field.name)]
+                    related = embedded[field.alias].get(row[local], [])
+                    shaped[field.alias] = related if many else (related[0] if related else None)
+                elif field.name == "*":
+                    shaped.update(row)
+                else:
+                    shaped[field.alias] = row[field.name]
+            out.append(shaped)
+        return out
+
+    def _fetch_embedded(self, table: str, rows: List[Dict], field: _Field) -> Dict[Any, List[Dict]]:
+        local, foreign, _ = RELATIONS[(table, field.name)]
+        keys = list({r[local] for r in rows if r[local] is not None})
+        sub, sub_params = self._embedded_where(field.name)
+        related: List[Dict] = []
+        for i in range(0, len(keys), _IN_CHUNK):
+            chunk = keys[i:i + _IN_CHUNK]
+            related += self._client.query(
+                f"select * from {_ident(field.name)} where {_ident(foreign)} in ({','.join('?' * len(chunk))})"
+                f" and ({sub})",
+                chunk + sub_params,
+            )
+        children = field.children
+        shaped = self._shape(field.name, related, children)
+        # keep the join key for grouping even if the projection dropped it
+        grouped: Dict[Any, List[Dict]] = {}
+        for raw, row in zip(related, shaped):
+            grouped.setdefault(raw[foreign], []).append(row)
+        return grouped
+
+    def _rows(self) -> List[Dict]:
+        return self._payload if isinstance(self._payload, list) else [self._payload]
+
+    def _run_insert(self) -> FakeResponse:
+        rows = self._rows()
+        if not rows:
+            return FakeResponse([])
+        out = []
+        with self._client.transaction():
+            for row in rows:
+                cols = list(row)
+                sql = (
+                    f"insert into {_ident(self._table)} ({','.join(map(_ident, cols))}) "
+                    f"values ({','.join('?' * len(cols))}) returning *"
+                )
+                out += self._client.query(sql, [row[c] for c in cols])
+        return FakeResponse(out)
+
+    def _run_upsert(self) -> FakeResponse:
+        rows = self._rows()
+        if not rows:
+            return FakeResponse([])
+        conflict = [c.strip() for c in (self._on_conflict or "").split(",") if c.strip()]
+        out = []
+        with self._client.transaction():
+            for row in rows:
+                cols = list(row)
+                updates = ", ".join(f"{_ident(c)} = excluded.{_ident(c)}" for c in cols if c not in conflict)
+                sql = (
+                    f"insert into {_ident(self._table)} ({','.join(map(_ident, cols))}) "
+                    f"values ({','.join('?' * len(cols))}) "
+                    f"on conflict ({','.join(map(_ident, conflict))}) do update set {updates} returning *"
+                )
+                out += self._client.query(sql, [row[c] for c in cols])
+        return FakeResponse(out)
+
+    def _run_update(self) -> FakeResponse:
+        where, params = self._where_sql()
+        cols = list(self._payload)
+        sets = ", ".join(f"{_ident(c)} = ?" for c in cols)
+        sql = f"update {_ident(self._table)} set {sets}{where} returning *"
+        with self._client.transaction():
+            return FakeResponse(self._client.query(sql, [self._payload[c] for c in cols] + params))
+
+    def _run_delete(self) -> FakeResponse:
+        where, params = self._where_sql()
+        with self._client.transaction():
+            return FakeResponse(self._client.query(f"delete from {_ident(self._table)}{where} returning *", params))
+
+
+class FakeRPC:
+    def __init__(self, client: "FakeSupabase", fn: str, params: Dict):
+        self._client = client
+        self._fn = fn
+        self._params = params
+
+    def execute(self) -> FakeResponse:
+        handler = getattr(self._client, f"rpc_{self._fn}", None)
+        if handler is None:
+            raise APIError({"message": f"Could not find the function public.{self._fn}", "code": "PGRST202"})
+        self._client.round_trip()
+        with self._client.lock, self._client.transaction():
+            kwargs = {k[2:] if k.startswith("p_") else k: v for k, v in (self._params or {}).items()}
+            return FakeResponse(handler(**kwargs))
+
+
+# ------------------------
+# Client
+# ------------------------
+class FakeSupabase:
+    """
+    SQLite-backed Supabase client stand-in. latency_ms (+ up to jitter_ms)
+    is slept once per execute(), i.e. per simulated HTTP round trip.
+    """
+
+    def __init__(self, path: str = ":memory:", latency_ms: float = 0.0, jitter_ms: float = 0.0, seed: int = 0):
+        self.path = path
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.lock = threading.RLock()
+        self._rng = random.Random(seed)
+        self._depth = 0
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("pragma journal_mode = wal" if path != ":memory:" else "pragma journal_mode = memory")
+        self.conn.execute("pragma synchronous = off")
+        self.conn.executescript(SCHEMA)
+
+    def install_triggers(self) -> None:
+        self.conn.executescript(TRIGGERS)
+
+    def round_trip(self) -> None:
+        delay = self.latency_ms + (self._rng.uniform(0, self.jitter_ms) if self.jitter_ms else 0.0)
+        if delay > 0:
+            time.sleep(delay / 1000)
+
+    def query(self, sql: str, params=()) -> List[Dict]:
+        params = params if isinstance(params, dict) else list(params)
+        return [dict(r) for r in self.conn.execute(sql, params).fetchall()]
+
+    def transaction(self):
+        return _Transaction(self)
+
+    def table(self, name: str) -> FakeQuery:
+        return FakeQuery(self, name)
+
+    from_ = table
+
+    def rpc(self, fn: str, params: Optional[Dict] = None, **kwargs) -> FakeRPC:
+        return FakeRPC(self, fn, params or {})
+
+    # ------------------------
+    # RPC ports of sql/*.sql
+    # ------------------------
+    @staticmethod
+    def _raise(message: str, code: str):
+        raise APIError({"message": message, "code": code})
+
+    @staticmethod
+    def _lines(items: List[Dict]) -> List[Tuple[int, int]]:
+        totals: Dict[int, int] = {}
+        for e in items:
+            totals[int(e["prod_id"])] = totals.get(int(e["prod_id"]), 0) + int(e["quantity"])
+        return sorted(totals.items())
+
+    def rpc_reserve_stock(self, items):
+        for prod_id, quantity in self._lines(items):
+            cur = self.conn.execute(
+                "update products set stock = stock - ? where prod_id = ? and stock >= ?", (quantity, prod_id, quantity)
+            )
+            if cur.rowcount == 0:
+                self._raise(f"Not enough stock for product {prod_id}", "P0001")
+        return None
+
+    def rpc_release_stock(self, items):
+        for prod_id, quantity in self._lines(items):
+            self.conn.execute("update products set stock = stock + ? where prod_id = ?", (quantity, prod_id))
+        return None
+
+    def rpc_adjust_stock(self, prod_id, delta):
+        return self.query(
+            "update products set stock = stock + ? where prod_id = ? and stock + ? >= 0 returning *",
+            (delta, prod_id, delta),
+        )
+
+    def _order_with_items(self, order_id: int) -> Dict:
+        order = self.query("select * from orders where order_id = ?", (order_id,))[0]
+        order["items"] = self.query("select * from order_items where order_id = ? order by item_id", (order_id,))
+        return order
+
+    def rpc_place_order(self, cust_id, items):
+        if not self.query("select 1 from customers where cust_id = ?", (cust_id,)):
+            self._raise(f"No customer found with id {cust_id}", "P0002")
+        self.rpc_reserve_stock(items)
+        prices = {
+            r["prod_id"]: r["price"]
+            for r in self.query(
+                f"select prod_id, price from products where prod_id in ({','.join('?' * len(items))})",
+                [int(e["prod_id"]) for e in items],
+            )
+        }
+        total = round(sum(prices[int(e["prod_id"])] * int(e["quantity"]) for e in items), 2)
+        order_id = self.conn.execute(
+            "insert into orders (cust_id, status, total_amount, order_date) values (?, 'PLACED', ?, ?)",
+            (cust_id, total, now_iso()),
+        ).lastrowid
+        self.conn.executemany(
+            "insert into order_items (order_id, prod_id, quantity, price) values (?, ?, ?, ?)",
+            [(order_id, int(e["prod_id"]), int(e["quantity"]), prices[int(e["prod_id"])]) for e in items],
+        )
+        self._queue_event("order.placed", order_id, {
+            "cust_id": cust_id, "total_amount": total, "prod_ids": sorted({int(e["prod_id"]) for e in items}),
+        })
+        return self._order_with_items(order_id)
+
+    def rpc_cancel_order(self, order_id):
+        cur = self.conn.execute(
+            "update orders set status = 'CANCELLED' where order_id = ? and status = 'PLACED'", (order_id,)
+        )
+        if cur.rowcount == 0:
+            return None
+        self._queue_event("order.cancelled", order_id, {"previous_status": "PLACED"})
+        order = self._order_with_items(order_id)
+        self.rpc_release_stock(order["items"])
+        return order
+
+    def rpc_transition_payment(self, order_id, **params):
+        frm, to = params["from"], params["to"]
+        method, key = params.get("method"), params.get("idempotency_key")
+        if (frm, to) not in (("PENDING", "PAID"), ("PAID", "REFUNDED"), ("PENDING", "CANCELLED")):
+            self._raise(f"Invalid payment transition {frm} -> {to}", "P0003")
+        if key is not None:
+            seen = self.query("select * from payment_transitions where idempotency_key = ?", (key,))
+            if seen:
+                if seen[0]["order_id"] != order_id or seen[0]["to_status"] != to:
+                    self._raise(f"Idempotency key {key} was used for another transition", "P0003")
+                rows = self.query("select * from payments where order_id = ? limit 1", (order_id,))
+                return rows[0] if rows else None
+            self.conn.execute(
+                "insert into payment_transitions (idempotency_key, order_id, from_status, to_status) values (?, ?, ?, ?)",
+                (key, order_id, frm, to),
+            )
+        if frm == "PENDING":
+            self.rpc_create_order_payments([order_id])
+        if to == "PAID" and self.query(
+            "select 1 from orders where order_id = ? and status = 'CANCELLED'", (order_id,)
+        ):
+            self._raise(f"Order {order_id} is cancelled", "P0003")
+        rows = self.query(
+            "update payments set status = ?, method = coalesce(?, method), "
+            "paid_at = case when ? = 'PAID' then ? else paid_at end "
+            "where order_id = ? and status = ? returning *",
+            (to, method, to, now_iso(), order_id, frm),
+        )
+        if not rows:
+            if not self.query("select 1 from payments where order_id = ?", (order_id,)):
+                self._raise(f"No payment found for order {order_id}", "P0002")
+            self._raise(f"Payment for order {order_id} is not {frm}", "P0003")
+        if to == "PAID":
+            self.conn.execute(
+                "update orders set status = 'COMPLETED' where order_id = ? and status = 'PLACED'", (order_id,)
+            )
+        return rows[0]
+
+    def rpc_settle_payments(self, rows):
+        latest = {int(r["order_id"]): r for r in rows}
+        ids = sorted(latest)
+        current = {}
+        for i in range(0, len(ids), _IN_CHUNK):
+            chunk = ids[i:i + _IN_CHUNK]
+            self.rpc_create_order_payments(chunk)
+            # a PENDING payment of a cancelled order counts as CANCELLED
+            for p in self.query(
+                "select p.order_id, p.amount, case when p.status = 'PENDING' and o.status = 'CANCELLED' "
+                "then 'CANCELLED' else p.status end as status "
+                f"from payments p join orders o using (order_id) where p.order_id in ({','.join('?' * len(chunk))})",
+                chunk,
+            ):
+                current[p["order_id"]] = p
+        settled, already, mismatches, paid_ids = 0, 0, [], []
+        now = now_iso()
+        for order_id in ids:
+            r, p = latest[order_id], current.get(order_id)
+            amount = round(float(r["amount"]), 2)
+            if p is None:
+                reason = "not_found"
+            elif round(p["amount"], 2) != amount:
+                reason = "amount_mismatch"
+            elif p["status"] == "PENDING":
+                paid_ids.append((r["method"], now, order_id))
+                continue
+            elif p["status"] == "PAID":
+                already += 1
+                continue
+            else:
+                reason = "invalid_status"
+            mismatches.append({
+                "order_id": order_id, "amount": amount, "expected": p and p["amount"],
+                "status": p and p["status"], "reason": reason,
+            })
+        if paid_ids:
+            self.conn.executemany(
+                "update payments set status = 'PAID', method = ?, paid_at = ? where order_id = ?", paid_ids
+            )
+            settled = len(paid_ids)
+        completed = 0
+        for method, _, order_id in paid_ids:
+            completed += self.conn.execute(
+                "update orders set status = 'COMPLETED' where order_id = ? and status = 'PLACED'", (order_id,)
+            ).rowcount
+        return {"settled": settled, "completed": completed, "already_paid": already, "mismatches": mismatches}
+
+    def rpc_refund_payments(self, order_ids):
+        ids = sorted(set(order_ids))
+        status = {}
+        for i in range(0, len(ids), _IN_CHUNK):
+            chunk = ids[i:i + _IN_CHUNK]
+            for p in self.query(
+                f"select order_id, status from payments where order_id in ({','.join('?' * len(chunk))})", chunk
+            ):
+                status[p["order_id"]] = p["status"]
+        to_refund = [(i,) for i in ids if status.get(i) == "PAID"]
+        self.conn.executemany("update payments set status = 'REFUNDED' where order_id = ?", to_refund)
+        skipped = [
+            {"order_id": i, "status": status.get(i), "reason": "not_found" if i not in status else "invalid_status"}
+            for i in ids if status.get(i) not in ("PAID", "REFUNDED")
+        ]
+        return {
+            "refunded": len(to_refund),
+            "already_refunded": sum(1 for i in ids if status.get(i) == "REFUNDED"),
+            "skipped": skipped,
+        }
+
+    # ------------------------
+    # sql/012_outbox.sql (events are queued by the place/cancel ports above
+    # instead of triggers, which would also fire during bulk loads)
+    # ------------------------
+    def _queue_event(self, event_type: str, order_id: int, payload: Dict) -> None:
+        now = now_iso()
+        self.conn.execute(
+            "insert into outbox_events (event_type, order_id, payload, available_at, created_at) values (?, ?, ?, ?, ?)",
+            (event_type, order_id, json.dumps(payload), now, now),
+        )
+
+    @staticmethod
+    def _marks(ids: List) -> str:
+        return ",".join("?" * len(ids))
+
+    def rpc_create_order_payments(self, order_ids):
+        ids = sorted(set(order_ids))
+        if not ids:
+            return 0
+        return self.conn.execute(
+            "insert into payments (order_id, amount, status) "
+            "select o.order_id, coalesce(o.total_amount, 0), "
+            "case when o.status = 'CANCELLED' then 'CANCELLED' else 'PENDING' end "
+            f"from orders o where o.order_id in ({self._marks(ids)}) "
+            "and not exists (select 1 from payments p where p.order_id = o.order_id)",
+            ids,
+        ).rowcount
+
+    def rpc_close_cancelled_payments(self, order_ids):
+        ids = sorted(set(order_ids))
+        result = {"cancelled": 0, "refunded": 0}
+        if not ids:
+            return result
+        scope = f"order_id in ({self._marks(ids)}) and order_id in (select order_id from orders where status = 'CANCELLED')"
+        result["refunded"] = self.conn.execute(
+            f"update payments set status = 'REFUNDED' where status = 'PAID' and {scope}", ids
+        ).rowcount
+        result["cancelled"] = self.conn.execute(
+            f"update payments set status = 'CANCELLED' where status = 'PENDING' and {scope}", ids
+        ).rowcount
+        return result
+
+    def rpc_claim_outbox_events(self, limit, lease_seconds=60):
+        rows = self.query(
+            "select * from outbox_events where status = 'PENDING' and available_at <= ? "
+            "order by available_at, event_id limit ?",
+            (now_iso(), limit),
+        )
+        hidden = now_iso(lease_seconds)
+        self.conn.executemany(
+            "update outbox_events set attempts = attempts + 1, available_at = ? where event_id = ?",
+            [(hidden, r["event_id"]) for r in rows],
+        )
+        for r in rows:
+            r.update(attempts=r["attempts"] + 1, available_at=hidden, payload=json.loads(r["payload"]))
+        return rows
+
+    def rpc_complete_outbox_events(self, event_ids):
+        if not event_ids:
+            return 0
+        return self.conn.execute(
+            "update outbox_events set status = 'DONE', processed_at = ?, last_error = null "
+            f"where event_id in ({self._marks(event_ids)}) and status = 'PENDING'",
+            [now_iso(), *event_ids],
+        ).rowcount
+
+    def rpc_fail_outbox_events(self, event_ids, error, retry_seconds=5, max_attempts=10):
+        failed = 0
+        for r in self.query(
+            f"select event_id, attempts from outbox_events where event_id in ({self._marks(event_ids)}) "
+            "and status = 'PENDING'", event_ids,
+        ):
+            delay = min(retry_seconds * 2 ** max(r["attempts"] - 1, 0), 3600)
+            status = "DEAD" if r["attempts"] >= max_attempts else "PENDING"
+            failed += self.conn.execute(
+                "update outbox_events set status = ?, available_at = ?, last_error = ? where event_id = ?",
+                (status, now_iso(delay), error, r["event_id"]),
+            ).rowcount
+        return failed
+
+    def rpc_requeue_outbox_events(self, event_type=None):
+        return self.conn.execute(
+            "update outbox_events set status = 'PENDING', attempts = 0, available_at = ? "
+            "where status = 'DEAD' and (? is null or event_type = ?)",
+            (now_iso(), event_type, event_type),
+        ).rowcount
+
+    def rpc_purge_outbox_events(self, keep_days=7):
+        return self.conn.execute(
+            "delete from outbox_events where status = 'DONE' and processed_at < ?", (now_iso(-keep_days * 86400),)
+        ).rowcount
+
+    def rpc_outbox_stats(self):
+        return {
+            r["event_type"]: {"pending": r["pending"], "dead": r["dead"], "oldest_pending": r["oldest_pending"]}
+            for r in self.query(
+                "select event_type, sum(status = 'PENDING') as pending, sum(status = 'DEAD') as dead, "
+                "min(case when status = 'PENDING' then created_at end) as oldest_pending "
+                "from outbox_events where status in ('PENDING', 'DEAD') group by event_type"
+            )
+        }
+
+    def rpc_top_selling_products(self, limit=5, **params):
+        date_from, date_to, category = params.get("from"), params.get("to"), params.get("category")
+        return self.query(
+            """
+            select p.prod_id, p.name, p.sku, p.price, p.stock, p.category, t.total_sold
+            from (
+                select oi.prod_id, sum(oi.quantity) as total_sold
+                from order_items oi
+                join orders o on o.order_id = oi.order_id
+                join products p2 on p2.prod_id = oi.prod_id
+                where o.status <> 'CANCELLED'
+                  and (:from is null or o.order_date >= :from)
+                  and (:to is null or o.order_date < :to)
+                  and (:category is null or p2.category = :category)
+                group by oi.prod_id
+                order by sum(oi.quantity) desc
+                limit :limit
+            ) t
+            join products p on p.prod_id = t.prod_id
+            order by t.total_sold desc, p.prod_id
+            """,
+            {"from": date_from, "to": date_to, "category": category, "limit": limit},
+        )
+
+    def rpc_revenue_by_bucket(self, bucket="day", group_by=None, **params):
+        date_from, date_to = params["from"], params["to"]
+        if bucket not in ("day", "week", "month"):
+            self._raise("bucket must be day, week or month", "22023")
+        trunc = {
+            "day": "substr(pay.paid_at, 1, 10)",
+            "week": "date(substr(pay.paid_at, 1, 10), '-6 days', 'weekday 1')",
+            "month": "substr(pay.paid_at, 1, 7) || '-01'",
+        }[bucket]
+        if group_by is None:
+            select, joins, group = "null, sum(pay.amount)", "", "1"
+        elif group_by == "method":
+            select, joins, group = "pay.method, sum(pay.amount)", "", "1, 2"
+        elif group_by == "category":
+            select = "p.category, sum(oi.quantity * oi.price)"
+            joins = " join order_items oi on oi.order_id = pay.order_id join products p on p.prod_id = oi.prod_id"
+            group = "1, 2"
+        else:
+            self._raise("group_by must be method or category", "22023")
+        rows = self.query(
+            f"select {trunc} || 'T00:00:00+00:00' as bucket, {select.split(',')[0]} as group_key, "
+            f"{select.split(',', 1)[1]} as revenue, count(distinct pay.order_id) as order_count "
+            f"from payments pay{joins} "
+            f"where pay.status = 'PAID' and pay.paid_at >= ? and pay.paid_at < ? "
+            f"group by {group} order by {group}",
+            (date_from, date_to),
+        )
+        return rows
+
+    def rpc_rebuild_sales_rollups(self):
+        # statement by statement: executescript() would commit the caller's transaction
+        script = (
+            """
+            delete from sales_by_product;
+            delete from sales_by_customer;
+            delete from sales_by_day;
+
+            insert into sales_by_product (prod_id, units_sold, revenue, order_count)
+            select oi.prod_id, sum(oi.quantity), sum(oi.quantity * oi.price), count(distinct oi.order_id)
+            from order_items oi join orders o on o.order_id = oi.order_id
+            where o.status <> 'CANCELLED'
+            group by oi.prod_id;
+
+            insert into sales_by_customer (cust_id, order_count, total_spent, last_order_at)
+            select cust_id, count(*), coalesce(sum(total_amount), 0), max(order_date)
+            from orders where status <> 'CANCELLED'
+            group by cust_id;
+
+            insert into sales_by_day (day, order_count, units_sold, revenue, paid_revenue)
+            select day, sum(order_count), sum(units_sold), sum(revenue), sum(paid_revenue)
+            from (
+                select substr(order_date, 1, 10) as day, count(*) as order_count, 0 as units_sold,
+                       0 as revenue, 0 as paid_revenue
+                from orders where status <> 'CANCELLED' group by 1
+                union all
+                select substr(o.order_date, 1, 10), 0, sum(oi.quantity), sum(oi.quantity * oi.price), 0
+                from order_items oi join orders o on o.order_id = oi.order_id
+                where o.status <> 'CANCELLED' group by 1
+                union all
+                select substr(coalesce(pay.paid_at, o.order_date), 1, 10), 0, 0, 0, sum(pay.amount)
+                from payments pay join orders o on o.order_id = pay.order_id
+                where pay.status = 'PAID' group by 1
+            ) parts
+            group by day;
+            """
+        )
+        for statement in script.split(";"):
+            if statement.strip():
+                self.conn.execute(statement)
+        return None
+
+
+class _Transaction:
+    """Re-entrant BEGIN IMMEDIATE / COMMIT, rolled back on error."""
+
+    def __init__(self, client: FakeSupabase):
+        self.client = client
+
+    def __enter__(self):
+        if self.client._depth == 0 and not self.client.conn.in_transaction:
+            self.client.conn.execute("begin immediate")
+            self._owner = True
+        else:
+            self._owner = False
+        self.client._depth += 1
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.client._depth -= 1
+        if self._owner:
+            self.client.conn.execute("rollback" if exc_type else "commit")
+        return False
@@ -0,0 +1,262 @@
+# benchmarks/service_suite.py
+"""
+Offline benchmark of the real services against a local PostgREST stand-in.
+
+Builds ProductService, OrderService, PaymentService and ReportingService on
+DAOs wired to benchmarks/fake_supabase.py (SQLite behind the query-builder
+API, RPCs ported from sql/), loads a generated dataset and times order
+placement, cancellation, payment processing and settlement, outbox
+dispatch, catalog listing and every ReportingService report. Each execute() sleeps for the
+injected --latency-ms, so round trips cost what they would over a network.
+
+Per scenario it reports throughput, p50/p99 latency and Supabase round
+trips per operation (from the DAO metrics, see src/dao/instrumentation.py).
+Save a run with --json and compare later runs with --baseline: more round
+trips per op, or a p50 worse than --tolerance, is a regression (exit 1).
+
+    python -m benchmarks.service_suite --scale 10k --latency-ms 5
+    python -m benchmarks.service_suite --scale 1m --db /tmp/bench-1m.db --json base.json
+    python -m benchmarks.service_suite --scale 1m --db /tmp/bench-1m.db --baseline base.json
+"""
+import argparse
+import datetime
+import json
+import random
+import sys
+import time
+from typing import Callable, Dict, List, Optional
+
+from benchmarks.datasets import CATEGORIES, SCALES, load
+from benchmarks.fake_supabase import FakeSupabase
+from src.dao.customer_dao import CustomerDAO
+from src.dao.instrumentation import METRICS
+from src.dao.order_dao import OrderDAO
+from src.dao.outbox_dao import OutboxDAO
+from src.dao.payment_dao import PaymentDAO
+from src.dao.product_dao import ProductDAO
+from src.dao.reporting_dao import ReportingDAO
+from src.dao.stock_dao import StockDAO
+from src.services.order_service import OrderError, OrderService
+from src.services.outbox_service import OutboxService
+from src.services.payment_service import PaymentError, PaymentService
+from src.services.product_service import ProductService
+from src.services.reporting_service import ReportingService
+
+# errors a scenario may legitimately hit (e.g. a product sold out mid-run)
+EXPECTED_ERRORS = (OrderError, PaymentError)
+SETTLE_ROWS = 100
+OUTBOX_BATCH = 50
+
+
+class Context:
+    """Services on one FakeSupabase plus pools of ids the scenarios consume."""
+
+    def __init__(self, sb: FakeSupabase, seed: int):
+        self.sb = sb
+        self.rng = random.Random(seed)
+        self.products = ProductService(dao=ProductDAO(sb=sb), stock_dao=StockDAO(sb=sb))
+        self.orders = OrderService(customer_dao=CustomerDAO(sb=sb), product_dao=ProductDAO(sb=sb), order_dao=OrderDAO(sb=sb))
+        self.payments = PaymentService(dao=PaymentDAO(sb=sb))
+        self.reports = ReportingService(dao=ReportingDAO(sb=sb))
+        self.outbox = OutboxService(
+            dao=OutboxDAO(sb=sb), payment_dao=PaymentDAO(sb=sb), product_dao=ProductDAO(sb=sb),
+            batch_size=OUTBOX_BATCH, on_low_stock=lambda products: None,
+        )
+
+        self.customer_count = sb.conn.execute("select count(*) from customers").fetchone()[0]
+        self.in_stock = [r[0] for r in sb.conn.execute("select prod_id from products where stock >= 50")]
+        # PENDING payments from the dataset, split between single payments and settlement
+        self.pending = [
+            (r[0], r[1]) for r in sb.conn.execute(
+                "select order_id, amount from payments where status = 'PENDING' order by order_id desc"
+            )
+        ]
+        self.placed: List[int] = []
+        today = datetime.date.today()
+        self.month_ago = str(today - datetime.timedelta(days=30))
+        self.quarter_ago = str(today - datetime.timedelta(days=90))
+        self.tomorrow = str(today + datetime.timedelta(days=1))
+
+    def basket(self) -> List[Dict]:
+        return [
+            {"prod_id": pid, "quantity": self.rng.randint(1, 3)}
+            for pid in self.rng.sample(self.in_stock, self.rng.randint(1, 3))
+        ]
+
+
+def _place_order(ctx: Context) -> None:
+    order = ctx.orders.create_order(ctx.rng.randint(1, ctx.customer_count), ctx.basket())
+    ctx.placed.append(order["order_id"])
+
+
+def _cancel_order(ctx: Context) -> None:
+    if not ctx.placed:
+        _place_order(ctx)
+    ctx.orders.cancel_order(ctx.placed.pop())
+
+
+def _process_payment(ctx: Context) -> None:
+    order_id, _ = ctx.pending.pop()
+    ctx.payments.process_payment(order_id, "Card", idempotency_key=f"bench-{order_id}")
+
+
+def _dispatch_outbox(ctx: Context) -> None:
+    # One batch of the events queued by the order scenarios. Once they are
+    # delivered, the newest ones are redelivered (directly in SQLite, no round
+    # trip), as after a dispatcher crash; the effects must absorb that.
+    pending = ctx.sb.conn.execute("select count(*) from outbox_events where status = 'PENDING'").fetchone()[0]
+    if pending == 0:
+        ctx.sb.conn.execute(
+            "update outbox_events set status = 'PENDING', available_at = created_at where event_id in "
+            "(select event_id from outbox_events order by event_id desc limit ?)",
+            (OUTBOX_BATCH,),
+        )
+    ctx.outbox.dispatch_once()
+
+
+def _settle_payments(ctx: Context) -> None:
+    batch = [ctx.pending.pop() for _ in range(min(SETTLE_ROWS, len(ctx.pending)))]
+    ctx.payments.settle_payments([{"order_id": o, "method": "UPI", "amount": a} for o, a in batch])
+
+
+# name -> (operation, share of --iterations to run; heavy scans run fewer times)
+SCENARIOS: Dict[str, tuple] = {
+    "order.place": (_place_order, 1.0),
+    "order.cancel": (_cancel_order, 1.0),
+    "order.details": (lambda ctx: ctx.orders.get_order_details(ctx.rng.randint(1, 1000)), 1.0),
+    "payment.process": (_process_payment, 1.0),
+    "payment.settle_batch": (_settle_payments, 0.2),
+    "outbox.dispatch_batch": (_dispatch_outbox, 0.2),
+    "catalog.list": (lambda ctx: ctx.products.list_all_products(limit=100), 1.0),
+    "catalog.list_category": (
+        lambda ctx: ctx.products.list_all_products(limit=100, category=ctx.rng.choice(CATEGORIES)), 1.0
+    ),
+    "catalog.iter_category": (
+        lambda ctx: sum(1 for _ in ctx.products.iter_products(category=ctx.rng.choice(CATEGORIES))), 0.1
+    ),
+    "catalog.low_stock": (lambda ctx: ctx.products.get_low_stock(threshold=5), 1.0),
+    "report.top_products": (lambda ctx: ctx.reports.top_selling_products(limit=10), 1.0),
+    "report.top_products_category": (
+        lambda ctx: ctx.reports.top_selling_products(limit=10, category=ctx.rng.choice(CATEGORIES)), 1.0
+    ),
+    "report.top_products_range": (
+        lambda ctx: ctx.reports.top_selling_products(limit=10, date_from=ctx.month_ago, date_to=ctx.tomorrow), 0.2
+    ),
+    "report.revenue_last_month": (lambda ctx: ctx.reports.total_revenue_last_month(), 1.0),
+    "report.revenue_by_day": (
+        lambda ctx: ctx.reports.revenue_by_bucket(ctx.month_ago, ctx.tomorrow, bucket="day"), 0.2
+    ),
+    "report.revenue_by_week_method": (
+        lambda ctx: ctx.reports.revenue_by_bucket(ctx.quarter_ago, ctx.tomorrow, bucket="week", group_by="method"),
+        0.2,
+    ),
+    "report.revenue_by_month_category": (
+        lambda ctx: ctx.reports.revenue_by_bucket(ctx.quarter_ago, ctx.tomorrow, bucket="month", group_by="category"),
+        0.1,
+    ),
+    "report.orders_per_customer": (lambda ctx: ctx.reports.orders_per_customer(min_orders=0, limit=100), 1.0),
+    "report.frequent_customers": (lambda ctx: ctx.reports.frequent_customers(limit=100), 1.0),
+}
+
+
+def run_scenario(ctx: Context, fn: Callable, iterations: int) -> Dict:
+    METRICS.reset()
+    samples, errors = [], 0
+    started = time.perf_counter()
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        try:
+            fn(ctx)
+        except EXPECTED_ERRORS:
+            errors += 1
+        samples.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - started
+    requests = sum(row["requests"] for row in METRICS.summary())
+    return {
+        "ops": iterations,
+        "errors": errors,
+        "ops_per_s": round(iterations / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(_quantile(samples, 0.5) * 1000, 2),
+        "p99_ms": round(_quantile(samples, 0.99) * 1000, 2),
+        "round_trips_per_op": round(requests / iterations, 2),
+    }
+
+
+def _quantile(samples: List[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+
+def compare(results: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """Regressions of results against a previous --json run."""
+    problems = []
+    for name, cur in results.items():
+        base = baseline.get("results", {}).get(name)
+        if not base:
+            continue
+        if cur["round_trips_per_op"] > base["round_trips_per_op"]:
+            problems.append(
+                f"{name}: round trips/op {base['round_trips_per_op']} -> {cur['round_trips_per_op']}"
+            )
+        if cur["p50_ms"] > base["p50_ms"] * (1 + tolerance):
+            problems.append(f"{name}: p50 {base['p50_ms']} ms -> {cur['p50_ms']} ms (+{tolerance:.0%} allowed)")
+    return problems
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", choices=sorted(SCALES), default="10k", help="dataset size in orders")
+    parser.add_argument("--db", default=":memory:", help="SQLite file to build once and reuse across runs")
+    parser.add_argument("--latency-ms", type=float, default=2.0, help="injected delay per round trip")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="extra random delay per round trip, 0..N")
+    parser.add_argument("--iterations", type=int, default=50, help="operations per scenario (before its share)")
+    parser.add_argument("--only", nargs="*", metavar="PREFIX", help="run scenarios starting with these prefixes")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", metavar="PATH", help="write results as JSON")
+    parser.add_argument("--baseline", metavar="PATH", help="JSON of a previous run to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed p50 slowdown vs baseline (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+
+    sb = FakeSupabase(args.db, seed=args.seed)
+    t0 = time.perf_counter()
+    counts = load(sb, SCALES[args.scale], seed=args.seed)
+    print(f"dataset {args.scale}: " + ", ".join(f"{k}={v}" for k, v in counts.items())
+          + f" ({time.perf_counter() - t0:.1f}s)")
+    # latency applies to the benchmark only, not to loading
+    sb.latency_ms, sb.jitter_ms = args.latency_ms, args.jitter_ms
+    METRICS.slow_query_ms = 0
+
+    ctx = Context(sb, args.seed)
+    selected = {
+        name: spec for name, spec in SCENARIOS.items()
+        if not args.only or any(name.startswith(p) for p in args.only)
+    }
+    results = {}
+    print(f"\n{'scenario':34} {'ops':>5} {'ops/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'trips/op':>9} {'errors':>6}")
+    for name, (fn, share) in selected.items():
+        iterations = max(1, int(args.iterations * share))
+        r = results[name] = run_scenario(ctx, fn, iterations)
+        print(f"{name:34} {r['ops']:>5} {r['ops_per_s']:>9.1f} {r['p50_ms']:>9.2f} {r['p99_ms']:>9.2f} "
+              f"{r['round_trips_per_op']:>9.2f} {r['errors']:>6}")
+
+    config = {k: getattr(args, k) for k in ("scale", "latency_ms", "jitter_ms", "iterations", "seed")}
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"config": config, "results": results}, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("config") != config:
+            print(f"\nwarning: baseline config differs: {baseline.get('config')}", file=sys.stderr)
+        problems = compare(results, baseline, args.tolerance)
+        if problems:
+            print("\nREGRESSIONS:")
+            for p in problems:
+                print(f"  {p}")
+            sys.exit(1)
+        print("\nno regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
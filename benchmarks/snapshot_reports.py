@@ -0,0 +1,152 @@
+# benchmarks/snapshot_reports.py
+"""
+Benchmark the columnar snapshot reporting engine (src/dao/snapshot_dao.py).
+
+Generates a synthetic snapshot with N order lines, then times every report
+on the vectorized engine and on a pure-Python dict-loop baseline over the
+same rows (the algorithm ReportingDAO used to run after downloading rows).
+With --live, the same reports are also timed through ReportingService
+against the configured Supabase project (load a comparable dataset first).
+
+    python -m benchmarks.snapshot_reports --lines 1000000 10000000
+"""
+import argparse
+import datetime
+import os
+import tempfile
+import time
+
+import numpy as np
+import pyarrow as pa
+
+from src.dao.snapshot_dao import SnapshotReportingDAO, snapshot_schema, write_table
+from src.services.reporting_service import ReportingService
+
+CATEGORIES = ["Accessories", "Electronics", "Grocery", "Home", "Toys", None]
+METHODS = ["Cash", "Card", "UPI"]
+
+
+def generate_snapshot(directory: str, lines: int, seed: int = 7) -> None:
+    rng = np.random.default_rng(seed)
+    n_products = 10_000
+    n_customers = max(1_000, lines // 100)
+    n_orders = max(1, lines // 3)
+    start = np.datetime64("2024-01-01T00:00:00", "us")
+    year_us = np.int64(365 * 24 * 3600 * 1_000_000)
+
+    prod_ids = np.arange(1, n_products + 1)
+    price = rng.uniform(10, 5000, n_products).round(2)
+    write_table(os.path.join(directory, "products.arrow"), pa.table({
+        "prod_id": prod_ids,
+        "name": [f"Product {i}" for i in prod_ids],
+        "sku": [f"SKU-{i:06d}" for i in prod_ids],
+        "price": price,
+        "stock": rng.integers(0, 500, n_products),
+        "category": [CATEGORIES[i] for i in rng.integers(0, len(CATEGORIES), n_products)],
+        "created_at": np.full(n_products, start),
+    }, schema=snapshot_schema("products")))
+
+    cust_ids = np.arange(1, n_customers + 1)
+    write_table(os.path.join(directory, "customers.arrow"), pa.table({
+        "cust_id": cust_ids,
+        "name": [f"Customer {i}" for i in cust_ids],
+        "email": [f"c{i}@example.com" for i in cust_ids],
+        "phone": [f"9{i:09d}" for i in cust_ids],
+        "city": ["Hyderabad"] * n_customers,
+        "created_at": np.full(n_customers, start),
+    }, schema=snapshot_schema("customers")))
+
+    order_ids = np.arange(1, n_orders + 1)
+    order_date = start + rng.integers(0, year_us, n_orders).astype("timedelta64[us]")
+    status = np.where(rng.random(n_orders) < 0.05, "CANCELLED", "COMPLETED")
+    item_order = np.sort(rng.integers(1, n_orders + 1, lines))
+    item_prod = rng.integers(1, n_products + 1, lines)
+    quantity = rng.integers(1, 5, lines)
+    item_price = price[item_prod - 1]
+    totals = np.bincount(item_order, weights=quantity * item_price, minlength=n_orders + 1)[1:]
+    write_table(os.path.join(directory, "orders.arrow"), pa.table({
+        "order_id": order_ids,
+        "cust_id": rng.integers(1, n_customers + 1, n_orders),
+        "order_date": order_date,
+        "status": status,
+        "total_amount": totals.round(2),
+    }, schema=snapshot_schema("orders")))
+    write_table(os.path.join(directory, "order_items.arrow"), pa.table({
+        "item_id": np.arange(1, lines + 1),
+        "order_id": item_order,
+        "prod_id": item_prod,
+        "quantity": quantity,
+        "price": item_price,
+    }, schema=snapshot_schema("order_items")))
+
+    paid = status != "CANCELLED"
+    write_table(os.path.join(directory, "payments.arrow"), pa.table({
+        "payment_id": order_ids,
+        "order_id": order_ids,
+        "amount": totals.round(2),
+        "method": [METHODS[i] for i in rng.integers(0, len(METHODS), n_orders)],
+        "paid_at": order_date,
+        "status": np.where(paid, "PAID", "REFUNDED"),
+    }, schema=snapshot_schema("payments")))
+
+
+def python_baseline(dao: SnapshotReportingDAO) -> None:
+    """The old row-at-a-time reports, minus the network: dict loops over columns."""
+    orders = dao.table("orders")
+    active = {o: s != "CANCELLED" for o, s in zip(orders.column("order_id").to_pylist(), orders.column("status").to_pylist())}
+    items = dao.table("order_items")
+    totals = {}
+    for oid, pid, qty in zip(items.column("order_id").to_pylist(), items.column("prod_id").to_pylist(),
+                             items.column("quantity").to_pylist()):
+        if active.get(oid):
+            totals[pid] = totals.get(pid, 0) + qty
+    sorted(totals.items(), key=lambda x: x[1], reverse=True)[:5]
+
+    counts = {}
+    for cid, s in zip(orders.column("cust_id").to_pylist(), orders.column("status").to_pylist()):
+        if s != "CANCELLED":
+            counts[cid] = counts.get(cid, 0) + 1
+    [c for c, n in counts.items() if n > 2]
+
+
+def reports(dao_or_service, today: datetime.date) -> None:
+    dao_or_service.top_selling_products(limit=5)
+    dao_or_service.total_revenue_last_month()
+    dao_or_service.revenue_by_bucket(str(today - datetime.timedelta(days=365)), str(today), bucket="month")
+    dao_or_service.orders_per_customer(limit=100)
+    dao_or_service.frequent_customers(limit=100)
+
+
+def timed(label: str, fn) -> float:
+    t0 = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - t0
+    print(f"  {label:<28} {elapsed * 1000:10.1f} ms")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, nargs="+", default=[1_000_000, 10_000_000])
+    parser.add_argument("--dir", help="keep generated snapshots here (default: temp dir)")
+    parser.add_argument("--live", action="store_true", help="also time the live ReportingService")
+    args = parser.parse_args()
+
+    today = datetime.date(2025, 1, 1)
+    for lines in args.lines:
+        base = args.dir or tempfile.mkdtemp(prefix="snapshot-bench-")
+        directory = os.path.join(base, f"{lines}")
+        os.makedirs(directory, exist_ok=True)
+        print(f"\n{lines:,} order lines")
+        timed("generate snapshot", lambda: generate_snapshot(directory, lines))
+
+        dao = SnapshotReportingDAO(directory)
+        timed("snapshot: load + all reports", lambda: reports(ReportingService(dao=dao), today))
+        timed("snapshot: all reports (warm)", lambda: reports(ReportingService(dao=dao), today))
+        timed("python dict-loop baseline", lambda: python_baseline(dao))
+        if args.live:
+            timed("live: all reports", lambda: reports(ReportingService(), today))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+-- sql/002_stock.sql
+-- Atomic stock engine used by StockDAO. Every change is a conditional
+-- single-row UPDATE, so concurrent writers only contend on the products they
+-- share and stock can never go negative.
+
+-- Reserve every line of a basket or nothing. Rows are locked in prod_id order
+-- so two multi-SKU reservations can never deadlock each other.
+create or replace function reserve_stock(p_items jsonb)
+returns void
+language plpgsql
+as $$
+declare
+    v_line record;
+    v_updated int;
+begin
+    for v_line in
+        select (e->>'prod_id')::int as prod_id, sum((e->>'quantity')::int) as quantity
+        from jsonb_array_elements(p_items) e
+        group by 1
+        order by 1
+    loop
+        update products
+        set stock = stock - v_line.quantity
+        where prod_id = v_line.prod_id and stock >= v_line.quantity;
+        get diagnostics v_updated = row_count;
+        if v_updated = 0 then
+            raise exception 'Not enough stock for product %', v_line.prod_id using errcode = 'P0001';
+        end if;
+    end loop;
+end;
+$$;
+
+-- Give reserved stock back (order cancelled).
+create or replace function release_stock(p_items jsonb)
+returns void
+language plpgsql
+as $$
+declare
+    v_line record;
+begin
+    for v_line in
+        select (e->>'prod_id')::int as prod_id, sum((e->>'quantity')::int) as quantity
+        from jsonb_array_elements(p_items) e
+        group by 1
+        order by 1
+    loop
+        update products set stock = stock + v_line.quantity where prod_id = v_line.prod_id;
+    end loop;
+end;
+$$;
+
+-- Relative stock change for a single product (restock or manual correction).
+create or replace function adjust_stock(p_prod_id int, p_delta int)
+returns setof products
+language sql
+as $$
+    update products
+    set stock = stock + p_delta
+    where prod_id = p_prod_id and stock + p_delta >= 0
+    returning *;
+$$;
+
+-- place_order now reserves through the shared engine.
+create or replace function place_order(p_cust_id int, p_items jsonb)
+returns jsonb
+language plpgsql
+as $$
+declare
+    v_order_id int;
+    v_total numeric(12,2);
+begin
+    if not exists (select 1 from customers where cust_id = p_cust_id) then
+        raise exception 'No customer found with id %', p_cust_id using errcode = 'P0002';
+    end if;
+
+    perform reserve_stock(p_items);
+
+    select coalesce(sum(p.price * (e->>'quantity')::int), 0) into v_total
+    from jsonb_array_elements(p_items) e
+    join products p on p.prod_id = (e->>'prod_id')::int;
+
+    insert into orders (cust_id, status, total_amount)
+    values (p_cust_id, 'PLACED', v_total)
+    returning order_id into v_order_id;
+
+    insert into order_items (order_id, prod_id, quantity, price)
+    select v_order_id, p.prod_id, (e->>'quantity')::int, p.price
+    from jsonb_array_elements(p_items) e
+    join products p on p.prod_id = (e->>'prod_id')::int;
+
+    insert into payments (order_id, amount, status)
+    values (v_order_id, v_total, 'PENDING');
+
+    return (
+        select to_jsonb(o) || jsonb_build_object(
+            'items', (select jsonb_agg(to_jsonb(i) order by i.item_id) from order_items i where i.order_id = o.order_id)
+        )
+        from orders o
+        where o.order_id = v_order_id
+    );
+end;
+$$;
@@ -0,0 +1,43 @@
+-- sql/003_top_selling_products.sql
+-- Top-N products by units sold, aggregated in the database and joined to
+-- products in the same query. Called by ReportingDAO.top_selling_products.
+
+create index if not exists order_items_order_id_idx on order_items (order_id);
+create index if not exists orders_order_date_idx on orders (order_date);
+create index if not exists products_category_idx on products (category);
+
+create or replace function top_selling_products(
+    p_limit int default 5,
+    p_from timestamptz default null,
+    p_to timestamptz default null,
+    p_category text default null
+)
+returns table (
+    prod_id int,
+    name text,
+    sku text,
+    price numeric,
+    stock int,
+    category text,
+    total_sold bigint
+)
+language sql
+stable
+as $$
+    select p.prod_id, p.name, p.sku, p.price, p.stock, p.category, t.total_sold
+    from (
+        select oi.prod_id, sum(oi.quantity) as total_sold
+        from order_items oi
+        join orders o on o.order_id = oi.order_id
+        join products p2 on p2.prod_id = oi.prod_id
+        where o.status <> 'CANCELLED'
+          and (p_from is null or o.order_date >= p_from)
+          and (p_to is null or o.order_date < p_to)
+          and (p_category is null or p2.category = p_category)
+        group by oi.prod_id
+        order by sum(oi.quantity) desc
+        limit p_limit
+    ) t
+    join products p on p.prod_id = t.prod_id
+    order by t.total_sold desc, p.prod_id;
+$$;
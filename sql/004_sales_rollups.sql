@@ -0,0 +1,211 @@
+-- sql/004_sales_rollups.sql
+-- Incrementally maintained sales aggregates read by ReportingDAO.
+-- Triggers on orders, order_items and payments keep them current in the same
+-- transaction as the write; rebuild_sales_rollups() recomputes from scratch
+-- (CLI: report rebuild).
+
+create table if not exists sales_by_product (
+    prod_id int primary key references products(prod_id) on delete cascade,
+    units_sold bigint not null default 0,
+    revenue numeric(14,2) not null default 0,
+    order_count bigint not null default 0
+);
+create index if not exists sales_by_product_units_idx on sales_by_product (units_sold desc);
+
+create table if not exists sales_by_customer (
+    cust_id int primary key references customers(cust_id) on delete cascade,
+    order_count bigint not null default 0,
+    total_spent numeric(14,2) not null default 0,
+    last_order_at timestamptz
+);
+create index if not exists sales_by_customer_orders_idx on sales_by_customer (order_count desc);
+
+create table if not exists sales_by_day (
+    day date primary key,
+    order_count bigint not null default 0,
+    units_sold bigint not null default 0,
+    revenue numeric(14,2) not null default 0,
+    paid_revenue numeric(14,2) not null default 0
+);
+
+-- ------------------------
+-- Apply helpers (sign = 1 to add, -1 to retract)
+-- ------------------------
+create or replace function rollup_apply_order(p_order orders, p_sign int)
+returns void
+language sql
+as $$
+    insert into sales_by_customer as s (cust_id, order_count, total_spent, last_order_at)
+    values (p_order.cust_id, p_sign, p_sign * coalesce(p_order.total_amount, 0), p_order.order_date)
+    on conflict (cust_id) do update
+    set order_count = s.order_count + excluded.order_count,
+        total_spent = s.total_spent + excluded.total_spent,
+        last_order_at = greatest(s.last_order_at, excluded.last_order_at);
+
+    insert into sales_by_day as s (day, order_count)
+    values (p_order.order_date::date, p_sign)
+    on conflict (day) do update
+    set order_count = s.order_count + excluded.order_count;
+$$;
+
+create or replace function rollup_apply_item(p_item order_items, p_day date, p_sign int)
+returns void
+language sql
+as $$
+    -- an order counts once per product however many lines it has for it:
+    -- only its first line (lowest item_id) moves order_count
+    insert into sales_by_product as s (prod_id, units_sold, revenue, order_count)
+    values (
+        p_item.prod_id,
+        p_sign * p_item.quantity,
+        p_sign * p_item.quantity * p_item.price,
+        case when exists (
+            select 1 from order_items i
+            where i.order_id = p_item.order_id and i.prod_id = p_item.prod_id and i.item_id < p_item.item_id
+        ) then 0 else p_sign end
+    )
+    on conflict (prod_id) do update
+    set units_sold = s.units_sold + excluded.units_sold,
+        revenue = s.revenue + excluded.revenue,
+        order_count = s.order_count + excluded.order_count;
+
+    insert into sales_by_day as s (day, units_sold, revenue)
+    values (p_day, p_sign * p_item.quantity, p_sign * p_item.quantity * p_item.price)
+    on conflict (day) do update
+    set units_sold = s.units_sold + excluded.units_sold,
+        revenue = s.revenue + excluded.revenue;
+$$;
+
+create or replace function rollup_apply_payment(p_amount numeric, p_day date)
+returns void
+language sql
+as $$
+    insert into sales_by_day as s (day, paid_revenue)
+    values (p_day, p_amount)
+    on conflict (day) do update
+    set paid_revenue = s.paid_revenue + excluded.paid_revenue;
+$$;
+
+-- ------------------------
+-- Triggers
+-- ------------------------
+create or replace function rollup_orders_trg()
+returns trigger
+language plpgsql
+as $$
+declare
+    v_item order_items;
+begin
+    if tg_op = 'INSERT' then
+        if new.status <> 'CANCELLED' then
+            perform rollup_apply_order(new, 1);
+        end if;
+    elsif old.status <> 'CANCELLED' and new.status = 'CANCELLED' then
+        perform rollup_apply_order(old, -1);
+        for v_item in select * from order_items where order_id = old.order_id loop
+            perform rollup_apply_item(v_item, old.order_date::date, -1);
+        end loop;
+    end if;
+    return null;
+end;
+$$;
+
+drop trigger if exists rollup_orders on orders;
+create trigger rollup_orders
+after insert or update of status on orders
+for each row execute function rollup_orders_trg();
+
+create or replace function rollup_order_items_trg()
+returns trigger
+language plpgsql
+as $$
+declare
+    v_order orders;
+begin
+    select * into v_order from orders where order_id = new.order_id;
+    if v_order.status <> 'CANCELLED' then
+        perform rollup_apply_item(new, v_order.order_date::date, 1);
+    end if;
+    return null;
+end;
+$$;
+
+drop trigger if exists rollup_order_items on order_items;
+create trigger rollup_order_items
+after insert on order_items
+for each row execute function rollup_order_items_trg();
+
+create or replace function rollup_payments_trg()
+returns trigger
+language plpgsql
+as $$
+begin
+    -- payments without paid_at are booked on their order's day, like the
+    -- rebuild does, so a rebuild never moves them
+    if new.status = 'PAID' and (tg_op = 'INSERT' or old.status is distinct from 'PAID') then
+        perform rollup_apply_payment(
+            new.amount,
+            coalesce(new.paid_at, (select order_date from orders where order_id = new.order_id))::date
+        );
+    elsif tg_op = 'UPDATE' and old.status = 'PAID' and new.status <> 'PAID' then
+        perform rollup_apply_payment(
+            -old.amount,
+            coalesce(old.paid_at, (select order_date from orders where order_id = old.order_id))::date
+        );
+    end if;
+    return null;
+end;
+$$;
+
+drop trigger if exists rollup_payments on payments;
+create trigger rollup_payments
+after insert or update of status on payments
+for each row execute function rollup_payments_trg();
+
+-- ------------------------
+-- Full rebuild
+-- ------------------------
+create or replace function rebuild_sales_rollups()
+returns void
+language plpgsql
+as $$
+begin
+    lock table sales_by_product, sales_by_customer, sales_by_day in exclusive mode;
+    truncate sales_by_product, sales_by_customer, sales_by_day;
+
+    insert into sales_by_product (prod_id, units_sold, revenue, order_count)
+    select oi.prod_id, sum(oi.quantity), sum(oi.quantity * oi.price), count(distinct oi.order_id)
+    from order_items oi
+    join orders o on o.order_id = oi.order_id
+    where o.status <> 'CANCELLED'
+    group by oi.prod_id;
+
+    insert into sales_by_customer (cust_id, order_count, total_spent, last_order_at)
+    select cust_id, count(*), coalesce(sum(total_amount), 0), max(order_date)
+    from orders
+    where status <> 'CANCELLED'
+    group by cust_id;
+
+    insert into sales_by_day (day, order_count, units_sold, revenue, paid_revenue)
+    select day, sum(order_count), sum(units_sold), sum(revenue), sum(paid_revenue)
+    from (
+        select o.order_date::date as day, count(*) as order_count, 0 as units_sold, 0 as revenue, 0 as paid_revenue
+        from orders o
+        where o.status <> 'CANCELLED'
+        group by 1
+        union all
+        select o.order_date::date, 0, sum(oi.quantity), sum(oi.quantity * oi.price), 0
+        from order_items oi
+        join orders o on o.order_id = oi.order_id
+        where o.status <> 'CANCELLED'
+        group by 1
+        union all
+        select coalesce(pay.paid_at, o.order_date)::date, 0, 0, 0, sum(pay.amount)
+        from payments pay
+        join orders o on o.order_id = pay.order_id
+        where pay.status = 'PAID'
+        group by 1
+    ) parts
+    group by day;
+end;
+$$;
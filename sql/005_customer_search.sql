@@ -0,0 +1,14 @@
+-- sql/005_customer_search.sql
+-- Indexes behind CustomerDAO lookups. cust_id and email are already covered
+-- by the primary key and unique constraint; these serve the case-insensitive
+-- prefix search (ILIKE 'value%') on email, name, phone and city.
+
+create extension if not exists pg_trgm;
+
+-- an earlier revision added a btree on lower(email); neither ILIKE nor the
+-- exact email lookups can use it
+drop index if exists customers_email_lower_idx;
+create index if not exists customers_email_trgm_idx on customers using gin (email gin_trgm_ops);
+create index if not exists customers_name_trgm_idx on customers using gin (name gin_trgm_ops);
+create index if not exists customers_phone_trgm_idx on customers using gin (phone gin_trgm_ops);
+create index if not exists customers_city_trgm_idx on customers using gin (city gin_trgm_ops);
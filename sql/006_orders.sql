@@ -0,0 +1,32 @@
+-- sql/006_orders.sql
+-- Indexes and functions behind the persistent OrderDAO.
+
+-- A customer's order history is one index range scan.
+create index if not exists orders_cust_id_order_date_idx on orders (cust_id, order_date desc);
+create index if not exists order_items_order_id_idx on order_items (order_id);
+
+-- Cancel a PLACED order and give its stock back in one transaction.
+-- Returns the updated order with its items, or null if the order is missing
+-- or not PLACED.
+create or replace function cancel_order(p_order_id int)
+returns jsonb
+language plpgsql
+as $$
+declare
+    v_order orders;
+    v_items jsonb;
+begin
+    update orders set status = 'CANCELLED'
+    where order_id = p_order_id and status = 'PLACED'
+    returning * into v_order;
+    if not found then
+        return null;
+    end if;
+
+    select jsonb_agg(to_jsonb(i) order by i.item_id) into v_items
+    from order_items i where i.order_id = p_order_id;
+
+    perform release_stock(coalesce(v_items, '[]'::jsonb));
+    return to_jsonb(v_order) || jsonb_build_object('items', v_items);
+end;
+$$;
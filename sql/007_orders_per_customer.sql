@@ -0,0 +1,6 @@
+-- sql/007_orders_per_customer.sql
+-- Paginated orders-per-customer report: ORDER BY order_count DESC, cust_id
+-- with a lower bound on order_count is a single index range scan.
+
+drop index if exists sales_by_customer_orders_idx;
+create index if not exists sales_by_customer_orders_idx on sales_by_customer (order_count desc, cust_id);
@@ -0,0 +1,55 @@
+-- sql/008_revenue_analytics.sql
+-- Revenue and order counts bucketed by day/week/month over any paid_at range,
+-- optionally split by payment method or product category.
+-- Called by ReportingDAO.revenue_by_bucket.
+
+create index if not exists payments_status_paid_at_idx on payments (status, paid_at);
+
+create or replace function revenue_by_bucket(
+    p_from timestamptz,
+    p_to timestamptz,
+    p_bucket text default 'day',
+    p_group_by text default null
+)
+returns table (
+    bucket timestamptz,
+    group_key text,
+    revenue numeric,
+    order_count bigint
+)
+language plpgsql
+stable
+as $$
+begin
+    if p_bucket not in ('day', 'week', 'month') then
+        raise exception 'bucket must be day, week or month' using errcode = '22023';
+    end if;
+
+    if p_group_by is null then
+        return query
+        select date_trunc(p_bucket, pay.paid_at), null::text, sum(pay.amount), count(distinct pay.order_id)
+        from payments pay
+        where pay.status = 'PAID' and pay.paid_at >= p_from and pay.paid_at < p_to
+        group by 1
+        order by 1;
+    elsif p_group_by = 'method' then
+        return query
+        select date_trunc(p_bucket, pay.paid_at), pay.method, sum(pay.amount), count(distinct pay.order_id)
+        from payments pay
+        where pay.status = 'PAID' and pay.paid_at >= p_from and pay.paid_at < p_to
+        group by 1, 2
+        order by 1, 2;
+    elsif p_group_by = 'category' then
+        return query
+        select date_trunc(p_bucket, pay.paid_at), p.category, sum(oi.quantity * oi.price), count(distinct pay.order_id)
+        from payments pay
+        join order_items oi on oi.order_id = pay.order_id
+        join products p on p.prod_id = oi.prod_id
+        where pay.status = 'PAID' and pay.paid_at >= p_from and pay.paid_at < p_to
+        group by 1, 2
+        order by 1, 2;
+    else
+        raise exception 'group_by must be method or category' using errcode = '22023';
+    end if;
+end;
+$$;
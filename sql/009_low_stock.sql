@@ -0,0 +1,30 @@
+-- sql/009_low_stock.sql
+-- Server-side low-stock scans behind ProductDAO.iter_low_stock.
+
+-- stock <= threshold is an index range scan; prod_id rides along so each
+-- keyset page (prod_id > last) is served from the same index.
+create index if not exists products_stock_prod_id_idx on products (stock, prod_id);
+-- Per-category thresholds: category = X and stock <= N.
+create index if not exists products_category_stock_idx on products (category, stock);
+
+-- When stock last changed, so watchers can poll only what moved since their
+-- previous check. Only stock changes bump it; edits to name/price do not.
+alter table products add column if not exists stock_changed_at timestamptz not null default now();
+create index if not exists products_stock_changed_at_idx on products (stock_changed_at, prod_id);
+
+create or replace function touch_stock_changed_at()
+returns trigger
+language plpgsql
+as $$
+begin
+    if new.stock is distinct from old.stock then
+        new.stock_changed_at := now();
+    end if;
+    return new;
+end;
+$$;
+
+drop trigger if exists products_stock_changed_at on products;
+create trigger products_stock_changed_at
+before update of stock on products
+for each row execute function touch_stock_changed_at();
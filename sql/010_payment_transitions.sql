@@ -0,0 +1,113 @@
+-- sql/010_payment_transitions.sql
+-- Payment state machine behind PaymentDAO.transition:
+--
+--   PENDING -> PAID -> REFUNDED
+--   PENDING -> CANCELLED
+--
+-- Every transition is one conditional UPDATE ... WHERE status = expected
+-- RETURNING *. Callers may pass an idempotency key; replaying a key returns
+-- the payment as it is without writing anything, so duplicate gateway
+-- webhooks cost a single round trip and no updates.
+
+create table if not exists payment_transitions (
+    idempotency_key text primary key,
+    order_id int not null references orders (order_id) on delete cascade,
+    from_status text not null,
+    to_status text not null,
+    created_at timestamptz not null default now()
+);
+
+-- Databases migrated before the cascade was added: re-create the foreign key
+-- so deleting an order (or its customer) also drops its transition log.
+alter table payment_transitions
+    drop constraint if exists payment_transitions_order_id_fkey,
+    add constraint payment_transitions_order_id_fkey
+        foreign key (order_id) references orders (order_id) on delete cascade;
+
+create index if not exists payments_order_id_idx on payments (order_id);
+
+-- Raises P0002 if the order has no payment and P0003 if the payment is not in
+-- p_from (or the key was already used for a different transition); either
+-- way nothing is written. Paying also completes the order in the same
+-- transaction.
+create or replace function transition_payment(
+    p_order_id int,
+    p_from text,
+    p_to text,
+    p_method text default null,
+    p_idempotency_key text default null
+)
+returns jsonb
+language plpgsql
+as $$
+declare
+    v_payment payments;
+    v_seen payment_transitions;
+begin
+    if (p_from, p_to) not in (('PENDING', 'PAID'), ('PAID', 'REFUNDED'), ('PENDING', 'CANCELLED')) then
+        raise exception 'Invalid payment transition % -> %', p_from, p_to using errcode = 'P0003';
+    end if;
+
+    if p_idempotency_key is not null then
+        -- A concurrent call with the same key blocks here until the first
+        -- one commits, then takes the replay branch.
+        insert into payment_transitions (idempotency_key, order_id, from_status, to_status)
+        values (p_idempotency_key, p_order_id, p_from, p_to)
+        on conflict (idempotency_key) do nothing;
+        if not found then
+            select * into v_seen from payment_transitions where idempotency_key = p_idempotency_key;
+            if v_seen.order_id <> p_order_id or v_seen.to_status <> p_to then
+                raise exception 'Idempotency key % was used for another transition', p_idempotency_key
+                    using errcode = 'P0003';
+            end if;
+            return (select to_jsonb(p) from payments p where p.order_id = p_order_id limit 1);
+        end if;
+    end if;
+
+    update payments
+    set status = p_to,
+        method = coalesce(p_method, method),
+        paid_at = case when p_to = 'PAID' then now() else paid_at end
+    where order_id = p_order_id and status = p_from
+    returning * into v_payment;
+    if not found then
+        if not exists (select 1 from payments where order_id = p_order_id) then
+            raise exception 'No payment found for order %', p_order_id using errcode = 'P0002';
+        end if;
+        raise exception 'Payment for order % is not %', p_order_id, p_from using errcode = 'P0003';
+    end if;
+
+    if p_to = 'PAID' then
+        update orders set status = 'COMPLETED' where order_id = p_order_id and status = 'PLACED';
+    end if;
+
+    return to_jsonb(v_payment);
+end;
+$$;
+
+-- Cancelling an order now also cancels its pending payment.
+create or replace function cancel_order(p_order_id int)
+returns jsonb
+language plpgsql
+as $$
+declare
+    v_order orders;
+    v_items jsonb;
+begin
+    update orders set status = 'CANCELLED'
+    where order_id = p_order_id and status = 'PLACED'
+    returning * into v_order;
+    if not found then
+        return null;
+    end if;
+
+    update payments set status = 'CANCELLED'
+    where order_id = p_order_id and status = 'PENDING';
+
+    select jsonb_agg(to_jsonb(i) order by i.item_id) into v_items
+    from order_items i where i.order_id = p_order_id;
+
+    perform release_stock(coalesce(v_items, '[]'::jsonb));
+    return to_jsonb(v_order) || jsonb_build_object('items', v_items);
+end;
+$$;
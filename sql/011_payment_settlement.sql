@@ -0,0 +1,114 @@
+-- sql/011_payment_settlement.sql
+-- Set-based settlement and refunds behind PaymentDAO.settle / refund_many.
+-- Each call handles a whole batch in one statement: the payments are locked in
+-- order_id order (so concurrent batches cannot deadlock), reconciled against
+-- the input and moved with a single UPDATE ... FROM.
+
+-- p_rows: [{"order_id": 1, "method": "Card", "amount": 99.5}, ...]
+-- Only PENDING payments whose amount matches are moved to PAID (and their
+-- orders to COMPLETED). Rows already PAID with the same amount count as
+-- already_paid, so re-running a settlement file is harmless. Everything else
+-- comes back in mismatches with a reason: not_found, amount_mismatch or
+-- invalid_status.
+create or replace function settle_payments(p_rows jsonb)
+returns jsonb
+language sql
+as $$
+    with input as (
+        select distinct on (order_id) *
+        from (
+            select (e->>'order_id')::int as order_id,
+                   e->>'method' as method,
+                   (e->>'amount')::numeric(12,2) as amount
+            from jsonb_array_elements(p_rows) e
+        ) r
+        order by order_id
+    ),
+    locked as (
+        select p.order_id, p.amount, p.status
+        from payments p
+        join input i using (order_id)
+        order by p.order_id
+        for update of p
+    ),
+    matched as (
+        select i.order_id, i.method, i.amount, l.amount as expected, l.status
+        from input i
+        left join locked l using (order_id)
+    ),
+    paid as (
+        update payments p
+        set status = 'PAID', method = m.method, paid_at = now()
+        from matched m
+        where p.order_id = m.order_id and m.status = 'PENDING' and m.amount = m.expected
+        returning p.order_id
+    ),
+    completed as (
+        update orders o
+        set status = 'COMPLETED'
+        from paid
+        where o.order_id = paid.order_id and o.status = 'PLACED'
+        returning o.order_id
+    )
+    select jsonb_build_object(
+        'settled', (select count(*) from paid),
+        'completed', (select count(*) from completed),
+        'already_paid', (select count(*) from matched where status = 'PAID' and amount = expected),
+        'mismatches', coalesce((
+            select jsonb_agg(jsonb_build_object(
+                'order_id', order_id,
+                'amount', amount,
+                'expected', expected,
+                'status', status,
+                'reason', case
+                    when status is null then 'not_found'
+                    when amount <> expected then 'amount_mismatch'
+                    else 'invalid_status'
+                end
+            ) order by order_id)
+            from matched
+            where status is null or amount <> expected or status not in ('PENDING', 'PAID')
+        ), '[]'::jsonb)
+    );
+$$;
+
+-- PAID -> REFUNDED for every order in p_order_ids. Payments already REFUNDED
+-- are counted, anything else is returned in skipped with a reason. Like
+-- transition_payment('PAID', 'REFUNDED') this only touches payments: the
+-- orders stay COMPLETED and their stock is not released.
+create or replace function refund_payments(p_order_ids int[])
+returns jsonb
+language sql
+as $$
+    with input as (
+        select distinct unnest(p_order_ids) as order_id
+    ),
+    locked as (
+        select p.order_id, p.status
+        from payments p
+        join input i using (order_id)
+        order by p.order_id
+        for update of p
+    ),
+    refunded as (
+        update payments p
+        set status = 'REFUNDED'
+        from locked l
+        where p.order_id = l.order_id and l.status = 'PAID'
+        returning p.order_id
+    )
+    select jsonb_build_object(
+        'refunded', (select count(*) from refunded),
+        'already_refunded', (select count(*) from locked where status = 'REFUNDED'),
+        'skipped', coalesce((
+            select jsonb_agg(jsonb_build_object(
+                'order_id', i.order_id,
+                'status', l.status,
+                'reason', case when l.status is null then 'not_found' else 'invalid_status' end
+            ) order by i.order_id)
+            from input i
+            left join locked l using (order_id)
+            where l.status is null or l.status not in ('PAID', 'REFUNDED')
+        ), '[]'::jsonb)
+    );
+$$;
@@ -0,0 +1,488 @@
+-- sql/012_outbox.sql
+-- Transactional outbox for the side effects of order and payment changes.
+--
+-- Triggers on orders write an event row in the same transaction as the
+-- change, so an event exists if and only if the change committed. Checkout
+-- (place_order) and cancel_order now only write the order itself. The
+-- OutboxService dispatcher (src/services/outbox_service.py) claims events in
+-- batches and applies their effects, with retries:
+--
+--   order.placed     create the PENDING payment, report ordered products
+--                    that fell to the low-stock threshold
+--   order.cancelled  cancel the PENDING payment (or refund a PAID one)
+--
+-- Delivery is at least once: a claimed batch is hidden for a lease; if its
+-- dispatcher dies, the events become visible again once the lease runs out.
+-- Every effect below is idempotent, so applying an event twice is harmless.
+
+create table if not exists outbox_events (
+    event_id bigserial primary key,
+    event_type text not null,
+    order_id int not null references orders (order_id) on delete cascade,
+    payload jsonb not null default '{}'::jsonb,
+    status text not null default 'PENDING' check (status in ('PENDING', 'DONE', 'DEAD')),
+    attempts int not null default 0,
+    available_at timestamptz not null default now(),
+    last_error text,
+    created_at timestamptz not null default now(),
+    processed_at timestamptz
+);
+
+-- Databases migrated before the cascade was added: re-create the foreign key
+-- so deleting an order (or its customer) also drops its events.
+alter table outbox_events
+    drop constraint if exists outbox_events_order_id_fkey,
+    add constraint outbox_events_order_id_fkey
+        foreign key (order_id) references orders (order_id) on delete cascade;
+
+-- Claiming is a range scan over the (small) set of undelivered events.
+create index if not exists outbox_events_pending_idx
+    on outbox_events (available_at, event_id) where status = 'PENDING';
+create index if not exists outbox_events_dead_idx on outbox_events (event_type) where status = 'DEAD';
+create index if not exists outbox_events_processed_at_idx on outbox_events (processed_at) where status = 'DONE';
+
+-- ------------------------
+-- Event triggers
+-- ------------------------
+-- Deferred to commit time, so the event can carry the order's products
+-- (order_items are inserted after the order row).
+create or replace function outbox_order_placed()
+returns trigger
+language plpgsql
+as $$
+begin
+    insert into outbox_events (event_type, order_id, payload)
+    values ('order.placed', new.order_id, jsonb_build_object(
+        'cust_id', new.cust_id,
+        'total_amount', new.total_amount,
+        'prod_ids', (select coalesce(jsonb_agg(distinct i.prod_id), '[]'::jsonb)
+                     from order_items i where i.order_id = new.order_id)
+    ));
+    return null;
+end;
+$$;
+
+drop trigger if exists outbox_orders_insert on orders;
+create constraint trigger outbox_orders_insert
+after insert on orders
+deferrable initially deferred
+for each row execute function outbox_order_placed();
+
+create or replace function outbox_order_cancelled()
+returns trigger
+language plpgsql
+as $$
+begin
+    insert into outbox_events (event_type, order_id, payload)
+    values ('order.cancelled', new.order_id, jsonb_build_object('previous_status', old.status));
+    return null;
+end;
+$$;
+
+drop trigger if exists outbox_orders_cancelled on orders;
+create trigger outbox_orders_cancelled
+after update of status on orders
+for each row
+when (new.status = 'CANCELLED' and old.status is distinct from 'CANCELLED')
+execute function outbox_order_cancelled();
+
+-- ------------------------
+-- Checkout and cancellation without inline payment writes
+-- ------------------------
+create or replace function place_order(p_cust_id int, p_items jsonb)
+returns jsonb
+language plpgsql
+as $$
+declare
+    v_order_id int;
+    v_total numeric(12,2);
+    v_line record;
+    v_updated int;
+begin
+    if not exists (select 1 from customers where cust_id = p_cust_id) then
+        raise exception 'No customer found with id %', p_cust_id using errcode = 'P0002';
+    end if;
+
+    -- Deduct stock in prod_id order so concurrent checkouts lock rows in the
+    -- same sequence and cannot deadlock each other.
+    for v_line in
+        select (e->>'prod_id')::int as prod_id, sum((e->>'quantity')::int) as quantity
+        from jsonb_array_elements(p_items) e
+        group by 1
+        order by 1
+    loop
+        update products
+        set stock = stock - v_line.quantity
+        where prod_id = v_line.prod_id and stock >= v_line.quantity;
+        get diagnostics v_updated = row_count;
+        if v_updated = 0 then
+            raise exception 'Not enough stock for product %', v_line.prod_id using errcode = 'P0001';
+        end if;
+    end loop;
+
+    select coalesce(sum(p.price * (e->>'quantity')::int), 0) into v_total
+    from jsonb_array_elements(p_items) e
+    join products p on p.prod_id = (e->>'prod_id')::int;
+
+    -- outbox_orders_insert queues order.placed; the payment follows from it
+    insert into orders (cust_id, status, total_amount)
+    values (p_cust_id, 'PLACED', v_total)
+    returning order_id into v_order_id;
+
+    insert into order_items (order_id, prod_id, quantity, price)
+    select v_order_id, p.prod_id, (e->>'quantity')::int, p.price
+    from jsonb_array_elements(p_items) e
+    join products p on p.prod_id = (e->>'prod_id')::int;
+
+    return (
+        select to_jsonb(o) || jsonb_build_object(
+            'items', (select jsonb_agg(to_jsonb(i) order by i.item_id) from order_items i where i.order_id = o.order_id)
+        )
+        from orders o
+        where o.order_id = v_order_id
+    );
+end;
+$$;
+
+-- The payment is settled by the order.cancelled event. Stock is released
+-- before the status update, so cancel_order takes row locks in the same
+-- sequence as place_order (products, then the rollups maintained by the
+-- orders trigger) and the two can no longer deadlock.
+create or replace function cancel_order(p_order_id int)
+returns jsonb
+language plpgsql
+as $$
+declare
+    v_order orders;
+    v_items jsonb;
+begin
+    perform 1 from orders where order_id = p_order_id and status = 'PLACED' for update;
+    if not found then
+        return null;
+    end if;
+
+    select jsonb_agg(to_jsonb(i) order by i.item_id) into v_items
+    from order_items i where i.order_id = p_order_id;
+    perform release_stock(coalesce(v_items, '[]'::jsonb));
+
+    update orders set status = 'CANCELLED'
+    where order_id = p_order_id
+    returning * into v_order;
+    return to_jsonb(v_order) || jsonb_build_object('items', v_items);
+end;
+$$;
+
+-- ------------------------
+-- Effects (batched, idempotent)
+-- ------------------------
+
+-- Give every order in p_order_ids a payment if it has none yet: PENDING for
+-- a live order, CANCELLED if the order was cancelled first. The orders are
+-- locked in order_id order, so this serialises with cancel_order and a
+-- cancellation can never miss a payment created concurrently.
+create or replace function create_order_payments(p_order_ids int[])
+returns int
+language plpgsql
+as $$
+declare
+    v_created int;
+begin
+    perform 1 from orders where order_id = any(p_order_ids) order by order_id for update;
+    -- a separate statement, so payments committed while we waited are seen
+    insert into payments (order_id, amount, status)
+    select o.order_id, coalesce(o.total_amount, 0),
+           case when o.status = 'CANCELLED' then 'CANCELLED' else 'PENDING' end
+    from orders o
+    where o.order_id = any(p_order_ids)
+      and not exists (select 1 from payments p where p.order_id = o.order_id);
+    get diagnostics v_created = row_count;
+    return v_created;
+end;
+$$;
+
+-- Settle the payments of cancelled orders: PENDING -> CANCELLED and
+-- PAID -> REFUNDED. Payments already in a final state are left alone.
+create or replace function close_cancelled_payments(p_order_ids int[])
+returns jsonb
+language sql
+as $$
+    with locked as (
+        select p.order_id, p.status
+        from payments p
+        join orders o on o.order_id = p.order_id and o.status = 'CANCELLED'
+        where p.order_id = any(p_order_ids)
+        order by p.order_id
+        for update of p
+    ),
+    closed as (
+        update payments p
+        set status = case when l.status = 'PAID' then 'REFUNDED' else 'CANCELLED' end
+        from locked l
+        where p.order_id = l.order_id and l.status in ('PENDING', 'PAID')
+        returning l.status as previous
+    )
+    select jsonb_build_object(
+        'cancelled', (select count(*) from closed where previous = 'PENDING'),
+        'refunded', (select count(*) from closed where previous = 'PAID')
+    );
+$$;
+
+-- Paying an order whose order.placed event is still queued creates its
+-- payment on the spot instead of failing with "no payment". A cancelled order
+-- cannot be paid (P0003) even while its order.cancelled event is queued and
+-- its payment is still PENDING.
+create or replace function transition_payment(
+    p_order_id int,
+    p_from text,
+    p_to text,
+    p_method text default null,
+    p_idempotency_key text default null
+)
+returns jsonb
+language plpgsql
+as $$
+declare
+    v_payment payments;
+    v_seen payment_transitions;
+begin
+    if (p_from, p_to) not in (('PENDING', 'PAID'), ('PAID', 'REFUNDED'), ('PENDING', 'CANCELLED')) then
+        raise exception 'Invalid payment transition % -> %', p_from, p_to using errcode = 'P0003';
+    end if;
+
+    if p_idempotency_key is not null then
+        -- A concurrent call with the same key blocks here until the first
+        -- one commits, then takes the replay branch.
+        insert into payment_transitions (idempotency_key, order_id, from_status, to_status)
+        values (p_idempotency_key, p_order_id, p_from, p_to)
+        on conflict (idempotency_key) do nothing;
+        if not found then
+            select * into v_seen from payment_transitions where idempotency_key = p_idempotency_key;
+            if v_seen.order_id <> p_order_id or v_seen.to_status <> p_to then
+                raise exception 'Idempotency key % was used for another transition', p_idempotency_key
+                    using errcode = 'P0003';
+            end if;
+            return (select to_jsonb(p) from payments p where p.order_id = p_order_id limit 1);
+        end if;
+    end if;
+
+    if p_from = 'PENDING' then
+        perform create_order_payments(array[p_order_id]);
+    end if;
+
+    -- create_order_payments holds the order's row lock, so a concurrent
+    -- cancel_order has either committed (and is seen here) or waits for us
+    -- and then finds the order COMPLETED.
+    if p_to = 'PAID' and exists (select 1 from orders where order_id = p_order_id and status = 'CANCELLED') then
+        raise exception 'Order % is cancelled', p_order_id using errcode = 'P0003';
+    end if;
+
+    update payments
+    set status = p_to,
+        method = coalesce(p_method, method),
+        paid_at = case when p_to = 'PAID' then now() else paid_at end
+    where order_id = p_order_id and status = p_from
+    returning * into v_payment;
+    if not found then
+        if not exists (select 1 from payments where order_id = p_order_id) then
+            raise exception 'No payment found for order %', p_order_id using errcode = 'P0002';
+        end if;
+        raise exception 'Payment for order % is not %', p_order_id, p_from using errcode = 'P0003';
+    end if;
+
+    if p_to = 'PAID' then
+        update orders set status = 'COMPLETED' where order_id = p_order_id and status = 'PLACED';
+    end if;
+
+    return to_jsonb(v_payment);
+end;
+$$;
+
+-- Settlement files likewise: orders whose payment has not been created yet
+-- get it first, so they settle instead of coming back as not_found. The
+-- PENDING payment of a cancelled order counts as CANCELLED (its
+-- order.cancelled event may not have run yet), so it is left unpaid and
+-- reported as invalid_status. Otherwise identical to
+-- sql/011_payment_settlement.sql.
+create or replace function settle_payments(p_rows jsonb)
+returns jsonb
+language plpgsql
+as $$
+declare
+    v_result jsonb;
+begin
+    perform create_order_payments(array(
+        select distinct (e->>'order_id')::int from jsonb_array_elements(p_rows) e
+    ));
+    -- a separate statement, so it sees the payments just created
+    with input as (
+        select distinct on (order_id) *
+        from (
+            select (e->>'order_id')::int as order_id,
+                   e->>'method' as method,
+                   (e->>'amount')::numeric(12,2) as amount
+            from jsonb_array_elements(p_rows) e
+        ) r
+        order by order_id
+    ),
+    locked as (
+        select p.order_id, p.amount, p.status
+        from payments p
+        join input i using (order_id)
+        order by p.order_id
+        for update of p
+    ),
+    matched as (
+        select i.order_id, i.method, i.amount, l.amount as expected,
+               case when l.status = 'PENDING' and o.status = 'CANCELLED' then 'CANCELLED' else l.status end as status
+        from input i
+        left join locked l using (order_id)
+        left join orders o using (order_id)
+    ),
+    paid as (
+        update payments p
+        set status = 'PAID', method = m.method, paid_at = now()
+        from matched m
+        where p.order_id = m.order_id and m.status = 'PENDING' and m.amount = m.expected
+        returning p.order_id
+    ),
+    completed as (
+        update orders o
+        set status = 'COMPLETED'
+        from paid
+        where o.order_id = paid.order_id and o.status = 'PLACED'
+        returning o.order_id
+    )
+    select jsonb_build_object(
+        'settled', (select count(*) from paid),
+        'completed', (select count(*) from completed),
+        'already_paid', (select count(*) from matched where status = 'PAID' and amount = expected),
+        'mismatches', coalesce((
+            select jsonb_agg(jsonb_build_object(
+                'order_id', order_id,
+                'amount', amount,
+                'expected', expected,
+                'status', status,
+                'reason', case
+                    when status is null then 'not_found'
+                    when amount <> expected then 'amount_mismatch'
+                    else 'invalid_status'
+                end
+            ) order by order_id)
+            from matched
+            where status is null or amount <> expected or status not in ('PENDING', 'PAID')
+        ), '[]'::jsonb)
+    ) into v_result;
+    return v_result;
+end;
+$$;
+
+-- ------------------------
+-- Dispatcher queue
+-- ------------------------
+
+-- Claim up to p_limit deliverable events, oldest first, and hide them for
+-- p_lease_seconds. skip locked lets concurrent dispatchers claim disjoint
+-- batches without waiting on each other.
+create or replace function claim_outbox_events(p_limit int, p_lease_seconds int default 60)
+returns setof outbox_events
+language sql
+as $$
+    update outbox_events e
+    set attempts = e.attempts + 1,
+        available_at = now() + make_interval(secs => p_lease_seconds)
+    from (
+        select event_id
+        from outbox_events
+        where status = 'PENDING' and available_at <= now()
+        order by available_at, event_id
+        limit p_limit
+        for update skip locked
+    ) c
+    where e.event_id = c.event_id
+    returning e.*;
+$$;
+
+create or replace function complete_outbox_events(p_event_ids bigint[])
+returns int
+language sql
+as $$
+    with done as (
+        update outbox_events
+        set status = 'DONE', processed_at = now(), last_error = null
+        where event_id = any(p_event_ids) and status = 'PENDING'
+        returning 1
+    )
+    select count(*)::int from done;
+$$;
+
+-- Put failed events back with exponential backoff (p_retry_seconds doubled
+-- per attempt, capped at an hour); after p_max_attempts they are parked as
+-- DEAD for an operator to inspect and requeue.
+create or replace function fail_outbox_events(
+    p_event_ids bigint[],
+    p_error text,
+    p_retry_seconds int default 5,
+    p_max_attempts int default 10
+)
+returns int
+language sql
+as $$
+    with failed as (
+        update outbox_events
+        set status = case when attempts >= p_max_attempts then 'DEAD' else 'PENDING' end,
+            available_at = now() + make_interval(
+                secs => least(p_retry_seconds * power(2, greatest(attempts - 1, 0)), 3600)
+            ),
+            last_error = p_error
+        where event_id = any(p_event_ids) and status = 'PENDING'
+        returning 1
+    )
+    select count(*)::int from failed;
+$$;
+
+-- DEAD -> PENDING with a fresh attempt budget (CLI: outbox requeue).
+create or replace function requeue_outbox_events(p_event_type text default null)
+returns int
+language sql
+as $$
+    with requeued as (
+        update outbox_events
+        set status = 'PENDING', attempts = 0, available_at = now()
+        where status = 'DEAD' and (p_event_type is null or event_type = p_event_type)
+        returning 1
+    )
+    select count(*)::int from requeued;
+$$;
+
+-- Backlog per event type: {"order.placed": {"pending": 3, "dead": 0, "oldest_pending": ...}, ...}
+create or replace function outbox_stats()
+returns jsonb
+language sql
+as $$
+    select coalesce(jsonb_object_agg(event_type, jsonb_build_object(
+        'pending', pending, 'dead', dead, 'oldest_pending', oldest_pending
+    )), '{}'::jsonb)
+    from (
+        select event_type,
+               count(*) filter (where status = 'PENDING') as pending,
+               count(*) filter (where status = 'DEAD') as dead,
+               min(created_at) filter (where status = 'PENDING') as oldest_pending
+        from outbox_events
+        where status in ('PENDING', 'DEAD')
+        group by event_type
+    ) s;
+$$;
+
+-- Delivered events are kept p_keep_days for auditing, then deleted
+-- (CLI: outbox purge).
+create or replace function purge_outbox_events(p_keep_days int default 7)
+returns int
+language sql
+as $$
+    with purged as (
+        delete from outbox_events
+        where status = 'DONE' and processed_at < now() - make_interval(days => p_keep_days)
+        returning 1
+    )
+    select count(*)::int from purged;
+$$;
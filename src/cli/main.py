@@ -1,18 +1,86 @@
 import argparse
+import datetime
+import importlib.util
 import json
-from src.services import product_service, customer_service, order_service, reporting_service
-from src.dao import product_dao, customer_dao
+import os
+import sys
+from functools import cached_property
+from src import config
+from src.cli.output import FORMATS, STREAM_FORMATS, detect_format, read_rows, write_rows
+from src.services.constants import (
+    LOW_STOCK_THRESHOLD,
+    PAYMENT_METHODS,
+    REVENUE_BUCKETS,
+    REVENUE_GROUPS,
+    SETTLE_BATCH_SIZE,
+)
+
+
+def _lazy_module(name: str):
+    """
+    Import name on first attribute access instead of now. The services pull
+    in supabase/postgrest/httpx, which dominates CLI startup, so they are only
+    loaded once a handler actually touches them; `--help` and argument
+    errors never do.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    spec.loader = importlib.util.LazyLoader(spec.loader)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+product_service = _lazy_module("src.services.product_service")
+customer_service = _lazy_module("src.services.customer_service")
+order_service = _lazy_module("src.services.order_service")
+payment_service = _lazy_module("src.services.payment_service")
+reporting_service = _lazy_module("src.services.reporting_service")
+outbox_service = _lazy_module("src.services.outbox_service")
+
+# global options that only affect this process, never forwarded to a server
+LOCAL_OPTIONS = ("profile", "metrics_out", "slow_query_ms", "server", "local")
+# arguments naming files; made absolute before forwarding
+PATH_ARGS = ("file", "out", "errors_out", "report_out", "dir", "snapshot_dir")
+# long-running handlers; never forwarded to a server
+LOCAL_COMMANDS = ("serve", "outbox_dispatch")
+
 
 class CLIApp:
     """Retail CLI Application"""
 
     def __init__(self):
-        self.parser = argparse.ArgumentParser(prog="retail-cli")
+        self.global_options = self._global_options()
+        self.parser = argparse.ArgumentParser(prog="retail-cli", parents=[self.global_options])
         self.subparsers = self.parser.add_subparsers(dest="cmd")
-        self.prod_service = product_service.ProductService()
-        self.cust_service = customer_service.CustomerService()
-        self.report_service = reporting_service.ReportingService()
-        self._build_commands()
+
+    # Services are built on first use, so a command only constructs (and
+    # imports) the one it needs.
+    @cached_property
+    def prod_service(self):
+        return product_service.ProductService()
+
+    @cached_property
+    def cust_service(self):
+        return customer_service.CustomerService()
+
+    @cached_property
+    def report_service(self):
+        return reporting_service.ReportingService()
+
+    @cached_property
+    def order_service(self):
+        return order_service.OrderService()
+
+    @cached_property
+    def payment_service(self):
+        return payment_service.PaymentService()
+
+    @cached_property
+    def outbox_service(self):
+        return outbox_service.OutboxService()
 
     # ------------------------
     # Product Handlers
@@ -26,8 +94,66 @@ class CLIApp:
             print("Error:", e)
 
     def product_list(self, args):
-        ps = self.prod_service.list_all_products()
-        print(json.dumps(ps, indent=2))
+        if args.format == "json" and not args.all:
+            ps = self.prod_service.list_all_products(limit=args.limit, category=args.category)
+            print(json.dumps(ps, indent=2))
+            return
+        rows = self.prod_service.iter_products(page_size=args.page_size, category=args.category)
+        write_rows(rows, args.format)
+
+    def product_import(self, args):
+        fmt = detect_format(args.file, args.format)
+        with open(args.file, newline="", encoding="utf-8") as f:
+            report = self.prod_service.import_products(read_rows(f, fmt), chunk_size=args.chunk_size, upsert=args.upsert)
+        print(f"Imported {report['written']} products, {report['failed']} failed.")
+        if args.errors_out:
+            with open(args.errors_out, "w", newline="", encoding="utf-8") as f:
+                write_rows(report["errors"], "ndjson", f)
+        elif report["errors"]:
+            write_rows(report["errors"][:20], "ndjson")
+            if report["failed"] > 20:
+                print(f"... {report['failed'] - 20} more (use --errors-out to save all)")
+
+    def product_export(self, args):
+        rows = self.prod_service.export_products(page_size=args.page_size, category=args.category)
+        if args.out:
+            with open(args.out, "w", newline="", encoding="utf-8") as f:
+                n = write_rows(rows, detect_format(args.out, args.format), f)
+            print(f"Exported {n} products to {args.out}")
+        else:
+            write_rows(rows, args.format or "ndjson")
+
+    @staticmethod
+    def _parse_threshold(spec):
+        category, _, threshold = spec.rpartition("=")
+        try:
+            if not category:
+                raise ValueError
+            return category, int(threshold)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"Expected CATEGORY=N, got '{spec}'")
+
+    def product_low_stock(self, args):
+        thresholds = dict(args.category_threshold or [])
+        try:
+            if args.watch:
+                batches = self.prod_service.watch_low_stock(
+                    args.threshold, thresholds, interval=args.interval, page_size=args.page_size
+                )
+                for batch in batches:
+                    write_rows(batch, "ndjson")
+                return
+            if args.all:
+                rows = self.prod_service.iter_low_stock(args.threshold, thresholds, page_size=args.page_size)
+            else:
+                rows = self.prod_service.get_low_stock(
+                    args.threshold, thresholds, limit=args.limit, after_id=args.after_id
+                )
+            write_rows(rows, args.format)
+        except product_service.ProductError as e:
+            print("Error:", e)
+        except KeyboardInterrupt:
+            pass
 
     # ------------------------
     # Customer Handlers
@@ -41,37 +167,276 @@ class CLIApp:
             print("Error:", e)
 
     def customer_list(self, args):
-        cs = self.cust_service.list_customers()
-        print(json.dumps(cs, indent=2))
+        write_rows(self.cust_service.iter_customers(page_size=args.page_size), args.format)
+
+    def customer_search(self, args):
+        try:
+            cs = self.cust_service.search_customers(
+                email=args.email, city=args.city, name=args.name, phone=args.phone, limit=args.limit
+            )
+            print(json.dumps(cs, indent=2))
+        except customer_service.CustomerError as e:
+            print("Error:", e)
+
+    # ------------------------
+    # Order Handlers
+    # ------------------------
+    @staticmethod
+    def _parse_item(spec):
+        prod_id, _, qty = spec.partition(":")
+        try:
+            return {"prod_id": int(prod_id), "quantity": int(qty or 1)}
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"Expected PROD_ID:QTY, got '{spec}'")
+
+    def order_create(self, args):
+        try:
+            o = self.order_service.create_order(args.customer_id, args.item)
+            print("Created order:")
+            print(json.dumps(o, indent=2))
+        except order_service.OrderError as e:
+            print("Error:", e)
+
+    def order_show(self, args):
+        try:
+            if len(args.order_id) == 1:
+                data = self.order_service.get_order_details(args.order_id[0])
+            else:
+                data = self.order_service.get_orders_details(args.order_id)
+            print(json.dumps(data, indent=2))
+        except order_service.OrderError as e:
+            print("Error:", e)
+
+    def order_list(self, args):
+        orders = self.order_service.list_orders_of_customer(args.customer_id, limit=args.limit)
+        print(json.dumps(orders, indent=2))
+
+    def order_cancel(self, args):
+        try:
+            o = self.order_service.cancel_order(args.order_id)
+            print("Cancelled order:")
+            print(json.dumps(o, indent=2))
+        except order_service.OrderError as e:
+            print("Error:", e)
+
+    def order_complete(self, args):
+        try:
+            o = self.order_service.complete_order(args.order_id)
+            print("Completed order:")
+            print(json.dumps(o, indent=2))
+        except order_service.OrderError as e:
+            print("Error:", e)
+
+    # ------------------------
+    # Payment Handlers
+    # ------------------------
+    def payment_pay(self, args):
+        try:
+            p = self.payment_service.process_payment(args.order_id, args.method, args.idempotency_key)
+            print("Payment recorded:")
+            print(json.dumps(p, indent=2))
+        except payment_service.PaymentError as e:
+            print("Error:", e)
+
+    def payment_refund(self, args):
+        try:
+            p = self.payment_service.refund_payment(args.order_id, args.idempotency_key)
+            print("Payment refunded:")
+            print(json.dumps(p, indent=2))
+        except payment_service.PaymentError as e:
+            print("Error:", e)
+
+    @staticmethod
+    def _print_report_rows(rows, total, out_path):
+        if out_path:
+            with open(out_path, "w", newline="", encoding="utf-8") as f:
+                write_rows(rows, detect_format(out_path), f)
+        elif rows:
+            write_rows(rows[:20], "ndjson")
+            if total > 20:
+                print(f"... {total - 20} more (use --report-out to save all)")
+
+    def payment_settle(self, args):
+        fmt = detect_format(args.file, args.format)
+        with open(args.file, newline="", encoding="utf-8") as f:
+            report = self.payment_service.settle_payments(read_rows(f, fmt), batch_size=args.batch_size)
+        print(f"Settled {report['settled']} payments ({report['completed']} orders completed), "
+              f"{report['already_paid']} already paid, {report['mismatched']} mismatches.")
+        self._print_report_rows(report["mismatches"], report["mismatched"], args.report_out)
+
+    def payment_refund_batch(self, args):
+        order_ids = list(args.order_id or [])
+        if args.file:
+            with open(args.file, newline="", encoding="utf-8") as f:
+                # validated by the service; bad values are reported as skipped
+                order_ids += [r.get("order_id") for r in read_rows(f, detect_format(args.file, args.format))]
+        report = self.payment_service.refund_payments(order_ids, batch_size=args.batch_size)
+        print(f"Refunded {report['refunded']} payments, {report['already_refunded']} already refunded, "
+              f"{len(report['skipped'])} skipped.")
+        self._print_report_rows(report["skipped"], len(report["skipped"]), args.report_out)
+
+    def payment_status(self, args):
+        p = self.payment_service.get_payment_status(args.order_id)
+        if not p:
+            print(f"Error: No payment found for order {args.order_id}")
+            return
+        print(json.dumps(p, indent=2))
 
     # ------------------------
     # Reporting Handlers
     # ------------------------
+    def _reports(self, args):
+        """
+        Live ReportingService, or one over an exported snapshot (--source
+        snapshot). A missing or incomplete snapshot is a ReportingError.
+        """
+        if getattr(args, "source", "live") == "snapshot":
+            try:
+                from src.dao.snapshot_dao import SNAPSHOT_TABLES, SnapshotReportingDAO
+                dao = SnapshotReportingDAO(args.snapshot_dir)
+                for table in SNAPSHOT_TABLES:
+                    dao.table(table)
+            except (ImportError, FileNotFoundError) as e:
+                raise reporting_service.ReportingError(str(e))
+            return reporting_service.ReportingService(dao=dao)
+        return self.report_service
+
     def report_top_products(self, args):
-        data = self.report_service.top_selling_products()
+        try:
+            data = self._reports(args).top_selling_products(
+                limit=args.limit, date_from=args.date_from, date_to=args.date_to, category=args.category
+            )
+        except reporting_service.ReportingError as e:
+            print("Error:", e)
+            return
         print("Top Selling Products:")
         print(json.dumps(data, indent=2))
 
     def report_total_revenue(self, args):
-        revenue = self.report_service.total_revenue_last_month()
-        print(f"Total Revenue Last Month: {revenue}")
+        if args.date_to and not args.date_from:
+            print("Error: --to needs --from (without --from the report is last month's total)")
+            return
+        try:
+            if not args.date_from:
+                revenue = self._reports(args).total_revenue_last_month()
+                print(f"Total Revenue Last Month: {revenue}")
+                return
+            date_to = args.date_to or datetime.date.today().isoformat()
+            data = self._reports(args).revenue_by_bucket(args.date_from, date_to, bucket=args.bucket, group_by=args.group_by)
+        except reporting_service.ReportingError as e:
+            print("Error:", e)
+            return
+        print(f"Revenue by {args.bucket}:")
+        print(json.dumps(data, indent=2))
 
     def report_orders_per_customer(self, args):
-        data = self.report_service.orders_per_customer()
+        try:
+            data = self._reports(args).orders_per_customer(
+                min_orders=args.min_orders, limit=args.limit, offset=args.offset
+            )
+        except reporting_service.ReportingError as e:
+            print("Error:", e)
+            return
         print("Orders per Customer:")
         print(json.dumps(data, indent=2))
 
     def report_frequent_customers(self, args):
-        data = self.report_service.frequent_customers()
+        try:
+            data = self._reports(args).frequent_customers(
+                min_orders=args.min_orders, limit=args.limit, offset=args.offset
+            )
+        except reporting_service.ReportingError as e:
+            print("Error:", e)
+            return
         print("Frequent Customers:")
         print(json.dumps(data, indent=2))
 
+    def report_rebuild(self, args):
+        self.report_service.rebuild_rollups()
+        print("Sales rollups rebuilt.")
+
+    def report_snapshot(self, args):
+        from src.dao.snapshot_dao import SnapshotExporter
+        counts = SnapshotExporter().export(args.dir, page_size=args.page_size)
+        print(f"Snapshot written to {args.dir}:")
+        print(json.dumps(counts, indent=2))
+
+    # ------------------------
+    # Outbox Handlers
+    # ------------------------
+    def outbox_dispatch(self, args):
+        import logging
+        import threading
+        service = outbox_service.OutboxService(batch_size=args.batch_size)
+        if args.once:
+            report = service.drain()
+            print(f"Dispatched {report['done']} events, {report['failed']} failed.")
+            return
+        logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+        print(f"dispatching outbox events ({args.workers} workers), Ctrl-C to stop", file=sys.stderr)
+        dispatcher = service.start(args.workers, poll_interval=args.poll_interval)
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            dispatcher.stop()
+
+    def outbox_status(self, args):
+        print(json.dumps(self.outbox_service.stats(), indent=2))
+
+    def outbox_dead(self, args):
+        print(json.dumps(self.outbox_service.list_dead(args.limit), indent=2))
+
+    def outbox_requeue(self, args):
+        n = self.outbox_service.requeue_dead(args.event_type)
+        print(f"Requeued {n} dead events.")
+
+    def outbox_purge(self, args):
+        try:
+            n = self.outbox_service.purge(args.days)
+            print(f"Purged {n} delivered events.")
+        except outbox_service.OutboxError as e:
+            print("Error:", e)
+
     # ------------------------
     # CLI Parser Setup
     # ------------------------
-    def _build_commands(self):
-        # Product
-        p_prod = self.subparsers.add_parser("product", help="product commands")
+    @staticmethod
+    def _global_options():
+        opts = argparse.ArgumentParser(add_help=False)
+        opts.add_argument("--profile", action="store_true",
+                          help="print Supabase requests per DAO method (count, rows, bytes, latency) to stderr")
+        opts.add_argument("--metrics-out", metavar="FILE", help="write request metrics in Prometheus text format")
+        opts.add_argument("--slow-query-ms", type=float,
+                          help=f"log requests slower than this (default {config.SLOW_QUERY_MS:g}, 0 = off)")
+        opts.add_argument("--server", metavar="URL", default=config.SERVER_URL or None,
+                          help="forward the command to a running `retail-cli serve` "
+                               "(http://host:port or unix:///path; default $RETAIL_SERVER_URL)")
+        opts.add_argument("--local", action="store_true", help="run in this process even if a server is configured")
+        return opts
+
+    def _build_commands(self, only=None):
+        """
+        Register every command group; only the subcommands of `only` (or of
+        all groups when None) are built, since argparse never looks inside
+        the others.
+        """
+        groups = {
+            "product": ("product commands", self._build_product),
+            "customer": ("customer commands", self._build_customer),
+            "order": ("order commands", self._build_order),
+            "payment": ("payment commands", self._build_payment),
+            "report": ("report commands", self._build_report),
+            "outbox": ("order/payment side-effect queue (see sql/012_outbox.sql)", self._build_outbox),
+            "serve": ("run the long-lived HTTP/JSON service (see src/server/main.py)", self._build_serve),
+        }
+        for name, (help_text, build) in groups.items():
+            group = self.subparsers.add_parser(name, help=help_text)
+            if only is None or only == name:
+                build(group)
+
+    def _build_product(self, p_prod):
         pprod_sub = p_prod.add_subparsers(dest="action")
 
         addp = pprod_sub.add_parser("add")
@@ -83,10 +448,44 @@ class CLIApp:
         addp.set_defaults(func=self.product_add)
 
         listp = pprod_sub.add_parser("list")
+        listp.add_argument("--format", choices=FORMATS, default="json",
+                           help="ndjson/csv stream the whole catalog page by page")
+        listp.add_argument("--all", action="store_true", help="list every product instead of --limit")
+        listp.add_argument("--limit", type=int, default=100)
+        listp.add_argument("--page-size", type=int)
+        listp.add_argument("--category")
         listp.set_defaults(func=self.product_list)
 
-        # Customer
-        pcust = self.subparsers.add_parser("customer", help="customer commands")
+        importp = pprod_sub.add_parser("import", help="bulk load products from CSV/NDJSON")
+        importp.add_argument("--file", required=True)
+        importp.add_argument("--format", choices=STREAM_FORMATS, help="default: from file extension")
+        importp.add_argument("--chunk-size", type=int, default=1000)
+        importp.add_argument("--upsert", action="store_true", help="update existing SKUs instead of rejecting them")
+        importp.add_argument("--errors-out", help="write per-row errors to this NDJSON file")
+        importp.set_defaults(func=self.product_import)
+
+        exportp = pprod_sub.add_parser("export", help="stream the catalog as CSV/NDJSON")
+        exportp.add_argument("--out", help="output file (default: stdout)")
+        exportp.add_argument("--format", choices=STREAM_FORMATS, help="default: from --out extension, else ndjson")
+        exportp.add_argument("--page-size", type=int)
+        exportp.add_argument("--category")
+        exportp.set_defaults(func=self.product_export)
+
+        lowp = pprod_sub.add_parser("low-stock", help="products at or below their stock threshold")
+        lowp.add_argument("--threshold", type=int, default=LOW_STOCK_THRESHOLD)
+        lowp.add_argument("--category-threshold", type=self._parse_threshold, action="append",
+                          metavar="CATEGORY=N", help="override --threshold for one category (repeatable)")
+        lowp.add_argument("--format", choices=FORMATS, default="json")
+        lowp.add_argument("--limit", type=int, default=100)
+        lowp.add_argument("--after-id", type=int, help="continue after this prod_id (next page)")
+        lowp.add_argument("--all", action="store_true", help="every low-stock product instead of one page")
+        lowp.add_argument("--page-size", type=int)
+        lowp.add_argument("--watch", action="store_true",
+                          help="keep polling; after the first batch only report products whose stock changed")
+        lowp.add_argument("--interval", type=float, default=60.0, help="seconds between --watch polls")
+        lowp.set_defaults(func=self.product_low_stock)
+
+    def _build_customer(self, pcust):
         pcust_sub = pcust.add_subparsers(dest="action")
 
         addc = pcust_sub.add_parser("add")
@@ -97,33 +496,226 @@ class CLIApp:
         addc.set_defaults(func=self.customer_add)
 
         listc = pcust_sub.add_parser("list")
+        listc.add_argument("--format", choices=FORMATS, default="json")
+        listc.add_argument("--page-size", type=int)
         listc.set_defaults(func=self.customer_list)
 
-        # Reporting
-        prep = self.subparsers.add_parser("report", help="report commands")
+        searchc = pcust_sub.add_parser("search", help="case-insensitive prefix search")
+        searchc.add_argument("--email")
+        searchc.add_argument("--name")
+        searchc.add_argument("--phone")
+        searchc.add_argument("--city")
+        searchc.add_argument("--limit", type=int, default=100)
+        searchc.set_defaults(func=self.customer_search)
+
+    def _build_order(self, pord):
+        pord_sub = pord.add_subparsers(dest="action")
+
+        addo = pord_sub.add_parser("create")
+        addo.add_argument("--customer-id", type=int, required=True)
+        addo.add_argument("--item", type=self._parse_item, action="append", required=True,
+                          metavar="PROD_ID:QTY", help="repeat for each product")
+        addo.set_defaults(func=self.order_create)
+
+        showo = pord_sub.add_parser("show")
+        showo.add_argument("order_id", type=int, nargs="+")
+        showo.set_defaults(func=self.order_show)
+
+        listo = pord_sub.add_parser("list")
+        listo.add_argument("--customer-id", type=int, required=True)
+        listo.add_argument("--limit", type=int)
+        listo.set_defaults(func=self.order_list)
+
+        cancelo = pord_sub.add_parser("cancel")
+        cancelo.add_argument("order_id", type=int)
+        cancelo.set_defaults(func=self.order_cancel)
+
+        completeo = pord_sub.add_parser("complete")
+        completeo.add_argument("order_id", type=int)
+        completeo.set_defaults(func=self.order_complete)
+
+    def _build_payment(self, ppay):
+        ppay_sub = ppay.add_subparsers(dest="action")
+
+        payp = ppay_sub.add_parser("pay", help="PENDING -> PAID (completes the order)")
+        payp.add_argument("order_id", type=int)
+        payp.add_argument("--method", choices=PAYMENT_METHODS, required=True)
+        payp.add_argument("--idempotency-key", help="retries with the same key are no-ops")
+        payp.set_defaults(func=self.payment_pay)
+
+        refundp = ppay_sub.add_parser("refund", help="PAID -> REFUNDED")
+        refundp.add_argument("order_id", type=int)
+        refundp.add_argument("--idempotency-key", help="retries with the same key are no-ops")
+        refundp.set_defaults(func=self.payment_refund)
+
+        settlep = ppay_sub.add_parser("settle", help="apply a processor settlement file (order_id, method, amount)")
+        settlep.add_argument("--file", required=True)
+        settlep.add_argument("--format", choices=STREAM_FORMATS, help="default: from file extension")
+        settlep.add_argument("--batch-size", type=int, default=SETTLE_BATCH_SIZE)
+        settlep.add_argument("--report-out", help="write the mismatch report to this CSV/NDJSON file")
+        settlep.set_defaults(func=self.payment_settle)
+
+        refundbp = ppay_sub.add_parser("refund-batch", help="refund many PAID payments at once")
+        refundbp.add_argument("--file", help="CSV/NDJSON with an order_id column")
+        refundbp.add_argument("--format", choices=STREAM_FORMATS, help="default: from file extension")
+        refundbp.add_argument("--order-id", type=int, action="append", help="repeatable")
+        refundbp.add_argument("--batch-size", type=int, default=SETTLE_BATCH_SIZE)
+        refundbp.add_argument("--report-out", help="write skipped orders to this CSV/NDJSON file")
+        refundbp.set_defaults(func=self.payment_refund_batch)
+
+        statusp = ppay_sub.add_parser("status")
+        statusp.add_argument("order_id", type=int)
+        statusp.set_defaults(func=self.payment_status)
+
+    def _build_report(self, prep):
+        prep.add_argument("--source", choices=("live", "snapshot"), default="live",
+                          help="snapshot: compute reports from an exported columnar snapshot")
+        prep.add_argument("--snapshot-dir", default=config.SNAPSHOT_DIR)
         rsub = prep.add_subparsers(dest="action")
 
         rtop = rsub.add_parser("top-products")
+        rtop.add_argument("--limit", type=int, default=5)
+        rtop.add_argument("--from", dest="date_from", help="start date (inclusive), e.g. 2025-01-01")
+        rtop.add_argument("--to", dest="date_to", help="end date (exclusive)")
+        rtop.add_argument("--category")
         rtop.set_defaults(func=self.report_top_products)
 
-        rrev = rsub.add_parser("revenue")
+        rrev = rsub.add_parser("revenue", help="last month's total, or bucketed revenue with --from")
+        rrev.add_argument("--from", dest="date_from", help="start date (inclusive), e.g. 2025-01-01")
+        rrev.add_argument("--to", dest="date_to", help="end date (exclusive, default today)")
+        rrev.add_argument("--bucket", choices=REVENUE_BUCKETS, default="day")
+        rrev.add_argument("--group-by", choices=REVENUE_GROUPS)
         rrev.set_defaults(func=self.report_total_revenue)
 
         rorders = rsub.add_parser("orders-per-customer")
+        rorders.add_argument("--min-orders", type=int, default=0, help="only customers with more than this many orders")
+        rorders.add_argument("--limit", type=int)
+        rorders.add_argument("--offset", type=int, default=0)
         rorders.set_defaults(func=self.report_orders_per_customer)
 
         rfreq = rsub.add_parser("frequent-customers")
+        rfreq.add_argument("--min-orders", type=int, default=2, help="more than this many orders (default 2)")
+        rfreq.add_argument("--limit", type=int)
+        rfreq.add_argument("--offset", type=int, default=0)
         rfreq.set_defaults(func=self.report_frequent_customers)
 
+        rrebuild = rsub.add_parser("rebuild", help="recompute sales rollups from scratch")
+        rrebuild.set_defaults(func=self.report_rebuild)
+
+        rsnap = rsub.add_parser("snapshot", help="export reporting tables to Arrow files (needs numpy, pyarrow)")
+        rsnap.add_argument("--dir", default=config.SNAPSHOT_DIR)
+        rsnap.add_argument("--page-size", type=int)
+        rsnap.set_defaults(func=self.report_snapshot)
+
+    def _build_outbox(self, pout):
+        pout_sub = pout.add_subparsers(dest="action")
+
+        dispatchp = pout_sub.add_parser("dispatch", help="apply queued events until Ctrl-C")
+        dispatchp.add_argument("--once", action="store_true", help="drain the deliverable events and exit")
+        dispatchp.add_argument("--workers", type=int, default=max(config.OUTBOX_WORKERS, 1))
+        dispatchp.add_argument("--batch-size", type=int, default=config.OUTBOX_BATCH_SIZE)
+        dispatchp.add_argument("--poll-interval", type=float, default=config.OUTBOX_POLL_INTERVAL,
+                               help="seconds to wait once the queue is empty")
+        dispatchp.set_defaults(func=self.outbox_dispatch)
+
+        statusp = pout_sub.add_parser("status", help="pending and dead events per type")
+        statusp.set_defaults(func=self.outbox_status)
+
+        deadp = pout_sub.add_parser("dead", help="list events that ran out of attempts")
+        deadp.add_argument("--limit", type=int, default=100)
+        deadp.set_defaults(func=self.outbox_dead)
+
+        requeuep = pout_sub.add_parser("requeue", help="retry dead events")
+        requeuep.add_argument("--event-type", help="e.g. order.placed (default: all)")
+        requeuep.set_defaults(func=self.outbox_requeue)
+
+        purgep = pout_sub.add_parser("purge", help="delete delivered events")
+        purgep.add_argument("--days", type=int, default=7, help="keep events delivered in the last N days")
+        purgep.set_defaults(func=self.outbox_purge)
+
+    def _build_serve(self, pserve):
+        pserve.add_argument("--listen", default=config.SERVER_LISTEN,
+                            help=f"host:port or unix:///path (default {config.SERVER_LISTEN})")
+        pserve.add_argument("--workers", type=int, default=config.SERVER_WORKERS,
+                            help=f"worker threads (default {config.SERVER_WORKERS})")
+        pserve.add_argument("--outbox-workers", type=int, default=config.OUTBOX_WORKERS,
+                            help=f"background outbox dispatchers, 0 = none (default {config.OUTBOX_WORKERS})")
+        pserve.set_defaults(func=self.serve)
+
+    def serve(self, args):
+        import logging
+        from src.server.main import serve
+        logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+        serve(args.listen, args.workers, args.outbox_workers)
+
     # ------------------------
     # Run
     # ------------------------
-    def run(self):
-        args = self.parser.parse_args()
-        if hasattr(args, "func"):
-            args.func(args)
-        else:
+    def run(self, argv=None):
+        argv = sys.argv[1:] if argv is None else argv
+        _, rest = self.global_options.parse_known_args(argv)
+        group = next((a for a in rest if not a.startswith("-")), None)
+        self._build_commands(only=group)
+        args = self.parser.parse_args(argv)
+        if not hasattr(args, "func"):
             self.parser.print_help()
+            return
+        measured = args.profile or args.metrics_out or args.slow_query_ms is not None
+        # metrics, --watch streams and long-running commands always run here
+        local_only = measured or getattr(args, "watch", False) or args.func.__name__ in LOCAL_COMMANDS
+        if args.server and not args.local and not local_only:
+            if self._forward(args):
+                return
+        if measured:
+            from src.dao.instrumentation import METRICS
+            if args.slow_query_ms is not None:
+                METRICS.slow_query_ms = args.slow_query_ms
+        try:
+            args.func(args)
+        finally:
+            if measured:
+                self._write_metrics(args, METRICS)
+
+    @staticmethod
+    def _forward(args):
+        """
+        Run the command on args.server. Returns False (after a warning) if
+        no server is listening, so the caller runs it locally instead.
+        """
+        from src.server.client import ServerUnavailable, forward_command
+        payload = {k: v for k, v in vars(args).items() if k not in LOCAL_OPTIONS and k != "func"}
+        for key in PATH_ARGS:
+            if payload.get(key):
+                payload[key] = os.path.abspath(payload[key])
+        try:
+            reply = forward_command(args.server, args.func.__name__, payload)
+        except ServerUnavailable as e:
+            print(f"warning: {e}; running locally", file=sys.stderr)
+            return False
+        sys.stdout.write(reply["output"])
+        if reply.get("error"):
+            print(reply["error"], file=sys.stderr)
+            sys.exit(1)
+        return True
+
+    @staticmethod
+    def _write_metrics(args, metrics):
+        if args.metrics_out:
+            with open(args.metrics_out, "w", encoding="utf-8") as f:
+                f.write(metrics.prometheus())
+        if not args.profile:
+            return
+        rows = metrics.summary()
+        total_ms = sum(r["total_ms"] for r in rows)
+        print(f"\nprofile: {sum(r['requests'] for r in rows)} requests, {total_ms:.1f} ms, "
+              f"{sum(r['rows'] for r in rows)} rows, {sum(r['bytes'] for r in rows) / 1024:.1f} KiB", file=sys.stderr)
+        print(f"  {'requests':>8} {'rows':>8} {'KiB':>8} {'total_ms':>9} {'p50_ms':>7} {'p95_ms':>7}  call",
+              file=sys.stderr)
+        for r in rows:
+            print(f"  {r['requests']:>8} {r['rows']:>8} {r['bytes'] / 1024:>8.1f} {r['total_ms']:>9.1f} "
+                  f"{r['p50_ms']:>7.1f} {r['p95_ms']:>7.1f}  {r['dao']}.{r['method']} "
+                  f"{r['operation']} {r['table']}" + (f" ({r['errors']} errors)" if r["errors"] else ""),
+                  file=sys.stderr)
 
 if __name__ == "__main__":
     CLIApp().run()
@@ -0,0 +1,62 @@
+# src/cli/output.py
+import csv
+import json
+import sys
+from typing import Dict, Iterable, Iterator, Optional, TextIO
+
+FORMATS = ("json", "ndjson", "csv")
+STREAM_FORMATS = ("ndjson", "csv")
+
+
+def detect_format(path: str, fmt: Optional[str] = None) -> str:
+    """
+    Return fmt if given, otherwise guess ndjson/csv from the file extension.
+    """
+    if fmt:
+        return fmt
+    return "ndjson" if path.lower().endswith((".ndjson", ".jsonl")) else "csv"
+
+
+def read_rows(f: TextIO, fmt: str) -> Iterator[Dict]:
+    """
+    Lazily yield dict rows from an open CSV or NDJSON file.
+    """
+    if fmt == "csv":
+        yield from csv.DictReader(f)
+    elif fmt == "ndjson":
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+    else:
+        raise ValueError(f"Unknown input format: {fmt}")
+
+
+def write_rows(rows: Iterable[Dict], fmt: str = "json", out: Optional[TextIO] = None, flush_every: int = 500) -> int:
+    """
+    Write rows to out (stdout by default) and return how many were written.
+    ndjson and csv are written incrementally, so output starts with the first
+    page and memory stays flat; json buffers the whole list for indenting.
+    """
+    out = out or sys.stdout
+    if fmt == "json":
+        data = list(rows)
+        out.write(json.dumps(data, indent=2, default=str) + "\n")
+        return len(data)
+
+    count = 0
+    writer = None
+    for row in rows:
+        if fmt == "ndjson":
+            out.write(json.dumps(row, default=str) + "\n")
+        elif fmt == "csv":
+            if writer is None:
+                writer = csv.DictWriter(out, fieldnames=list(row.keys()), extrasaction="ignore")
+                writer.writeheader()
+            writer.writerow(row)
+        else:
+            raise ValueError(f"Unknown output format: {fmt}")
+        count += 1
+        if count % flush_every == 0:
+            out.flush()
+    out.flush()
+    return count
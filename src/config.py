@@ -1,18 +1,206 @@
 # src/config.py
 import os
+import threading
+import weakref
+from typing import TYPE_CHECKING, Dict
 from dotenv import load_dotenv
-from supabase import create_client, Client
+
+# supabase/httpx/asyncio take a few hundred ms to import, so they are only
+# loaded when the first client is created (see src/cli/main.py: `--help`
+# and argument errors never need them).
+if TYPE_CHECKING:
+    import asyncio
+    import httpx
+    from psycopg_pool import ConnectionPool
+    from supabase import Client, AsyncClient
  
 load_dotenv()  # loads .env from project root
  
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
- 
-def get_supabase() -> Client:
+
+# HTTP connection pool shared by every DAO
+SUPABASE_POOL_SIZE = int(os.getenv("SUPABASE_POOL_SIZE", "10"))
+SUPABASE_TIMEOUT = float(os.getenv("SUPABASE_TIMEOUT", "10"))
+SUPABASE_CONNECT_TIMEOUT = float(os.getenv("SUPABASE_CONNECT_TIMEOUT", "5"))
+SUPABASE_KEEPALIVE_EXPIRY = float(os.getenv("SUPABASE_KEEPALIVE_EXPIRY", "60"))
+
+# Storage backend behind every DAO (see src/dao/storage.py):
+# supabase (PostgREST over HTTPS) or postgres (direct, pooled connections)
+STORAGE_BACKEND = os.getenv("RETAIL_STORAGE_BACKEND", "supabase")
+DATABASE_URL = os.getenv("DATABASE_URL")
+PG_POOL_MIN_SIZE = int(os.getenv("PG_POOL_MIN_SIZE", "1"))
+PG_POOL_SIZE = int(os.getenv("PG_POOL_SIZE", "10"))
+PG_POOL_TIMEOUT = float(os.getenv("PG_POOL_TIMEOUT", "10"))
+# Executions of the same statement before psycopg prepares it server-side;
+# "none" disables prepared statements (needed behind pgbouncer in
+# transaction mode, e.g. the Supabase pooler on port 6543)
+_prepare = os.getenv("PG_PREPARE_THRESHOLD", "1")
+PG_PREPARE_THRESHOLD = None if _prepare.lower() in ("", "none") else int(_prepare)
+
+# Rows per request for paginated (keyset) list APIs
+DEFAULT_PAGE_SIZE = int(os.getenv("RETAIL_PAGE_SIZE", "1000"))
+
+# Product catalog cache (see src/dao/cache.py)
+# backend: memory (in-process LRU), redis, local-shared (in-process stand-in), none
+PRODUCT_CACHE_BACKEND = os.getenv("PRODUCT_CACHE_BACKEND", "memory")
+PRODUCT_CACHE_SIZE = int(os.getenv("PRODUCT_CACHE_SIZE", "10000"))
+PRODUCT_CACHE_TTL = float(os.getenv("PRODUCT_CACHE_TTL", "30"))
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+# Max in-flight requests per async service call (src/services/async_services.py)
+ASYNC_CONCURRENCY = int(os.getenv("RETAIL_ASYNC_CONCURRENCY", "8"))
+
+# Supabase requests slower than this are logged to "retail.slow_queries"
+# (see src/dao/instrumentation.py); 0 disables the log
+SLOW_QUERY_MS = float(os.getenv("RETAIL_SLOW_QUERY_MS", "500"))
+
+# Where `report snapshot` writes and `report --source snapshot` reads
+SNAPSHOT_DIR = os.getenv("RETAIL_SNAPSHOT_DIR", "snapshots")
+
+# Long-running service (src/server/main.py). When SERVER_URL is set the CLI
+# forwards commands to it: http://host:port or unix:///path/to.sock
+SERVER_URL = os.getenv("RETAIL_SERVER_URL", "")
+SERVER_LISTEN = os.getenv("RETAIL_SERVER_LISTEN", "127.0.0.1:8765")
+SERVER_WORKERS = int(os.getenv("RETAIL_SERVER_WORKERS", "16"))
+SERVER_TIMEOUT = float(os.getenv("RETAIL_SERVER_TIMEOUT", "300"))
+
+# Outbox dispatcher (src/services/outbox_service.py, sql/012_outbox.sql).
+# `serve` runs OUTBOX_WORKERS dispatchers in the background (0 = none);
+# `outbox dispatch` runs them standalone.
+OUTBOX_WORKERS = int(os.getenv("RETAIL_OUTBOX_WORKERS", "2"))
+OUTBOX_BATCH_SIZE = int(os.getenv("RETAIL_OUTBOX_BATCH_SIZE", "200"))
+OUTBOX_POLL_INTERVAL = float(os.getenv("RETAIL_OUTBOX_POLL_INTERVAL", "0.5"))
+OUTBOX_LEASE_SECONDS = int(os.getenv("RETAIL_OUTBOX_LEASE_SECONDS", "60"))
+OUTBOX_RETRY_SECONDS = int(os.getenv("RETAIL_OUTBOX_RETRY_SECONDS", "5"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("RETAIL_OUTBOX_MAX_ATTEMPTS", "10"))
+
+_clients: Dict[str, "Client"] = {}
+_pg_pools: Dict[str, "ConnectionPool"] = {}
+_http_clients: Dict[str, "httpx.Client"] = {}
+_clients_lock = threading.Lock()
+# async clients are bound to the event loop that created them
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncClient]" = weakref.WeakKeyDictionary()
+
+
+def _http_limits() -> "httpx.Limits":
+    import httpx
+    return httpx.Limits(
+        max_connections=SUPABASE_POOL_SIZE,
+        max_keepalive_connections=SUPABASE_POOL_SIZE,
+        keepalive_expiry=SUPABASE_KEEPALIVE_EXPIRY,
+    )
+
+
+def _http_timeout() -> "httpx.Timeout":
+    import httpx
+    return httpx.Timeout(SUPABASE_TIMEOUT, connect=SUPABASE_CONNECT_TIMEOUT)
+
+
+def _create_supabase() -> "Client":
+    import httpx
+    from supabase import create_client
+    from supabase.lib.client_options import SyncClientOptions
+    from src.dao.instrumentation import count_response_bytes
+
+    http = httpx.Client(
+        limits=_http_limits(), timeout=_http_timeout(), event_hooks={"response": [count_response_bytes]}
+    )
+    _http_clients["default"] = http
+    options = SyncClientOptions(httpx_client=http, postgrest_client_timeout=SUPABASE_TIMEOUT)
+    return create_client(SUPABASE_URL, SUPABASE_KEY, options=options)
+
+
+def get_supabase() -> "Client":
     """
-    Return a supabase client. Raises RuntimeError if config missing.
+    Return the process-wide supabase client, creating it on first use.
+    All callers share one keep-alive HTTP connection pool.
+    Raises RuntimeError if config missing.
     """
+    client = _clients.get("default")
+    if client is not None:
+        return client
     if not SUPABASE_URL or not SUPABASE_KEY:
         raise RuntimeError("SUPABASE_URL and SUPABASE_KEY must be set in environment (.env)")
-    return create_client(SUPABASE_URL, SUPABASE_KEY)
- 
\ No newline at end of file
+    with _clients_lock:
+        if "default" not in _clients:
+            _clients["default"] = _create_supabase()
+        return _clients["default"]
+
+
+def close_supabase() -> None:
+    """
+    Drop the shared client and close its pooled connections.
+    """
+    with _clients_lock:
+        _clients.pop("default", None)
+        http = _http_clients.pop("default", None)
+    if http is not None:
+        http.close()
+
+
+def _create_pg_pool() -> "ConnectionPool":
+    from psycopg_pool import ConnectionPool
+    from src.dao.postgres import configure_connection
+
+    return ConnectionPool(
+        DATABASE_URL,
+        min_size=PG_POOL_MIN_SIZE,
+        max_size=PG_POOL_SIZE,
+        timeout=PG_POOL_TIMEOUT,
+        configure=configure_connection,
+        name="retail",
+        open=True,
+    )
+
+
+def get_pg_pool() -> "ConnectionPool":
+    """
+    Return the process-wide psycopg connection pool to DATABASE_URL,
+    opening it on first use. Raises RuntimeError if config missing.
+    """
+    pool = _pg_pools.get("default")
+    if pool is not None:
+        return pool
+    if not DATABASE_URL:
+        raise RuntimeError("DATABASE_URL must be set in environment (.env) for RETAIL_STORAGE_BACKEND=postgres")
+    with _clients_lock:
+        if "default" not in _pg_pools:
+            _pg_pools["default"] = _create_pg_pool()
+        return _pg_pools["default"]
+
+
+def close_pg_pool() -> None:
+    """
+    Drop the shared pool and close its connections.
+    """
+    with _clients_lock:
+        pool = _pg_pools.pop("default", None)
+    if pool is not None:
+        pool.close()
+
+
+async def get_async_supabase() -> "AsyncClient":
+    """
+    Async counterpart of get_supabase(): one pooled AsyncClient per event
+    loop, created on first use.
+    """
+    import asyncio
+    import httpx
+    from supabase import acreate_client
+    from supabase.lib.client_options import AsyncClientOptions
+    from src.dao.instrumentation import acount_response_bytes
+
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        if not SUPABASE_URL or not SUPABASE_KEY:
+            raise RuntimeError("SUPABASE_URL and SUPABASE_KEY must be set in environment (.env)")
+        http = httpx.AsyncClient(
+            limits=_http_limits(), timeout=_http_timeout(), event_hooks={"response": [acount_response_bytes]}
+        )
+        options = AsyncClientOptions(httpx_client=http, postgrest_client_timeout=SUPABASE_TIMEOUT)
+        client = await acreate_client(SUPABASE_URL, SUPABASE_KEY, options=options)
+        # another task may have won the race while we awaited
+        client = _async_clients.setdefault(loop, client)
+    return client
@@ -0,0 +1,228 @@
+# src/dao/async_dao.py
+# asyncio versions of the Supabase DAOs. Each class mirrors the query methods
+# of its sync counterpart and executes the same request builders (the
+# `_*_query` / `_*_rpc` static methods of the sync DAOs), awaited on a pooled
+# AsyncClient so many lookups can be in flight at once.
+import asyncio
+import weakref
+from typing import Optional, List, Dict
+from supabase import AsyncClient
+from src.config import get_async_supabase
+from src.dao.base import _delete_request, _insert_request, _update_request
+from src.dao.cache import get_product_cache
+from src.dao.instrumentation import instrument_methods, instrumented
+from src.dao.customer_dao import SEARCH_LIMIT, CustomerDAO
+from src.dao.order_dao import OrderDAO, _details_in_order, _split_details
+from src.dao.payment_dao import PaymentDAO
+from src.dao.product_dao import ProductCacheMixin, ProductDAO
+from src.dao.reporting_dao import ReportingDAO, _flatten, _sum_paid
+
+
+class AsyncBaseDAO:
+    """
+    Lazy access to the AsyncClient of the running event loop plus write
+    helpers. The client is resolved per loop (an AsyncClient cannot outlive
+    the loop that created it), so one DAO can be reused across asyncio.run()
+    calls. Passing sb pins the DAO to that client instead.
+    """
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        instrument_methods(cls)
+
+    def __init__(self, sb: Optional[AsyncClient] = None):
+        self._sb = instrumented(sb) if sb is not None else None
+        self._clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncClient]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    async def client(self) -> AsyncClient:
+        if self._sb is not None:
+            return self._sb
+        loop = asyncio.get_running_loop()
+        sb = self._clients.get(loop)
+        if sb is None:
+            sb = self._clients[loop] = instrumented(await get_async_supabase())
+        return sb
+
+    async def _insert(self, table: str, payload) -> List[Dict]:
+        return (await _insert_request(await self.client(), table, payload).execute()).data or []
+
+    async def _update(self, table: str, fields: Dict, **filters) -> List[Dict]:
+        return (await _update_request(await self.client(), table, fields, filters).execute()).data or []
+
+    async def _delete(self, table: str, **filters) -> List[Dict]:
+        return (await _delete_request(await self.client(), table, filters).execute()).data or []
+
+    @staticmethod
+    def _first(rows: List[Dict]) -> Optional[Dict]:
+        return rows[0] if rows else None
+
+
+class AsyncProductDAO(ProductCacheMixin, AsyncBaseDAO):
+    """Async ProductDAO; shares the process-wide product cache"""
+
+    def __init__(self, sb: Optional[AsyncClient] = None, cache=None):
+        super().__init__(sb)
+        self.cache = cache if cache is not None else get_product_cache()
+
+    async def create_product(
+        self, name: str, sku: str, price: float, stock: int = 0, category: str | None = None
+    ) -> Optional[Dict]:
+        payload = ProductDAO._payload(name, sku, price, stock, category)
+        return self._remember(self._first(await self._insert("products", payload)))
+
+    async def get_product_by_id(self, prod_id: int) -> Optional[Dict]:
+        cached = self._cached_by_id(prod_id)
+        if cached is not None:
+            return cached
+        resp = await ProductDAO._one_query(await self.client(), "prod_id", prod_id).execute()
+        return self._remember(resp.data[0] if resp.data else None)
+
+    async def get_product_by_sku(self, sku: str) -> Optional[Dict]:
+        cached = self._cached_by_sku(sku)
+        if cached is not None:
+            return cached
+        resp = await ProductDAO._one_query(await self.client(), "sku", sku).execute()
+        return self._remember(resp.data[0] if resp.data else None)
+
+    async def get_products_by_ids(self, prod_ids: List[int]) -> List[Dict]:
+        found, missing = self._split_cached(prod_ids)
+        if missing:
+            resp = await ProductDAO._many_query(await self.client(), missing).execute()
+            found.extend(self._remember(row) for row in resp.data or [])
+        return found
+
+    async def update_product(self, prod_id: int, fields: Dict) -> Optional[Dict]:
+        try:
+            return self._first(await self._update("products", fields, prod_id=prod_id))
+        finally:
+            self.invalidate(prod_id)
+
+    async def delete_product(self, prod_id: int) -> Optional[Dict]:
+        try:
+            return self._first(await self._delete("products", prod_id=prod_id))
+        finally:
+            self.invalidate(prod_id)
+
+    async def list_products(self, limit: int = 100, category: str | None = None) -> List[Dict]:
+        return (await ProductDAO._list_query(await self.client(), limit, category).execute()).data or []
+
+
+class AsyncCustomerDAO(AsyncBaseDAO):
+    """Async CustomerDAO"""
+
+    async def create_customer(self, name: str, email: str, phone: str, city: Optional[str] = None) -> Optional[Dict]:
+        payload = {"name": name, "email": email, "phone": phone, "city": city}
+        return self._first(await self._insert("customers", payload))
+
+    async def get_by_id(self, cust_id: int) -> Optional[Dict]:
+        return self._first((await CustomerDAO._one_query(await self.client(), "cust_id", cust_id).execute()).data)
+
+    async def get_many(self, cust_ids: List[int]) -> List[Dict]:
+        if not cust_ids:
+            return []
+        return (await CustomerDAO._many_query(await self.client(), cust_ids).execute()).data or []
+
+    async def find_by_email(self, email: str) -> Optional[Dict]:
+        return self._first((await CustomerDAO._one_query(await self.client(), "email", email).execute()).data)
+
+    async def update_customer(self, email: str, fields: Dict) -> Optional[Dict]:
+        return self._first(await self._update("customers", fields, email=email))
+
+    async def delete_customer(self, email: str) -> bool:
+        return bool(await self._delete("customers", email=email))
+
+    async def search_customers(
+        self,
+        email: Optional[str] = None,
+        city: Optional[str] = None,
+        name: Optional[str] = None,
+        phone: Optional[str] = None,
+        limit: int = SEARCH_LIMIT,
+    ) -> List[Dict]:
+        q = CustomerDAO._search_query(await self.client(), email, city, name, phone, limit)
+        return (await q.execute()).data or []
+
+
+class AsyncOrderDAO(AsyncBaseDAO):
+    """Async OrderDAO (placement and detail reads)"""
+
+    async def place_order(self, cust_id: int, items: List[Dict]) -> Dict:
+        return (await OrderDAO._place_order_rpc(await self.client(), cust_id, items).execute()).data
+
+    async def get_order_details(self, order_id: int) -> Optional[Dict]:
+        resp = await OrderDAO._details_query(await self.client(), order_id).execute()
+        return _split_details(resp.data[0]) if resp.data else None
+
+    async def get_order_details_many(self, order_ids: List[int]) -> List[Dict]:
+        if not order_ids:
+            return []
+        resp = await OrderDAO._details_many_query(await self.client(), order_ids).execute()
+        return _details_in_order(resp.data or [], order_ids)
+
+
+class AsyncPaymentDAO(AsyncBaseDAO):
+    """Async PaymentDAO"""
+
+    async def create_payment(self, order_id: int, amount: float) -> Optional[Dict]:
+        return self._first(await self._insert("payments", PaymentDAO._new_payment(order_id, amount)))
+
+    async def transition(
+        self,
+        order_id: int,
+        expected: str,
+        status: str,
+        method: Optional[str] = None,
+        idempotency_key: Optional[str] = None,
+    ) -> Optional[Dict]:
+        rpc = PaymentDAO._transition_rpc(await self.client(), order_id, expected, status, method, idempotency_key)
+        return (await rpc.execute()).data or None
+
+    async def mark_paid(self, order_id: int, method: str, idempotency_key: Optional[str] = None) -> Optional[Dict]:
+        return await self.transition(order_id, "PENDING", "PAID", method, idempotency_key)
+
+    async def mark_refunded(self, order_id: int, idempotency_key: Optional[str] = None) -> Optional[Dict]:
+        return await self.transition(order_id, "PAID", "REFUNDED", idempotency_key=idempotency_key)
+
+    async def get_payment(self, order_id: int) -> Optional[Dict]:
+        return self._first((await PaymentDAO._by_order_query(await self.client(), order_id).execute()).data)
+
+
+class AsyncReportingDAO(AsyncBaseDAO):
+    """Async ReportingDAO (reads the sales_by_* rollups)"""
+
+    async def top_selling_products(
+        self,
+        limit: int = 5,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+        category: Optional[str] = None,
+    ) -> List[Dict]:
+        q = ReportingDAO._top_selling_query(await self.client(), limit, date_from, date_to, category)
+        return [_flatten(r, "products") for r in (await q.execute()).data or []]
+
+    async def total_revenue_last_month(self) -> float:
+        return _sum_paid((await ReportingDAO._last_month_query(await self.client()).execute()).data or [])
+
+    async def revenue_by_bucket(
+        self, date_from: str, date_to: str, bucket: str = "day", group_by: Optional[str] = None
+    ) -> List[Dict]:
+        rpc = ReportingDAO._revenue_by_bucket_rpc(await self.client(), date_from, date_to, bucket, group_by)
+        return (await rpc.execute()).data or []
+
+    async def orders_per_customer(
+        self, min_orders: int = 0, limit: Optional[int] = None, offset: int = 0
+    ) -> List[Dict]:
+        """
+        Customers with more than min_orders (non-cancelled) orders, most
+        orders first (see ReportingDAO.orders_per_customer).
+        """
+        q = ReportingDAO._orders_per_customer_query(await self.client(), min_orders, limit, offset)
+        return [_flatten(r, "customers") for r in (await q.execute()).data or []]
+
+    async def frequent_customers(self, min_orders: int = 2, limit: Optional[int] = None, offset: int = 0) -> List[Dict]:
+        """
+        Customers who placed more than min_orders orders (spec: more than 2).
+        """
+        return await self.orders_per_customer(min_orders=min_orders, limit=limit, offset=offset)
@@ -0,0 +1,116 @@
+# src/dao/base.py
+from typing import Callable, Iterator, Optional, List, Dict
+from postgrest.types import ReturnMethod
+from supabase import Client
+from src.config import DEFAULT_PAGE_SIZE
+from src.dao.instrumentation import instrument_methods, instrumented, timed_request
+from src.dao.storage import StorageBackend, SupabaseBackend, get_backend
+
+
+# ------------------------
+# Write request builders
+# ------------------------
+# Every write asks PostgREST for return=representation, i.e. Postgres
+# INSERT/UPDATE/DELETE ... RETURNING *, so the affected rows arrive in the
+# same response and no follow-up SELECT is needed. The builders take the
+# client so BaseDAO and AsyncBaseDAO (src/dao/async_dao.py) issue the same
+# requests; only execute() differs.
+
+def _insert_request(sb, table: str, payload):
+    return sb.table(table).insert(payload, returning=ReturnMethod.representation)
+
+
+def _update_request(sb, table: str, fields: Dict, filters: Dict):
+    q = sb.table(table).update(fields, returning=ReturnMethod.representation)
+    for col, value in filters.items():
+        q = q.eq(col, value)
+    return q
+
+
+def _delete_request(sb, table: str, filters: Dict):
+    q = sb.table(table).delete(returning=ReturnMethod.representation)
+    for col, value in filters.items():
+        q = q.eq(col, value)
+    return q
+
+
+class BaseDAO:
+    """
+    Base for Supabase-backed DAOs.
+    The storage backend (src/dao/storage.py) is resolved on first use, so
+    building a DAO costs nothing and every DAO shares the pooled client from
+    src.config. Passing sb pins the DAO to that supabase client instead.
+    Requests are recorded per subclass method (see src/dao/instrumentation.py).
+    """
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        instrument_methods(cls)
+
+    def __init__(self, sb: Optional[Client] = None, backend: Optional[StorageBackend] = None):
+        self._backend = backend or (SupabaseBackend(sb) if sb is not None else None)
+        self._sb = None
+
+    @property
+    def backend(self) -> StorageBackend:
+        if self._backend is None:
+            self._backend = get_backend()
+        return self._backend
+
+    @property
+    def sb(self) -> Client:
+        if self._sb is None:
+            self._sb = instrumented(self.backend.client())
+        return self._sb
+
+    def _iter_pages(
+        self, build_query: Callable, key: str, page_size: Optional[int] = None, after=None
+    ) -> Iterator[Dict]:
+        """
+        Yield rows ordered by key using keyset (seek) pagination: each page is
+        WHERE key > last_seen ORDER BY key LIMIT page_size, so every request
+        is an index range scan regardless of how deep into the table it is.
+        build_query() must return a fresh, already-filtered select.
+        """
+        page_size = page_size or DEFAULT_PAGE_SIZE
+        last = after
+        while True:
+            q = build_query()
+            if last is not None:
+                q = q.gt(key, last)
+            rows = q.order(key, desc=False).limit(page_size).execute().data or []
+            yield from rows
+            if len(rows) < page_size:
+                return
+            last = rows[-1][key]
+
+    # ------------------------
+    # Write helpers
+    # ------------------------
+    def _insert(self, table: str, payload) -> List[Dict]:
+        return _insert_request(self.sb, table, payload).execute().data or []
+
+    def _upsert(self, table: str, payload, on_conflict: str) -> List[Dict]:
+        resp = (
+            self.sb.table(table)
+            .upsert(payload, on_conflict=on_conflict, returning=ReturnMethod.representation)
+            .execute()
+        )
+        return resp.data or []
+
+    def _copy(self, table: str, rows: List[Dict]) -> List[Dict]:
+        """
+        Bulk insert through the backend: COPY on postgres, a multi-row
+        INSERT on supabase. Returns the inserted rows.
+        """
+        return timed_request(table, "copy", lambda: self.backend.copy_rows(table, rows))
+
+    def _update(self, table: str, fields: Dict, **filters) -> List[Dict]:
+        return _update_request(self.sb, table, fields, filters).execute().data or []
+
+    def _delete(self, table: str, **filters) -> List[Dict]:
+        return _delete_request(self.sb, table, filters).execute().data or []
+
+    @staticmethod
+    def _first(rows: List[Dict]) -> Optional[Dict]:
+        return rows[0] if rows else None
@@ -0,0 +1,179 @@
+# src/dao/cache.py
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from src.config import PRODUCT_CACHE_BACKEND, PRODUCT_CACHE_SIZE, PRODUCT_CACHE_TTL, REDIS_URL
+
+
+class LRUCache:
+    """
+    In-process cache with size-bounded LRU eviction and a per-entry TTL.
+    Thread-safe; values are stored as given, callers should copy if mutating.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at < self._clock():
+                del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._data[key] = (self._clock() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, *keys: str) -> None:
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions, "size": len(self._data)}
+
+
+class LocalKVStore:
+    """
+    Minimal in-memory stand-in for a shared key/value server (Redis API subset:
+    get, set with ex=, delete). Used in tests and single-process setups.
+    """
+
+    def __init__(self, clock=time.monotonic):
+        self._clock = clock
+        self._data: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at is not None and expires_at < self._clock():
+                del self._data[key]
+                return None
+            return value
+
+    def set(self, key: str, value: bytes, ex: Optional[float] = None) -> None:
+        with self._lock:
+            self._data[key] = (self._clock() + ex if ex else None, value)
+
+    def delete(self, *keys: str) -> int:
+        with self._lock:
+            return sum(1 for k in keys if self._data.pop(k, None) is not None)
+
+
+class SharedCache:
+    """
+    Cache stored in a shared key/value server so several processes see the
+    same entries and invalidations. Values are JSON encoded; eviction is left
+    to the server (TTL on every key).
+    """
+
+    def __init__(self, client, ttl: float = 60.0, prefix: str = "retail:"):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        raw = self.client.get(self.prefix + key)
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(raw)
+
+    def set(self, key: str, value: Any) -> None:
+        self.client.set(self.prefix + key, json.dumps(value, default=str), ex=self.ttl)
+
+    def delete(self, *keys: str) -> None:
+        if keys:
+            self.client.delete(*(self.prefix + k for k in keys))
+
+    def clear(self) -> None:
+        pass
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+
+class NullCache:
+    """Cache that stores nothing (PRODUCT_CACHE_BACKEND=none)."""
+
+    hits = misses = evictions = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        return None
+
+    def set(self, key: str, value: Any) -> None:
+        pass
+
+    def delete(self, *keys: str) -> None:
+        pass
+
+    def clear(self) -> None:
+        pass
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": 0, "misses": 0, "evictions": 0}
+
+
+_product_cache = None
+_product_cache_lock = threading.Lock()
+
+
+def _create_product_cache():
+    if PRODUCT_CACHE_BACKEND == "none":
+        return NullCache()
+    if PRODUCT_CACHE_BACKEND == "redis":
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("PRODUCT_CACHE_BACKEND=redis requires the 'redis' package") from e
+        return SharedCache(redis.Redis.from_url(REDIS_URL), ttl=PRODUCT_CACHE_TTL)
+    if PRODUCT_CACHE_BACKEND == "local-shared":
+        return SharedCache(LocalKVStore(), ttl=PRODUCT_CACHE_TTL)
+    return LRUCache(maxsize=PRODUCT_CACHE_SIZE, ttl=PRODUCT_CACHE_TTL)
+
+
+def get_product_cache():
+    """
+    Return the process-wide product cache, built from config on first use.
+    """
+    global _product_cache
+    if _product_cache is None:
+        with _product_cache_lock:
+            if _product_cache is None:
+                _product_cache = _create_product_cache()
+    return _product_cache
@@ -1,45 +1,81 @@
 # src/dao/customer_dao.py
-from typing import Optional, List, Dict
-from src.config import get_supabase
+from typing import Iterator, Optional, List, Dict
+from src.dao.base import BaseDAO
 
-class CustomerDAO:
+SEARCH_LIMIT = 100
+
+
+def _prefix_pattern(value: str) -> str:
+    """ILIKE pattern matching values that start with value (wildcards escaped)."""
+    escaped = value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"{escaped}%"
+
+
+class CustomerDAO(BaseDAO):
     """DAO for handling customers in Supabase"""
 
-    def __init__(self):
-        self.sb = get_supabase()
+    # ------------------------
+    # Request builders (shared with AsyncCustomerDAO)
+    # ------------------------
+    @staticmethod
+    def _one_query(sb, column: str, value):
+        return sb.table("customers").select("*").eq(column, value).limit(1)
 
+    @staticmethod
+    def _many_query(sb, cust_ids: List[int]):
+        return sb.table("customers").select("*").in_("cust_id", list(set(cust_ids)))
+
+    @staticmethod
+    def _search_query(sb, email, city, name, phone, limit: int):
+        q = sb.table("customers").select("*")
+        for col, value in (("email", email), ("name", name), ("phone", phone), ("city", city)):
+            if value:
+                q = q.ilike(col, _prefix_pattern(value))
+        return q.order("cust_id", desc=False).limit(limit)
+
+    # ------------------------
+    # Queries
+    # ------------------------
     def create_customer(self, name: str, email: str, phone: str, city: Optional[str] = None) -> Optional[Dict]:
         payload = {"name": name, "email": email, "phone": phone, "city": city}
+        return self._first(self._insert("customers", payload))
 
-        # Insert into Supabase
-        self.sb.table("customers").insert(payload).execute()
+    def get_by_id(self, cust_id: int) -> Optional[Dict]:
+        return self._first(self._one_query(self.sb, "cust_id", cust_id).execute().data)
 
-        # Fetch inserted customer by unique email
-        resp = self.sb.table("customers").select("*").eq("email", email).limit(1).execute()
-        return resp.data[0] if resp.data else None
+    def get_many(self, cust_ids: List[int]) -> List[Dict]:
+        """Fetch many customers by primary key in one request."""
+        if not cust_ids:
+            return []
+        return self._many_query(self.sb, cust_ids).execute().data or []
 
     def find_by_email(self, email: str) -> Optional[Dict]:
-        resp = self.sb.table("customers").select("*").eq("email", email).limit(1).execute()
-        return resp.data[0] if resp.data else None
+        return self._first(self._one_query(self.sb, "email", email).execute().data)
 
     def update_customer(self, email: str, fields: Dict) -> Optional[Dict]:
-        self.sb.table("customers").update(fields).eq("email", email).execute()
-        resp = self.sb.table("customers").select("*").eq("email", email).limit(1).execute()
-        return resp.data[0] if resp.data else None
+        return self._first(self._update("customers", fields, email=email))
 
     def delete_customer(self, email: str) -> bool:
-        self.sb.table("customers").delete().eq("email", email).execute()
-        return True
+        return bool(self._delete("customers", email=email))
 
     def list_customers(self) -> List[Dict]:
-        resp = self.sb.table("customers").select("*").order("id", desc=False).execute()
-        return resp.data or []
-
-    def search_customers(self, email: Optional[str] = None, city: Optional[str] = None) -> List[Dict]:
-        q = self.sb.table("customers").select("*")
-        if email:
-            q = q.eq("email", email)
-        if city:
-            q = q.eq("city", city)
-        resp = q.execute()
-        return resp.data or []
+        return list(self.iter_customers())
+
+    def iter_customers(self, page_size: Optional[int] = None, after_id: Optional[int] = None) -> Iterator[Dict]:
+        """Stream customers in cust_id order, one keyset page at a time."""
+        return self._iter_pages(lambda: self.sb.table("customers").select("*"), "cust_id", page_size, after_id)
+
+    def search_customers(
+        self,
+        email: Optional[str] = None,
+        city: Optional[str] = None,
+        name: Optional[str] = None,
+        phone: Optional[str] = None,
+        limit: int = SEARCH_LIMIT,
+    ) -> List[Dict]:
+        """
+        Case-insensitive prefix search; all given fields must match (none
+        given: the first `limit` customers). Served by the trigram indexes
+        in sql/005_customer_search.sql.
+        """
+        return self._search_query(self.sb, email, city, name, phone, limit).execute().data or []
@@ -0,0 +1,341 @@
+# src/dao/instrumentation.py
+# Request-level metrics for every DAO. BaseDAO/AsyncBaseDAO hand out the
+# Supabase client wrapped in InstrumentedClient, whose query builders time
+# each execute() and record it against the DAO method that issued it:
+#
+#   with the CLI:   retail-cli --profile report top-products
+#                   retail-cli --metrics-out metrics.prom order show 1 2 3
+#   from code:      METRICS.summary(), METRICS.prometheus(), METRICS.reset()
+#
+# Requests slower than SLOW_QUERY_MS are also logged to "retail.slow_queries".
+import contextvars
+import functools
+import inspect
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from src.config import SLOW_QUERY_MS
+
+# Upper bounds (seconds) of the latency histogram buckets; +Inf is implicit
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Builder methods that decide which operation a request performs
+OPERATIONS = ("select", "insert", "update", "upsert", "delete")
+
+slow_query_log = logging.getLogger("retail.slow_queries")
+
+# (dao, method) of the outermost DAO call running in this context
+_current_call: contextvars.ContextVar = contextvars.ContextVar("dao_call", default=None)
+# response sizes collected by the httpx hooks while a request executes
+_response_bytes: contextvars.ContextVar = contextvars.ContextVar("response_bytes", default=None)
+
+Key = Tuple[str, str, str, str]  # (dao, method, table, operation)
+
+
+class _Series:
+    __slots__ = ("count", "errors", "seconds", "max_seconds", "rows", "bytes", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+        self.rows = 0
+        self.bytes = 0
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-quantile (max for +Inf)."""
+        target, seen = q * self.count, 0
+        for bound, n in zip(LATENCY_BUCKETS, self.buckets):
+            seen += n
+            if seen >= target:
+                return min(bound, self.max_seconds)
+        return self.max_seconds
+
+
+class Metrics:
+    """
+    Thread-safe registry of per (dao, method, table, operation) request
+    counts, errors, latency histograms, rows and response bytes.
+    """
+
+    def __init__(self, slow_query_ms: float = SLOW_QUERY_MS):
+        self.slow_query_ms = slow_query_ms
+        self._series: Dict[Key, _Series] = {}
+        self._lock = threading.Lock()
+
+    def record(
+        self, key: Key, seconds: float, rows: int = 0, nbytes: int = 0, error: bool = False, query: str = ""
+    ) -> None:
+        with self._lock:
+            s = self._series.get(key)
+            if s is None:
+                s = self._series[key] = _Series()
+            s.count += 1
+            s.errors += error
+            s.seconds += seconds
+            s.max_seconds = max(s.max_seconds, seconds)
+            s.rows += rows
+            s.bytes += nbytes
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    s.buckets[i] += 1
+                    break
+            else:
+                s.buckets[-1] += 1
+        if self.slow_query_ms and seconds * 1000 >= self.slow_query_ms:
+            dao, method, table, op = key
+            slow_query_log.warning(
+                "slow query: %.0f ms %s.%s %s %s rows=%d bytes=%d %s",
+                seconds * 1000, dao, method, op, table, rows, nbytes, query,
+            )
+
+    def reset(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+    def summary(self) -> List[Dict]:
+        """
+        One row per series, slowest total first: dao, method, table,
+        operation, requests, errors, rows, bytes, total_ms, p50_ms, p95_ms,
+        max_ms.
+        """
+        with self._lock:
+            items = list(self._series.items())
+        rows = []
+        for (dao, method, table, op), s in sorted(items, key=lambda kv: -kv[1].seconds):
+            rows.append({
+                "dao": dao, "method": method, "table": table, "operation": op,
+                "requests": s.count, "errors": s.errors, "rows": s.rows, "bytes": s.bytes,
+                "total_ms": round(s.seconds * 1000, 1),
+                "p50_ms": round(s.quantile(0.5) * 1000, 1),
+                "p95_ms": round(s.quantile(0.95) * 1000, 1),
+                "max_ms": round(s.max_seconds * 1000, 1),
+            })
+        return rows
+
+    def prometheus(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        with self._lock:
+            items = sorted(self._series.items())
+        out = [
+            "# HELP retail_db_request_duration_seconds Supabase request latency per DAO method.",
+            "# TYPE retail_db_request_duration_seconds histogram",
+        ]
+        for key, s in items:
+            labels = _labels(key)
+            cumulative = 0
+            for bound, n in zip(LATENCY_BUCKETS, s.buckets):
+                cumulative += n
+                out.append(f'retail_db_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            out.append(f'retail_db_request_duration_seconds_bucket{{{labels},le="+Inf"}} {s.count}')
+            out.append(f"retail_db_request_duration_seconds_sum{{{labels}}} {s.seconds:.6f}")
+            out.append(f"retail_db_request_duration_seconds_count{{{labels}}} {s.count}")
+        for name, help_text, attr in (
+            ("retail_db_request_errors_total", "Failed Supabase requests.", "errors"),
+            ("retail_db_rows_total", "Rows returned or written.", "rows"),
+            ("retail_db_response_bytes_total", "Response body bytes received.", "bytes"),
+        ):
+            out.append(f"# HELP {name} {help_text}")
+            out.append(f"# TYPE {name} counter")
+            out.extend(f"{name}{{{_labels(key)}}} {getattr(s, attr)}" for key, s in items)
+        return "\n".join(out) + "\n"
+
+
+def _labels(key: Key) -> str:
+    dao, method, table, op = key
+    values = {"dao": dao, "method": method, "table": table, "operation": op}
+    return ",".join(f'{k}="{_escape(v)}"' for k, v in values.items())
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+METRICS = Metrics()
+
+
+# ------------------------
+# Attributing requests to DAO methods
+# ------------------------
+def instrument_methods(cls) -> None:
+    """
+    Wrap the public methods defined on cls so requests they issue are
+    tagged (cls.__name__, method). Nested DAO calls keep the outermost tag;
+    generators and coroutines are tagged while they run, not just when
+    created.
+    """
+    for name, fn in list(vars(cls).items()):
+        if name.startswith("_") or not inspect.isfunction(fn):
+            continue
+        setattr(cls, name, _tagged(fn, cls.__name__))
+
+
+def _iter_tagged(gen, tag):
+    while True:
+        token = _current_call.set(_current_call.get() or tag)
+        try:
+            item = next(gen)
+        except StopIteration as stop:
+            return stop.value
+        finally:
+            _current_call.reset(token)
+        yield item
+
+
+def _tagged(fn, dao: str):
+    tag = (dao, fn.__name__)
+
+    if inspect.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def async_wrapper(*args, **kwargs):
+            token = _current_call.set(_current_call.get() or tag)
+            try:
+                return await fn(*args, **kwargs)
+            finally:
+                _current_call.reset(token)
+        return async_wrapper
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        token = _current_call.set(_current_call.get() or tag)
+        try:
+            result = fn(*args, **kwargs)
+        finally:
+            _current_call.reset(token)
+        # streaming methods (iter_*) issue their requests while being consumed
+        return _iter_tagged(result, tag) if inspect.isgenerator(result) else result
+    return wrapper
+
+
+def timed_request(table: str, op: str, fn: Callable, metrics: Optional[Metrics] = None):
+    """
+    Run fn() as one request against table and record it like an execute()
+    (for backend calls that bypass the query builders, e.g. COPY).
+    """
+    metrics = metrics or METRICS
+    dao, method = _current_call.get() or ("-", "-")
+    t0 = time.perf_counter()
+    try:
+        result = fn()
+    except Exception:
+        metrics.record((dao, method, table, op), time.perf_counter() - t0, error=True)
+        raise
+    rows = len(result) if isinstance(result, list) else int(result is not None)
+    metrics.record((dao, method, table, op), time.perf_counter() - t0, rows)
+    return result
+
+
+# ------------------------
+# Client / query builder proxies
+# ------------------------
+class InstrumentedClient:
+    """
+    Supabase client (sync or async), or a storage backend client with the
+    same API, whose table()/from_()/rpc() builders record every execute()
+    in METRICS. Everything else is passed through.
+    """
+
+    def __init__(self, client, metrics: Optional[Metrics] = None):
+        self._client = client
+        self._metrics = metrics or METRICS
+
+    def table(self, name: str) -> "_InstrumentedQuery":
+        return _InstrumentedQuery(self._client.table(name), name, "select", self._metrics)
+
+    from_ = table
+
+    def rpc(self, fn: str, params: Optional[Dict] = None, *args, **kwargs) -> "_InstrumentedQuery":
+        return _InstrumentedQuery(self._client.rpc(fn, params or {}, *args, **kwargs), fn, "rpc", self._metrics)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._client, name)
+
+
+def instrumented(client):
+    """Wrap client in InstrumentedClient unless it already is."""
+    return client if isinstance(client, InstrumentedClient) else InstrumentedClient(client)
+
+
+class _InstrumentedQuery:
+    __slots__ = ("_builder", "_table", "_op", "_metrics")
+
+    def __init__(self, builder, table: str, op: str, metrics: Metrics):
+        self._builder = builder
+        self._table = table
+        self._op = op
+        self._metrics = metrics
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._builder, name)
+        if not callable(attr):
+            # e.g. the `not_` property, which returns the builder itself
+            if hasattr(attr, "execute"):
+                return _InstrumentedQuery(attr, self._table, self._op, self._metrics)
+            return attr
+
+        def chained(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            if hasattr(result, "execute"):
+                op = name if name in OPERATIONS else self._op
+                return _InstrumentedQuery(result, self._table, op, self._metrics)
+            return result
+        return chained
+
+    def execute(self):
+        sizes: List[int] = []
+        size_token = _response_bytes.set(sizes)
+        t0 = time.perf_counter()
+        try:
+            result = self._builder.execute()
+        except Exception:
+            self._record(t0, None, sizes, error=True)
+            raise
+        finally:
+            _response_bytes.reset(size_token)
+        if inspect.isawaitable(result):
+            return self._execute_async(result)
+        self._record(t0, result, sizes)
+        return result
+
+    async def _execute_async(self, pending):
+        sizes: List[int] = []
+        size_token = _response_bytes.set(sizes)
+        t0 = time.perf_counter()
+        try:
+            result = await pending
+        except Exception:
+            self._record(t0, None, sizes, error=True)
+            raise
+        finally:
+            _response_bytes.reset(size_token)
+        self._record(t0, result, sizes)
+        return result
+
+    def _record(self, t0: float, result, sizes: List[int], error: bool = False) -> None:
+        seconds = time.perf_counter() - t0
+        data = getattr(result, "data", None)
+        rows = len(data) if isinstance(data, list) else int(data is not None)
+        dao, method = _current_call.get() or ("-", "-")
+        request = getattr(self._builder, "request", None)
+        query = str(getattr(request, "params", "")) if request is not None else ""
+        self._metrics.record((dao, method, self._table, self._op), seconds, rows, sum(sizes), error, query)
+
+
+# ------------------------
+# httpx response hooks (installed on the pooled clients in src/config.py)
+# ------------------------
+def count_response_bytes(response) -> None:
+    sizes = _response_bytes.get()
+    if sizes is not None:
+        response.read()
+        sizes.append(len(response.content))
+
+
+async def acount_response_bytes(response) -> None:
+    sizes = _response_bytes.get()
+    if sizes is not None:
+        await response.aread()
+        sizes.append(len(response.content))
@@ -1,23 +1,200 @@
 # src/dao/order_dao.py
+import datetime
+import threading
+from typing import Optional, Dict, List
+from postgrest.exceptions import APIError
+from src.dao.base import BaseDAO
+from src.dao.stock_dao import INSUFFICIENT_STOCK
 
-class OrderDAO:
-    """Handles orders storage"""
+# Order + customer + items (with product name/sku) + payment, embedded via
+# PostgREST foreign-key joins so one request returns the whole detail page.
+ORDER_DETAIL_SELECT = (
+    "*, customer:customers(*), "
+    "items:order_items(*, product:products(name, sku)), "
+    "payments(*)"
+)
 
-    def __init__(self):
-        self.orders = []
-        self.next_id = 1
 
-    def save_order(self, order):
-        order["id"] = self.next_id
-        self.next_id += 1
-        self.orders.append(order)
-        return order
+def _split_details(row: Dict) -> Dict:
+    """Shape an embedded order row as {"order", "customer", "payment"}."""
+    order = dict(row)
+    customer = order.pop("customer", None)
+    payments = order.pop("payments", None) or []
+    order["items"] = sorted(order.get("items") or [], key=lambda i: i["item_id"])
+    return {"order": order, "customer": customer, "payment": payments[0] if payments else None}
 
-    def find_by_id(self, order_id):
-        for o in self.orders:
-            if o["id"] == order_id:
-                return o
-        return None
 
-    def list_orders(self):
-        return self.orders
+def _details_in_order(rows: List[Dict], order_ids: List[int]) -> List[Dict]:
+    """Split embedded order rows and return them in order_ids order; unknown ids are skipped."""
+    by_id = {r["order_id"]: _split_details(r) for r in rows}
+    return [by_id[i] for i in order_ids if i in by_id]
+
+
+class OrderDAO(BaseDAO):
+    """Handles orders storage in Supabase (orders + order_items)"""
+
+    # ------------------------
+    # Request builders (shared with AsyncOrderDAO)
+    # ------------------------
+    @staticmethod
+    def _place_order_rpc(sb, cust_id: int, items: List[Dict]):
+        lines = [{"prod_id": it["prod_id"], "quantity": it["quantity"]} for it in items]
+        return sb.rpc("place_order", {"p_cust_id": cust_id, "p_items": lines})
+
+    @staticmethod
+    def _details_query(sb, order_id: int):
+        return sb.table("orders").select(ORDER_DETAIL_SELECT).eq("order_id", order_id).limit(1)
+
+    @staticmethod
+    def _details_many_query(sb, order_ids: List[int]):
+        return sb.table("orders").select(ORDER_DETAIL_SELECT).in_("order_id", list(set(order_ids)))
+
+    # ------------------------
+    # Queries
+    # ------------------------
+    def place_order(self, cust_id: int, items: List[Dict]) -> Dict:
+        """
+        Deduct stock and insert order and order_items in one server-side
+        transaction (see sql/001_place_order.sql), which also queues the
+        order.placed outbox event that creates the payment (sql/012_outbox.sql).
+        """
+        return self._place_order_rpc(self.sb, cust_id, items).execute().data
+
+    def get_order(self, order_id: int) -> Optional[Dict]:
+        resp = self.sb.table("orders").select("*").eq("order_id", order_id).limit(1).execute()
+        return resp.data[0] if resp.data else None
+
+    def get_order_details(self, order_id: int) -> Optional[Dict]:
+        """
+        Order, customer, items and payment in a single request.
+        """
+        resp = self._details_query(self.sb, order_id).execute()
+        return _split_details(resp.data[0]) if resp.data else None
+
+    def get_order_details_many(self, order_ids: List[int]) -> List[Dict]:
+        """
+        Batched get_order_details for many orders (one IN query), in the
+        order the ids were given; unknown ids are skipped.
+        """
+        if not order_ids:
+            return []
+        return _details_in_order(self._details_many_query(self.sb, order_ids).execute().data or [], order_ids)
+
+    def get_items(self, order_id: int) -> List[Dict]:
+        resp = self.sb.table("order_items").select("*").eq("order_id", order_id).order("item_id").execute()
+        return resp.data or []
+
+    def list_orders_by_customer(self, cust_id: int, limit: Optional[int] = None) -> List[Dict]:
+        """
+        Newest first; served by the (cust_id, order_date) index.
+        """
+        q = self.sb.table("orders").select("*").eq("cust_id", cust_id).order("order_date", desc=True)
+        if limit:
+            q = q.limit(limit)
+        resp = q.execute()
+        return resp.data or []
+
+    def update_status(self, order_id: int, expected: str, status: str) -> Optional[Dict]:
+        """
+        Move an order from expected to status in one conditional update.
+        Returns None if the order does not exist or is not in expected.
+        """
+        return self._first(self._update("orders", {"status": status}, order_id=order_id, status=expected))
+
+    def cancel_order(self, order_id: int) -> Optional[Dict]:
+        """
+        PLACED -> CANCELLED and stock release in one transaction
+        (see sql/006_orders.sql); the payment is closed by the
+        order.cancelled outbox event. Returns the order with its items, or None
+        if the order was not PLACED.
+        """
+        resp = self.sb.rpc("cancel_order", {"p_order_id": order_id}).execute()
+        return resp.data or None
+
+
+class InMemoryOrderDAO:
+    """
+    Local stand-in for OrderDAO with the same interface, for tests.
+    Orders are indexed by id and by customer, items by order id.
+    Prices come from the prices map; stock is taken from stock_dao if given
+    (e.g. a LocalStockDAO).
+    """
+
+    def __init__(self, prices: Optional[Dict[int, float]] = None, stock_dao=None):
+        self.prices = dict(prices or {})
+        self.stock_dao = stock_dao
+        self._orders: Dict[int, Dict] = {}
+        self._by_customer: Dict[int, List[int]] = {}
+        self._items: Dict[int, List[Dict]] = {}
+        self._next_order_id = 1
+        self._next_item_id = 1
+        self._lock = threading.Lock()
+
+    def place_order(self, cust_id: int, items: List[Dict]) -> Dict:
+        if self.stock_dao is not None and not self.stock_dao.reserve(items):
+            raise APIError({"message": "Not enough stock", "code": INSUFFICIENT_STOCK})
+        with self._lock:
+            order_id = self._next_order_id
+            self._next_order_id += 1
+            lines = []
+            for it in items:
+                lines.append({
+                    "item_id": self._next_item_id,
+                    "order_id": order_id,
+                    "prod_id": it["prod_id"],
+                    "quantity": it["quantity"],
+                    "price": self.prices.get(it["prod_id"], 0),
+                })
+                self._next_item_id += 1
+            order = {
+                "order_id": order_id,
+                "cust_id": cust_id,
+                "order_date": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+                "status": "PLACED",
+                "total_amount": sum(line["price"] * line["quantity"] for line in lines),
+            }
+            self._orders[order_id] = order
+            self._by_customer.setdefault(cust_id, []).append(order_id)
+            self._items[order_id] = lines
+        return dict(order, items=[dict(line) for line in lines])
+
+    def get_order(self, order_id: int) -> Optional[Dict]:
+        order = self._orders.get(order_id)
+        return dict(order) if order else None
+
+    def get_items(self, order_id: int) -> List[Dict]:
+        return [dict(line) for line in self._items.get(order_id, [])]
+
+    def get_order_details(self, order_id: int) -> Optional[Dict]:
+        order = self.get_order(order_id)
+        if not order:
+            return None
+        order["items"] = self.get_items(order_id)
+        return {"order": order, "customer": None, "payment": None}
+
+    def get_order_details_many(self, order_ids: List[int]) -> List[Dict]:
+        details = (self.get_order_details(i) for i in order_ids)
+        return [d for d in details if d]
+
+    def list_orders_by_customer(self, cust_id: int, limit: Optional[int] = None) -> List[Dict]:
+        ids = list(reversed(self._by_customer.get(cust_id, [])))
+        if limit:
+            ids = ids[:limit]
+        return [dict(self._orders[i]) for i in ids]
+
+    def update_status(self, order_id: int, expected: str, status: str) -> Optional[Dict]:
+        with self._lock:
+            order = self._orders.get(order_id)
+            if not order or order["status"] != expected:
+                return None
+            order["status"] = status
+            return dict(order)
+
+    def cancel_order(self, order_id: int) -> Optional[Dict]:
+        order = self.update_status(order_id, "PLACED", "CANCELLED")
+        if not order:
+            return None
+        items = self.get_items(order_id)
+        if self.stock_dao is not None:
+            self.stock_dao.release(items)
+        return dict(order, items=items)
@@ -0,0 +1,56 @@
+# src/dao/outbox_dao.py
+from typing import Dict, List, Optional
+from src.dao.base import BaseDAO
+
+
+class OutboxDAO(BaseDAO):
+    """
+    Queue side of the transactional outbox (sql/012_outbox.sql). Events are
+    written by triggers in the same transaction as the order change; this
+    DAO only claims, acknowledges and inspects them.
+    """
+
+    def claim(self, limit: int, lease_seconds: int) -> List[Dict]:
+        """
+        Claim up to limit deliverable events, oldest first, hiding them from
+        other dispatchers for lease_seconds. attempts is already incremented.
+        """
+        params = {"p_limit": limit, "p_lease_seconds": lease_seconds}
+        return self.sb.rpc("claim_outbox_events", params).execute().data or []
+
+    def complete(self, event_ids: List[int]) -> int:
+        if not event_ids:
+            return 0
+        return self.sb.rpc("complete_outbox_events", {"p_event_ids": event_ids}).execute().data or 0
+
+    def fail(self, event_ids: List[int], error: str, retry_seconds: int, max_attempts: int) -> int:
+        """
+        Put events back with exponential backoff, or park them as DEAD once
+        they have used max_attempts.
+        """
+        if not event_ids:
+            return 0
+        params = {
+            "p_event_ids": event_ids,
+            "p_error": error,
+            "p_retry_seconds": retry_seconds,
+            "p_max_attempts": max_attempts,
+        }
+        return self.sb.rpc("fail_outbox_events", params).execute().data or 0
+
+    def requeue_dead(self, event_type: Optional[str] = None) -> int:
+        return self.sb.rpc("requeue_outbox_events", {"p_event_type": event_type}).execute().data or 0
+
+    def purge(self, keep_days: int) -> int:
+        return self.sb.rpc("purge_outbox_events", {"p_keep_days": keep_days}).execute().data or 0
+
+    def stats(self) -> Dict[str, Dict]:
+        """{event_type: {"pending", "dead", "oldest_pending"}} for undelivered events."""
+        return self.sb.rpc("outbox_stats", {}).execute().data or {}
+
+    def list_dead(self, limit: int = 100) -> List[Dict]:
+        resp = (
+            self.sb.table("outbox_events").select("*").eq("status", "DEAD")
+            .order("event_id").limit(limit).execute()
+        )
+        return resp.data or []
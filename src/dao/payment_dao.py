@@ -1,27 +1,99 @@
 # src/dao/payment_dao.py
 from typing import Optional, Dict, List
-from src.config import get_supabase
+from src.dao.base import BaseDAO
 
-class PaymentDAO:
-    def __init__(self):
-        self.sb = get_supabase()
+# errcodes raised by transition_payment (sql/010_payment_transitions.sql)
+PAYMENT_NOT_FOUND = "P0002"
+INVALID_TRANSITION = "P0003"
 
+
+class PaymentDAO(BaseDAO):
+    """DAO for payments in Supabase"""
+
+    # ------------------------
+    # Request builders (shared with AsyncPaymentDAO)
+    # ------------------------
+    @staticmethod
+    def _new_payment(order_id: int, amount: float) -> Dict:
+        return {"order_id": order_id, "amount": amount, "status": "PENDING", "method": None}
+
+    @staticmethod
+    def _transition_rpc(
+        sb, order_id: int, expected: str, status: str, method: Optional[str], idempotency_key: Optional[str]
+    ):
+        params = {
+            "p_order_id": order_id,
+            "p_from": expected,
+            "p_to": status,
+            "p_method": method,
+            "p_idempotency_key": idempotency_key,
+        }
+        return sb.rpc("transition_payment", params)
+
+    @staticmethod
+    def _by_order_query(sb, order_id: int):
+        return sb.table("payments").select("*").eq("order_id", order_id).limit(1)
+
+    # ------------------------
+    # Queries
+    # ------------------------
     def create_payment(self, order_id: int, amount: float) -> Optional[Dict]:
-        payload = {"order_id": order_id, "amount": amount, "status": "PENDING", "method": None}
-        self.sb.table("payments").insert(payload).execute()
-        resp = self.sb.table("payments").select("*").eq("order_id", order_id).limit(1).execute()
-        return resp.data[0] if resp.data else None
+        return self._first(self._insert("payments", self._new_payment(order_id, amount)))
+
+    def transition(
+        self,
+        order_id: int,
+        expected: str,
+        status: str,
+        method: Optional[str] = None,
+        idempotency_key: Optional[str] = None,
+    ) -> Optional[Dict]:
+        """
+        Move the order's payment from expected to status in one conditional
+        update (PAID also completes the order). Replaying an idempotency key
+        returns the payment unchanged. Raises APIError (PAYMENT_NOT_FOUND /
+        INVALID_TRANSITION) without writing anything if the move is not allowed.
+        """
+        return self._transition_rpc(self.sb, order_id, expected, status, method, idempotency_key).execute().data or None
+
+    def mark_paid(self, order_id: int, method: str, idempotency_key: Optional[str] = None) -> Optional[Dict]:
+        return self.transition(order_id, "PENDING", "PAID", method, idempotency_key)
+
+    def mark_refunded(self, order_id: int, idempotency_key: Optional[str] = None) -> Optional[Dict]:
+        return self.transition(order_id, "PAID", "REFUNDED", idempotency_key=idempotency_key)
+
+    def mark_cancelled(self, order_id: int, idempotency_key: Optional[str] = None) -> Optional[Dict]:
+        return self.transition(order_id, "PENDING", "CANCELLED", idempotency_key=idempotency_key)
+
+    def settle(self, rows: List[Dict]) -> Dict:
+        """
+        Apply a batch of {order_id, method, amount} confirmations in one
+        set-based call (sql/011_payment_settlement.sql). Returns
+        {"settled", "completed", "already_paid", "mismatches": [...]}.
+        """
+        return self.sb.rpc("settle_payments", {"p_rows": rows}).execute().data
+
+    def refund_many(self, order_ids: List[int]) -> Dict:
+        """
+        PAID -> REFUNDED for a batch of orders in one call. Returns
+        {"refunded", "already_refunded", "skipped": [...]}.
+        """
+        return self.sb.rpc("refund_payments", {"p_order_ids": order_ids}).execute().data
 
-    def mark_paid(self, order_id: int, method: str) -> Optional[Dict]:
-        self.sb.table("payments").update({"status": "PAID", "method": method}).eq("order_id", order_id).execute()
-        resp = self.sb.table("payments").select("*").eq("order_id", order_id).limit(1).execute()
-        return resp.data[0] if resp.data else None
+    def create_for_orders(self, order_ids: List[int]) -> int:
+        """
+        Create the PENDING payment of every order that has none yet (CANCELLED
+        if the order was cancelled first); returns how many were created.
+        Idempotent, see sql/012_outbox.sql.
+        """
+        return self.sb.rpc("create_order_payments", {"p_order_ids": order_ids}).execute().data or 0
 
-    def mark_refunded(self, order_id: int) -> Optional[Dict]:
-        self.sb.table("payments").update({"status": "REFUNDED"}).eq("order_id", order_id).execute()
-        resp = self.sb.table("payments").select("*").eq("order_id", order_id).limit(1).execute()
-        return resp.data[0] if resp.data else None
+    def close_cancelled(self, order_ids: List[int]) -> Dict:
+        """
+        Cancel the PENDING payments (refund the PAID ones) of cancelled
+        orders. Returns {"cancelled", "refunded"}.
+        """
+        return self.sb.rpc("close_cancelled_payments", {"p_order_ids": order_ids}).execute().data
 
     def get_payment(self, order_id: int) -> Optional[Dict]:
-        resp = self.sb.table("payments").select("*").eq("order_id", order_id).limit(1).execute()
-        return resp.data[0] if resp.data else None
+        return self._first(self._by_order_query(self.sb, order_id).execute().data)
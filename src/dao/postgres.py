@@ -0,0 +1,698 @@
+# src/dao/postgres.py
+# Direct Postgres storage backend (RETAIL_STORAGE_BACKEND=postgres).
+#
+# PgClient speaks the subset of the PostgREST query-builder API the DAOs use
+# (table()/rpc(), select with embedded resources, the filter operators, or_
+# trees, order/limit/range, insert/upsert/update/delete returning rows) and
+# compiles it to SQL run over a psycopg connection pool, so every DAO works
+# unchanged on either backend. On top of that the backend offers what
+# PostgREST cannot: multi-statement transactions and COPY bulk loads.
+#
+# Statements are parameterised with stable text (IN lists become
+# `= any(%s)`), so psycopg can prepare them server-side after
+# PG_PREPARE_THRESHOLD executions per connection. Errors surface as
+# postgrest APIError with the Postgres SQLSTATE as code, like they would
+# through PostgREST.
+import contextlib
+import contextvars
+import itertools
+import re
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import psycopg
+from psycopg import sql
+from psycopg.adapt import Loader
+from psycopg.rows import dict_row
+from psycopg.types.json import Jsonb
+from psycopg.types.numeric import FloatLoader
+from postgrest.exceptions import APIError
+
+from src.config import PG_PREPARE_THRESHOLD
+from src.dao.storage import StorageBackend
+
+SCHEMA = "public"
+
+_OPS = {"eq": "=", "neq": "<>", "gt": ">", "gte": ">=", "lt": "<", "lte": "<="}
+_IS_VALUES = {None: "null", "null": "null", True: "true", "true": "true", False: "false", "false": "false"}
+_TZ_SUFFIX = re.compile(r"[+-]\d\d$")
+_stage_ids = itertools.count(1)
+
+
+class _IsoTimestampLoader(Loader):
+    """timestamptz/timestamp as ISO 8601 strings, as PostgREST returns them."""
+
+    def load(self, data) -> str:
+        text = bytes(data).decode().replace(" ", "T", 1)
+        return text + ":00" if _TZ_SUFFIX.search(text) else text
+
+
+class _IsoDateLoader(Loader):
+    """date as YYYY-MM-DD (the text form; _TZ_SUFFIX would match its -DD)."""
+
+    def load(self, data) -> str:
+        return bytes(data).decode()
+
+
+def configure_connection(conn: psycopg.Connection) -> None:
+    """Pool `configure` hook: PostgREST-compatible types, UTC, autocommit."""
+    conn.autocommit = True
+    conn.prepare_threshold = PG_PREPARE_THRESHOLD
+    conn.adapters.register_loader("numeric", FloatLoader)
+    for name in ("timestamptz", "timestamp"):
+        conn.adapters.register_loader(name, _IsoTimestampLoader)
+    conn.adapters.register_loader("date", _IsoDateLoader)
+    conn.execute("set time zone 'UTC'")
+
+
+def _api_error(e: psycopg.Error) -> APIError:
+    diag = e.diag
+    return APIError({
+        "message": diag.message_primary or str(e),
+        "code": e.sqlstate,
+        "details": diag.message_detail,
+        "hint": diag.message_hint,
+    })
+
+
+def _adapt(value: Any) -> Any:
+    """dicts (and lists of dicts) travel as jsonb, like a PostgREST JSON body."""
+    if isinstance(value, dict) or (isinstance(value, list) and any(isinstance(v, dict) for v in value)):
+        return Jsonb(value)
+    return value
+
+
+class PgResponse:
+    """Same shape as postgrest's APIResponse: .data and .count."""
+
+    def __init__(self, data: Any, count: Optional[int] = None):
+        self.data = data
+        self.count = count
+
+
+# ------------------------
+# select= parsing
+# ------------------------
+class _Field:
+    __slots__ = ("alias", "name", "embed", "inner", "children")
+
+    def __init__(self, alias: str, name: str, embed: bool = False, inner: bool = False, children=None):
+        self.alias = alias
+        self.name = name
+        self.embed = embed
+        self.inner = inner
+        self.children = children or []
+
+
+def _split_top(text: str) -> List[str]:
+    """Split on commas outside parentheses and double quotes."""
+    parts, buf, depth, quoted, escaped = [], [], 0, False, False
+    for ch in text:
+        if escaped:
+            escaped = False
+        elif ch == "\\" and quoted:
+            escaped = True
+        elif ch == '"':
+            quoted = not quoted
+        elif not quoted and ch == "(":
+            depth += 1
+        elif not quoted and ch == ")":
+            depth -= 1
+        elif not quoted and depth == 0 and ch == ",":
+            parts.append("".join(buf).strip())
+            buf = []
+            continue
+        buf.append(ch)
+    parts.append("".join(buf).strip())
+    return [p for p in parts if p]
+
+
+def _unquote(value: str) -> str:
+    if len(value) >= 2 and value[0] == value[-1] == '"':
+        return re.sub(r"\\(.)", r"\1", value[1:-1])
+    return value
+
+
+def parse_select(columns: str) -> List[_Field]:
+    """'*, alias:table!inner(col, ...)' -> fields; embeds may nest."""
+    fields = []
+    for part in _split_top(columns or "*"):
+        alias = None
+        paren = part.find("(")
+        colon = part.find(":")
+        if colon != -1 and (paren == -1 or colon < paren):
+            alias, part = part[:colon].strip(), part[colon + 1:].strip()
+            paren = part.find("(")
+        if paren == -1:
+            fields.append(_Field(alias or part, part))
+            continue
+        name, hint = (part[:paren].strip().split("!", 1) + [""])[:2]
+        children = parse_select(part[paren + 1:part.rindex(")")])
+        fields.append(_Field(alias or name, name, embed=True, inner=hint == "inner", children=children))
+    return fields
+
+
+# ------------------------
+# Filters
+# ------------------------
+def _condition(col: sql.Composable, op: str, value: Any, negate: bool = False) -> Tuple[sql.Composable, List]:
+    if op in _OPS:
+        cond, params = sql.SQL("{} " + _OPS[op] + " %s").format(col), [value]
+    elif op == "in":
+        cond, params = sql.SQL("{} = any(%s)").format(col), [list(value)]
+    elif op in ("like", "ilike"):
+        cond, params = sql.SQL("{} " + op + " %s").format(col), [str(value).replace("*", "%")]
+    elif op == "is":
+        if value not in _IS_VALUES:
+            raise APIError({"message": f"invalid is. value: {value}", "code": "PGRST100"})
+        cond, params = sql.SQL("{} is " + _IS_VALUES[value]).format(col), []
+    else:
+        raise APIError({"message": f"unsupported operator: {op}", "code": "PGRST100"})
+    return (sql.SQL("not ({})").format(cond), params) if negate else (cond, params)
+
+
+def _logic_tree(expr: str, alias: sql.Identifier, conjunction: str = "or") -> Tuple[sql.Composable, List]:
+    """Compile a PostgREST logic tree, e.g. or=(stock.lte.5,and(category.eq."a b",stock.lte.10))."""
+    clauses, params = [], []
+    for term in _split_top(expr):
+        m = re.match(r"^(not\.)?(and|or)\((.*)\)$", term, re.S)
+        if m:
+            cond, p = _logic_tree(m.group(3), alias, m.group(2))
+            if m.group(1):
+                cond = sql.SQL("not ({})").format(cond)
+        else:
+            column, rest = term.split(".", 1)
+            negate = rest.startswith("not.")
+            op, raw = (rest[4:] if negate else rest).split(".", 1)
+            if op == "in":
+                value = [_unquote(v) for v in _split_top(raw.strip()[1:-1])]
+            elif op == "is":
+                value = raw
+            else:
+                value = _unquote(raw)
+            cond, p = _condition(sql.SQL("{}.{}").format(alias, sql.Identifier(column)), op, value, negate)
+        clauses.append(sql.SQL("({})").format(cond))
+        params.extend(p)
+    if not clauses:
+        return sql.SQL("true"), []
+    return sql.SQL(f" {conjunction} ").join(clauses), params
+
+
+# ------------------------
+# Query builder
+# ------------------------
+class PgQuery:
+    """Chainable builder mirroring postgrest's SyncRequestBuilder."""
+
+    def __init__(self, backend: "PostgresBackend", table: str):
+        self._backend = backend
+        self._table = table
+        self._op = "select"
+        self._fields = parse_select("*")
+        self._count = None
+        self._payload: Any = None
+        self._on_conflict = ""
+        self._ignore_duplicates = False
+        self._returning = True
+        # (column, op, value, negate) and raw or_ trees, compiled at execute()
+        self._filters: List[Tuple[str, str, Any, bool]] = []
+        self._trees: List[str] = []
+        self._order: List[Tuple[str, bool, Optional[bool]]] = []
+        self._limit: Optional[int] = None
+        self._offset: Optional[int] = None
+        self._negate = False
+
+    # operations
+    def select(self, *columns: str, count=None, **kwargs) -> "PgQuery":
+        self._fields = parse_select(",".join(columns) or "*")
+        self._count = count
+        return self
+
+    def insert(self, payload, returning=None, **kwargs) -> "PgQuery":
+        self._op, self._payload = "insert", payload
+        return self._set_returning(returning)
+
+    def upsert(self, payload, on_conflict: str = "", ignore_duplicates: bool = False, returning=None, **kwargs):
+        self._op, self._payload = "upsert", payload
+        self._on_conflict, self._ignore_duplicates = on_conflict, ignore_duplicates
+        return self._set_returning(returning)
+
+    def update(self, fields: Dict, returning=None, **kwargs) -> "PgQuery":
+        self._op, self._payload = "update", fields
+        return self._set_returning(returning)
+
+    def delete(self, returning=None, **kwargs) -> "PgQuery":
+        self._op = "delete"
+        return self._set_returning(returning)
+
+    def _set_returning(self, returning) -> "PgQuery":
+        self._returning = getattr(returning, "value", returning) != "minimal"
+        return self
+
+    # filters
+    @property
+    def not_(self) -> "PgQuery":
+        self._negate = True
+        return self
+
+    def _filter(self, column: str, op: str, value: Any) -> "PgQuery":
+        self._filters.append((column, op, value, self._negate))
+        self._negate = False
+        return self
+
+    def eq(self, column: str, value):
+        return self._filter(column, "eq", value)
+
+    def neq(self, column: str, value):
+        return self._filter(column, "neq", value)
+
+    def gt(self, column: str, value):
+        return self._filter(column, "gt", value)
+
+    def gte(self, column: str, value):
+        return self._filter(column, "gte", value)
+
+    def lt(self, column: str, value):
+        return self._filter(column, "lt", value)
+
+    def lte(self, column: str, value):
+        return self._filter(column, "lte", value)
+
+    def in_(self, column: str, values):
+        return self._filter(column, "in", values)
+
+    def like(self, column: str, pattern: str):
+        return self._filter(column, "like", pattern)
+
+    def ilike(self, column: str, pattern: str):
+        return self._filter(column, "ilike", pattern)
+
+    def is_(self, column: str, value):
+        return self._filter(column, "is", value)
+
+    def or_(self, filters: str, reference_table: Optional[str] = None):
+        self._trees.append(filters)
+        return self
+
+    # modifiers
+    def order(self, column: str, desc: bool = False, nullsfirst: Optional[bool] = None, **kwargs) -> "PgQuery":
+        self._order.append((column, desc, nullsfirst))
+        return self
+
+    def limit(self, size: int, **kwargs) -> "PgQuery":
+        self._limit = size
+        return self
+
+    def offset(self, size: int) -> "PgQuery":
+        self._offset = size
+        return self
+
+    def range(self, start: int, end: int, **kwargs) -> "PgQuery":
+        self._offset, self._limit = start, end - start + 1
+        return self
+
+    def execute(self) -> PgResponse:
+        query, params = getattr(self, f"_compile_{self._op}")()
+        rows = self._backend.fetch(query, params)
+        count = None
+        if self._op == "select" and self._count:
+            where, where_params = self._where(sql.Identifier("t0"))
+            count_query = sql.SQL("select count(*) as n from {} t0{}").format(self._relation(), where)
+            count = self._backend.fetch(count_query, where_params)[0]["n"]
+        return PgResponse(rows if self._returning else [], count)
+
+    # compilation
+    def _relation(self, table: Optional[str] = None) -> sql.Composable:
+        return sql.Identifier(SCHEMA, table or self._table)
+
+    def _split_filters(self) -> Tuple[List, Dict[str, List]]:
+        """Own filters vs filters on embedded resources ("products.category")."""
+        own, embedded = [], {}
+        for column, op, value, negate in self._filters:
+            if "." in column:
+                name, column = column.split(".", 1)
+                embedded.setdefault(name, []).append((column, op, value, negate))
+            else:
+                own.append((column, op, value, negate))
+        return own, embedded
+
+    def _where(self, alias: sql.Identifier) -> Tuple[sql.Composable, List]:
+        own, embedded = self._split_filters()
+        clauses, params = [], []
+        for column, op, value, negate in own:
+            cond, p = _condition(sql.SQL("{}.{}").format(alias, sql.Identifier(column)), op, value, negate)
+            clauses.append(cond)
+            params.extend(p)
+        for tree in self._trees:
+            cond, p = _logic_tree(tree, alias)
+            clauses.append(sql.SQL("({})").format(cond))
+            params.extend(p)
+        # !inner embeds drop parent rows without a matching (filtered) child
+        if self._op == "select":
+            for field in self._fields:
+                if field.embed and field.inner:
+                    join, child, p = self._embed_join(self._table, alias, field, embedded, depth=1)
+                    clauses.append(sql.SQL("exists (select 1 from {} {} where {})").format(
+                        self._relation(field.name), child, join))
+                    params.extend(p)
+        if not clauses:
+            return sql.SQL(""), []
+        return sql.SQL(" where ") + sql.SQL(" and ").join(clauses), params
+
+    def _embed_join(
+        self, parent: str, parent_alias: sql.Identifier, field: _Field, embedded: Dict[str, List], depth: int
+    ) -> Tuple[sql.Composable, sql.Identifier, List]:
+        """Join condition (plus embedded filters) between parent and field's table."""
+        local, foreign, _ = self._backend.relation(parent, field.name)
+        child = sql.Identifier(f"t{depth}")
+        clauses = [sql.SQL("{}.{} = {}.{}").format(
+            child, sql.Identifier(foreign), parent_alias, sql.Identifier(local))]
+        params: List = []
+        if depth == 1:
+            for column, op, value, negate in embedded.get(field.alias, embedded.get(field.name, [])):
+                cond, p = _condition(sql.SQL("{}.{}").format(child, sql.Identifier(column)), op, value, negate)
+                clauses.append(cond)
+                params.extend(p)
+        return sql.SQL(" and ").join(clauses), child, params
+
+    def _embed(
+        self, parent: str, parent_alias: sql.Identifier, field: _Field, embedded: Dict[str, List], depth: int
+    ) -> Tuple[sql.Composable, List]:
+        """Correlated subquery returning the embedded row (object) or rows (jsonb array)."""
+        join, child, params = self._embed_join(parent, parent_alias, field, embedded, depth)
+        obj, obj_params = self._json_object(field.name, child, field.children, depth)
+        _, _, many = self._backend.relation(parent, field.name)
+        if many:
+            query = sql.SQL("(select coalesce(jsonb_agg({}), '[]'::jsonb) from {} {} where {})")
+        else:
+            query = sql.SQL("(select {} from {} {} where {} limit 1)")
+        return query.format(obj, self._relation(field.name), child, join), obj_params + params
+
+    def _json_object(
+        self, table: str, alias: sql.Identifier, fields: List[_Field], depth: int
+    ) -> Tuple[sql.Composable, List]:
+        parts: List[sql.Composable] = []
+        params: List = []
+        star = False
+        for field in fields:
+            if field.embed:
+                sub, p = self._embed(table, alias, field, {}, depth + 1)
+                parts.extend([sql.Literal(field.alias), sub])
+                params.extend(p)
+            elif field.name == "*":
+                star = True
+            else:
+                parts.extend([sql.Literal(field.alias), sql.SQL("{}.{}").format(alias, sql.Identifier(field.name))])
+        built = sql.SQL("jsonb_build_object({})").format(sql.SQL(", ").join(parts))
+        if star:
+            return (sql.SQL("to_jsonb({}) || {}").format(alias, built) if parts else
+                    sql.SQL("to_jsonb({})").format(alias)), params
+        return built, params
+
+    def _columns(self, alias: sql.Identifier) -> Tuple[sql.Composable, List]:
+        _, embedded = self._split_filters()
+        parts, params = [], []
+        for field in self._fields:
+            if field.embed:
+                sub, p = self._embed(self._table, alias, field, embedded, 1)
+                parts.append(sql.SQL("{} as {}").format(sub, sql.Identifier(field.alias)))
+                params.extend(p)
+            elif field.name == "*":
+                parts.append(sql.SQL("{}.*").format(alias))
+            else:
+                parts.append(sql.SQL("{}.{} as {}").format(alias, sql.Identifier(field.name), sql.Identifier(field.alias)))
+        return sql.SQL(", ").join(parts), params
+
+    def _compile_select(self) -> Tuple[sql.Composable, List]:
+        t0 = sql.Identifier("t0")
+        columns, params = self._columns(t0)
+        where, where_params = self._where(t0)
+        query = sql.SQL("select {} from {} t0{}").format(columns, self._relation(), where)
+        params += where_params
+        if self._order:
+            terms = []
+            for column, desc, nullsfirst in self._order:
+                term = sql.SQL("{}.{} " + ("desc" if desc else "asc")).format(t0, sql.Identifier(column))
+                if nullsfirst is not None:
+                    term += sql.SQL(" nulls first" if nullsfirst else " nulls last")
+                terms.append(term)
+            query += sql.SQL(" order by ") + sql.SQL(", ").join(terms)
+        if self._limit is not None:
+            query += sql.SQL(" limit %s")
+            params.append(self._limit)
+        if self._offset:
+            query += sql.SQL(" offset %s")
+            params.append(self._offset)
+        return query, params
+
+    def _returning_clause(self) -> sql.Composable:
+        return sql.SQL(" returning *") if self._returning else sql.SQL("")
+
+    def _values(self) -> Tuple[List[str], sql.Composable, List]:
+        rows = self._payload if isinstance(self._payload, list) else [self._payload]
+        columns = list(dict.fromkeys(k for row in rows for k in row))
+        tuples, params = [], []
+        for row in rows:
+            cells = []
+            for column in columns:
+                if column in row:
+                    cells.append(sql.SQL("%s"))
+                    params.append(_adapt(row[column]))
+                else:
+                    cells.append(sql.SQL("default"))
+            tuples.append(sql.SQL("({})").format(sql.SQL(", ").join(cells)))
+        head = sql.SQL("insert into {} ({}) values {}").format(
+            self._relation(), sql.SQL(", ").join(map(sql.Identifier, columns)), sql.SQL(", ").join(tuples))
+        return columns, head, params
+
+    def _compile_insert(self) -> Tuple[sql.Composable, List]:
+        _, head, params = self._values()
+        return head + self._returning_clause(), params
+
+    def _compile_upsert(self) -> Tuple[sql.Composable, List]:
+        columns, head, params = self._values()
+        conflict = [c.strip() for c in self._on_conflict.split(",") if c.strip()]
+        conflict = conflict or self._backend.primary_key(self._table)
+        target = sql.SQL(", ").join(map(sql.Identifier, conflict))
+        updates = [c for c in columns if c not in conflict]
+        if self._ignore_duplicates or not updates:
+            action = sql.SQL(" on conflict ({}) do nothing").format(target)
+        else:
+            action = sql.SQL(" on conflict ({}) do update set {}").format(target, sql.SQL(", ").join(
+                sql.SQL("{0} = excluded.{0}").format(sql.Identifier(c)) for c in updates))
+        return head + action + self._returning_clause(), params
+
+    def _compile_update(self) -> Tuple[sql.Composable, List]:
+        t0 = sql.Identifier("t0")
+        columns = list(self._payload)
+        sets = sql.SQL(", ").join(sql.SQL("{} = %s").format(sql.Identifier(c)) for c in columns)
+        where, params = self._where(t0)
+        query = sql.SQL("update {} t0 set {}{}").format(self._relation(), sets, where)
+        return query + self._returning_clause(), [_adapt(self._payload[c]) for c in columns] + params
+
+    def _compile_delete(self) -> Tuple[sql.Composable, List]:
+        where, params = self._where(sql.Identifier("t0"))
+        return sql.SQL("delete from {} t0{}").format(self._relation(), where) + self._returning_clause(), params
+
+
+class PgRPC:
+    """rpc(fn, params): calls a SQL function with named arguments, cast to its declared types."""
+
+    def __init__(self, backend: "PostgresBackend", fn: str, params: Dict):
+        self._backend = backend
+        self._fn = fn
+        self._params = params
+
+    def execute(self) -> PgResponse:
+        info = self._backend.function(self._fn, set(self._params))
+        args, params = [], []
+        for name, value in self._params.items():
+            typ = info["args"][name]
+            args.append(sql.SQL("{} => %s::" + typ).format(sql.Identifier(name)))
+            params.append(Jsonb(value) if typ in ("json", "jsonb") else _adapt(value))
+        call = sql.SQL("{}({})").format(sql.Identifier(SCHEMA, self._fn), sql.SQL(", ").join(args))
+        if info["returns_set"] or info["composite"]:
+            rows = self._backend.fetch(sql.SQL("select * from {}").format(call), params)
+            return PgResponse(rows if info["returns_set"] else (rows[0] if rows else None))
+        rows = self._backend.fetch(sql.SQL("select {} as value").format(call), params)
+        return PgResponse(None if info["void"] else rows[0]["value"])
+
+
+class PgClient:
+    """table()/from_()/rpc() entry points, like a supabase Client."""
+
+    def __init__(self, backend: "PostgresBackend"):
+        self._backend = backend
+
+    def table(self, name: str) -> PgQuery:
+        return PgQuery(self._backend, name)
+
+    from_ = table
+
+    def rpc(self, fn: str, params: Optional[Dict] = None, **kwargs) -> PgRPC:
+        return PgRPC(self._backend, fn, params or {})
+
+
+# ------------------------
+# Backend
+# ------------------------
+_RELATIONS_SQL = """
+select cl.relname as "table", fcl.relname as foreign_table,
+       a.attname as "column", fa.attname as foreign_column
+from pg_constraint c
+join pg_class cl on cl.oid = c.conrelid
+join pg_class fcl on fcl.oid = c.confrelid
+join pg_namespace n on n.oid = cl.relnamespace
+join pg_attribute a on a.attrelid = c.conrelid and a.attnum = c.conkey[1]
+join pg_attribute fa on fa.attrelid = c.confrelid and fa.attnum = c.confkey[1]
+where c.contype = 'f' and n.nspname = %s and cardinality(c.conkey) = 1
+"""
+
+_PRIMARY_KEY_SQL = """
+select a.attname
+from pg_index i
+join pg_attribute a on a.attrelid = i.indrelid and a.attnum = any(i.indkey)
+where i.indrelid = %s::regclass and i.indisprimary
+order by array_position(i.indkey::int2[], a.attnum)
+"""
+
+_FUNCTION_SQL = """
+select p.pronargs, p.proargnames, p.proargtypes::oid[]::regtype[]::text[] as argtypes,
+       p.proretset as returns_set, t.typtype = 'c' as composite, t.typname = 'void' as void
+from pg_proc p
+join pg_namespace n on n.oid = p.pronamespace
+join pg_type t on t.oid = p.prorettype
+where n.nspname = %s and p.proname = %s
+"""
+
+
+class PostgresBackend(StorageBackend):
+    """
+    Storage on a psycopg_pool.ConnectionPool (see src/config.py:get_pg_pool).
+    Outside transaction() each statement autocommits on a pooled
+    connection; inside it, every DAO call in the same thread/task shares one
+    connection and commits or rolls back together.
+    """
+
+    name = "postgres"
+    supports_transactions = True
+
+    def __init__(self, pool):
+        self.pool = pool
+        self._conn: contextvars.ContextVar = contextvars.ContextVar(f"pg_conn_{id(self)}", default=None)
+        self._catalog_lock = threading.Lock()
+        self._relations: Optional[Dict[Tuple[str, str], Tuple[str, str, bool]]] = None
+        self._primary_keys: Dict[str, List[str]] = {}
+        self._functions: Dict[str, List[Dict]] = {}
+
+    def client(self) -> PgClient:
+        return PgClient(self)
+
+    @contextlib.contextmanager
+    def connection(self) -> Iterator[psycopg.Connection]:
+        conn = self._conn.get()
+        if conn is not None:
+            yield conn
+            return
+        with self.pool.connection() as conn:
+            yield conn
+
+    @contextlib.contextmanager
+    def transaction(self) -> Iterator[None]:
+        """
+        Run the enclosed DAO calls in one server-side transaction (nested
+        calls become savepoints). Any exception rolls everything back.
+        """
+        conn = self._conn.get()
+        if conn is not None:
+            with conn.transaction():
+                yield
+            return
+        with self.pool.connection() as conn:
+            token = self._conn.set(conn)
+            try:
+                with conn.transaction():
+                    yield
+            finally:
+                self._conn.reset(token)
+
+    def fetch(self, query: sql.Composable, params: List) -> List[Dict]:
+        try:
+            with self.connection() as conn, conn.cursor(row_factory=dict_row) as cur:
+                cur.execute(query, params)
+                return cur.fetchall() if cur.description else []
+        except psycopg.Error as e:
+            raise _api_error(e) from e
+
+    def copy_rows(self, table: str, rows: List[Dict]) -> List[Dict]:
+        """
+        COPY rows into a temporary staging table, then INSERT ... SELECT
+        RETURNING * in the same transaction, so bulk loads keep column
+        defaults, constraints, triggers and the returned rows. Keys missing
+        from a row are loaded as NULL.
+        """
+        if not rows:
+            return []
+        columns = list(dict.fromkeys(k for row in rows for k in row))
+        cols = sql.SQL(", ").join(map(sql.Identifier, columns))
+        stage = sql.Identifier(f"_copy_{table}_{next(_stage_ids)}")
+        try:
+            with self.transaction(), self.connection() as conn, conn.cursor(row_factory=dict_row) as cur:
+                cur.execute(sql.SQL("create temp table {} on commit drop as select {} from {} with no data").format(
+                    stage, cols, sql.Identifier(SCHEMA, table)))
+                with cur.copy(sql.SQL("copy {} ({}) from stdin").format(stage, cols)) as copy:
+                    for row in rows:
+                        copy.write_row([row.get(c) for c in columns])
+                cur.execute(sql.SQL("insert into {} ({}) select {} from {} returning *").format(
+                    sql.Identifier(SCHEMA, table), cols, cols, stage))
+                return cur.fetchall()
+        except psycopg.Error as e:
+            raise _api_error(e) from e
+
+    def close(self) -> None:
+        self.pool.close()
+
+    # ------------------------
+    # Catalog lookups (cached for the life of the backend)
+    # ------------------------
+    def relation(self, table: str, embedded: str) -> Tuple[str, str, bool]:
+        """(local column, foreign column, one-to-many) for embedding `embedded` in `table`."""
+        if self._relations is None:
+            with self._catalog_lock:
+                if self._relations is None:
+                    relations = {}
+                    for r in self.fetch(sql.SQL(_RELATIONS_SQL), [SCHEMA]):
+                        relations[(r["table"], r["foreign_table"])] = (r["column"], r["foreign_column"], False)
+                        relations.setdefault(
+                            (r["foreign_table"], r["table"]), (r["foreign_column"], r["column"], True))
+                    self._relations = relations
+        try:
+            return self._relations[(table, embedded)]
+        except KeyError:
+            raise APIError({
+                "message": f"Could not find a relationship between '{table}' and '{embedded}'",
+                "code": "PGRST200",
+            })
+
+    def primary_key(self, table: str) -> List[str]:
+        if table not in self._primary_keys:
+            rows = self.fetch(sql.SQL(_PRIMARY_KEY_SQL), [f"{SCHEMA}.{table}"])
+            self._primary_keys[table] = [r["attname"] for r in rows]
+        return self._primary_keys[table]
+
+    def function(self, fn: str, params: set) -> Dict:
+        """The overload of fn whose argument names cover params."""
+        if fn not in self._functions:
+            overloads = []
+            for r in self.fetch(sql.SQL(_FUNCTION_SQL), [SCHEMA, fn]):
+                names = (r["proargnames"] or [])[:r["pronargs"]]
+                r["args"] = dict(zip(names, r["argtypes"]))
+                overloads.append(r)
+            self._functions[fn] = overloads
+        for info in self._functions[fn]:
+            if params <= set(info["args"]):
+                return info
+        raise APIError({
+            "message": f"Could not find the function {SCHEMA}.{fn}({', '.join(sorted(params))})",
+            "code": "PGRST202",
+        })
@@ -50,92 +50,256 @@
 #     resp = q.execute()
 #     return resp.data or []
 
-from typing import Optional, List, Dict
-from src.config import get_supabase
+from typing import Iterator, Optional, List, Dict, Set, Tuple
+from src.dao.base import BaseDAO
+from src.dao.cache import get_product_cache
 
 
-class ProductDAO:
-    """DAO class for handling product database operations"""
+def _quote(value: str) -> str:
+    """Double-quote a value for a PostgREST or=(...) expression."""
+    escaped = value.replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{escaped}"'
 
-    def __init__(self):
-        self.sb = get_supabase()
 
-    def create_product(
-        self, name: str, sku: str, price: float, stock: int = 0, category: str | None = None
-    ) -> Optional[Dict]:
+def _low_stock_filter(threshold: int, thresholds: Dict[str, int]) -> str:
+    """
+    PostgREST logic tree for "stock <= the threshold of the product's
+    category": one branch per overridden category, plus the default threshold
+    for every other category (including none).
+    """
+    branches = [f"and(category.eq.{_quote(cat)},stock.lte.{int(t)})" for cat, t in sorted(thresholds.items())]
+    others = ",".join(_quote(cat) for cat in sorted(thresholds))
+    branches.append(f"and(stock.lte.{int(threshold)},or(category.is.null,category.not.in.({others})))")
+    return ",".join(branches)
+
+
+class ProductCacheMixin:
+    """
+    Read-through product cache shared by ProductDAO and AsyncProductDAO
+    (src/dao/async_dao.py); expects self.cache.
+    """
+
+    @staticmethod
+    def _id_key(prod_id: int) -> str:
+        return f"product:id:{prod_id}"
+
+    @staticmethod
+    def _sku_key(sku: str) -> str:
+        return f"product:sku:{sku}"
+
+    def _remember(self, row: Optional[Dict]) -> Optional[Dict]:
+        # Rows are keyed by id; the sku key only maps to the id, so
+        # invalidating by id is enough to drop both lookups (a sku lookup
+        # ignores a cached row whose sku no longer matches).
+        if row:
+            self.cache.set(self._id_key(row["prod_id"]), dict(row))
+            self.cache.set(self._sku_key(row["sku"]), row["prod_id"])
+        return row
+
+    def _cached_by_id(self, prod_id: int) -> Optional[Dict]:
+        cached = self.cache.get(self._id_key(prod_id))
+        return dict(cached) if cached is not None else None
+
+    def _cached_by_sku(self, sku: str) -> Optional[Dict]:
+        prod_id = self.cache.get(self._sku_key(sku))
+        if prod_id is None:
+            return None
+        cached = self._cached_by_id(prod_id)
+        # the alias outlives a sku change; only trust it if the row agrees
+        return cached if cached is not None and cached["sku"] == sku else None
+
+    def _split_cached(self, prod_ids: List[int]) -> Tuple[List[Dict], List[int]]:
+        """(cached rows, ids still to fetch) for a batch lookup."""
+        found = []
+        missing = []
+        for pid in set(prod_ids):
+            cached = self._cached_by_id(pid)
+            if cached is not None:
+                found.append(cached)
+            else:
+                missing.append(pid)
+        return found, missing
+
+    def invalidate(self, *prod_ids: int) -> None:
         """
-        Insert a product and return the inserted row (two-step: insert then select by unique sku).
+        Drop cached rows for the given products (after stock or field changes).
         """
+        self.cache.delete(*(self._id_key(pid) for pid in prod_ids))
+
+    def cache_stats(self) -> Dict[str, int]:
+        return self.cache.stats()
+
+
+class ProductDAO(ProductCacheMixin, BaseDAO):
+    """
+    DAO class for handling product database operations.
+    Single-product reads go through a read-through cache (see src/dao/cache.py);
+    writes and stock changes invalidate the affected entries.
+    """
+
+    def __init__(self, sb=None, cache=None, backend=None):
+        super().__init__(sb, backend)
+        self.cache = cache if cache is not None else get_product_cache()
+
+    # ------------------------
+    # Request builders (shared with AsyncProductDAO)
+    # ------------------------
+    @staticmethod
+    def _payload(name: str, sku: str, price: float, stock: int, category: str | None) -> Dict:
         payload = {"name": name, "sku": sku, "price": price, "stock": stock}
         if category is not None:
             payload["category"] = category
+        return payload
 
-        # Insert
-        self.sb.table("products").insert(payload).execute()
+    @staticmethod
+    def _one_query(sb, column: str, value):
+        return sb.table("products").select("*").eq(column, value).limit(1)
 
-        # Fetch inserted row by unique SKU
-        resp = (
-            self.sb.table("products")
-            .select("*")
-            .eq("sku", sku)
-            .limit(1)
-            .execute()
-        )
-        return resp.data[0] if resp.data else None
+    @staticmethod
+    def _many_query(sb, prod_ids: List[int]):
+        return sb.table("products").select("*").in_("prod_id", prod_ids)
+
+    @staticmethod
+    def _list_query(sb, limit: int, category: str | None):
+        q = sb.table("products").select("*").order("prod_id", desc=False).limit(limit)
+        return q.eq("category", category) if category else q
+
+    # ------------------------
+    # Queries
+    # ------------------------
+    def create_product(
+        self, name: str, sku: str, price: float, stock: int = 0, category: str | None = None
+    ) -> Optional[Dict]:
+        """
+        Insert a product and return the inserted row (single request).
+        """
+        payload = self._payload(name, sku, price, stock, category)
+        return self._remember(self._first(self._insert("products", payload)))
 
     def get_product_by_id(self, prod_id: int) -> Optional[Dict]:
-        resp = (
-            self.sb.table("products")
-            .select("*")
-            .eq("prod_id", prod_id)
-            .limit(1)
-            .execute()
-        )
-        return resp.data[0] if resp.data else None
+        cached = self._cached_by_id(prod_id)
+        if cached is not None:
+            return cached
+        resp = self._one_query(self.sb, "prod_id", prod_id).execute()
+        return self._remember(resp.data[0] if resp.data else None)
 
     def get_product_by_sku(self, sku: str) -> Optional[Dict]:
-        resp = (
-            self.sb.table("products")
-            .select("*")
-            .eq("sku", sku)
-            .limit(1)
-            .execute()
-        )
-        return resp.data[0] if resp.data else None
+        cached = self._cached_by_sku(sku)
+        if cached is not None:
+            return cached
+        resp = self._one_query(self.sb, "sku", sku).execute()
+        return self._remember(resp.data[0] if resp.data else None)
+
+    def get_products_by_ids(self, prod_ids: List[int]) -> List[Dict]:
+        """
+        Fetch many products, serving cached ones locally and the rest in a
+        single request (WHERE prod_id IN (...)).
+        """
+        found, missing = self._split_cached(prod_ids)
+        if missing:
+            resp = self._many_query(self.sb, missing).execute()
+            found.extend(self._remember(row) for row in resp.data or [])
+        return found
 
     def update_product(self, prod_id: int, fields: Dict) -> Optional[Dict]:
         """
-        Update and then return the updated row (two-step).
+        Update and return the updated row (single request). The cached row is
+        dropped after the write, not before, so a concurrent read cannot
+        re-cache the old values; the next lookup fetches the new row.
         """
-        self.sb.table("products").update(fields).eq("prod_id", prod_id).execute()
-        resp = (
-            self.sb.table("products")
-            .select("*")
-            .eq("prod_id", prod_id)
-            .limit(1)
-            .execute()
-        )
-        return resp.data[0] if resp.data else None
+        try:
+            return self._first(self._update("products", fields, prod_id=prod_id))
+        finally:
+            self.invalidate(prod_id)
 
     def delete_product(self, prod_id: int) -> Optional[Dict]:
-        # Fetch row before delete (so we can return it)
-        resp_before = (
-            self.sb.table("products")
-            .select("*")
-            .eq("prod_id", prod_id)
-            .limit(1)
-            .execute()
-        )
-        row = resp_before.data[0] if resp_before.data else None
+        """
+        Delete and return the deleted row (single request).
+        """
+        try:
+            return self._first(self._delete("products", prod_id=prod_id))
+        finally:
+            self.invalidate(prod_id)
 
-        self.sb.table("products").delete().eq("prod_id", prod_id).execute()
-        return row
+    def find_existing_skus(self, skus: List[str]) -> Set[str]:
+        """
+        Return which of the given SKUs already exist (one IN query).
+        """
+        if not skus:
+            return set()
+        resp = self.sb.table("products").select("sku").in_("sku", list(skus)).execute()
+        return {r["sku"] for r in resp.data or []}
+
+    def bulk_create_products(self, rows: List[Dict]) -> List[Dict]:
+        """
+        Bulk insert in a single request (COPY on the postgres backend);
+        returns the inserted rows.
+        """
+        return self._copy("products", rows) if rows else []
+
+    def bulk_upsert_products(self, rows: List[Dict]) -> List[Dict]:
+        """
+        Multi-row INSERT ... ON CONFLICT (sku) DO UPDATE in a single request.
+        """
+        if not rows:
+            return []
+        written = self._upsert("products", rows, on_conflict="sku")
+        self.invalidate(*(r["prod_id"] for r in written))
+        return written
 
     def list_products(self, limit: int = 100, category: str | None = None) -> List[Dict]:
-        q = self.sb.table("products").select("*").order("prod_id", desc=False).limit(limit)
-        if category:
-            q = q.eq("category", category)
-        resp = q.execute()
+        return self._list_query(self.sb, limit, category).execute().data or []
+
+    def iter_products(
+        self, page_size: Optional[int] = None, category: str | None = None, after_id: Optional[int] = None
+    ) -> Iterator[Dict]:
+        """
+        Stream every product in prod_id order, one keyset page at a time.
+        """
+        def build():
+            q = self.sb.table("products").select("*")
+            return q.eq("category", category) if category else q
+
+        return self._iter_pages(build, "prod_id", page_size, after_id)
+
+    def iter_low_stock(
+        self,
+        threshold: int,
+        thresholds: Optional[Dict[str, int]] = None,
+        page_size: Optional[int] = None,
+        after_id: Optional[int] = None,
+        changed_since: Optional[str] = None,
+    ) -> Iterator[Dict]:
+        """
+        Stream products with stock <= threshold in prod_id order. thresholds
+        overrides the threshold per category. changed_since (ISO timestamp)
+        keeps only products whose stock changed at or after that instant.
+        The filter runs in Postgres against the stock indexes (sql/009).
+        """
+        def build():
+            q = self.sb.table("products").select("*")
+            if thresholds:
+                q = q.or_(_low_stock_filter(threshold, thresholds))
+            else:
+                q = q.lte("stock", threshold)
+            if changed_since:
+                q = q.gte("stock_changed_at", changed_since)
+            return q
+
+        return self._iter_pages(build, "prod_id", page_size, after_id)
+
+    def low_stock_among(self, prod_ids: List[int], threshold: int) -> List[Dict]:
+        """
+        The products of prod_ids with stock <= threshold, read fresh (never
+        from the cache) in one request.
+        """
+        if not prod_ids:
+            return []
+        resp = (
+            self.sb.table("products").select("*")
+            .in_("prod_id", sorted(set(prod_ids))).lte("stock", threshold)
+            .order("prod_id").execute()
+        )
         return resp.data or []
 
 
@@ -1,60 +1,130 @@
 # src/dao/reporting_dao.py
-from typing import List, Dict
-from src.config import get_supabase
-
-class ReportingDAO:
-    """DAO for reporting queries"""
-
-    def __init__(self):
-        self.sb = get_supabase()
-
-    def top_selling_products(self, limit: int = 5) -> List[Dict]:
-        resp = self.sb.table("order_items").select("prod_id, quantity").execute()
-        data = resp.data or []
-
-        totals = {}
-        for item in data:
-            pid = item["prod_id"]
-            qty = item["quantity"]
-            totals[pid] = totals.get(pid, 0) + qty
-
-        sorted_totals = sorted(totals.items(), key=lambda x: x[1], reverse=True)[:limit]
-        products = []
-        for pid, total_qty in sorted_totals:
-            prod_resp = self.sb.table("products").select("*").eq("prod_id", pid).limit(1).execute()
-            if prod_resp.data:
-                prod = prod_resp.data[0]
-                prod["total_sold"] = total_qty
-                products.append(prod)
-        return products
+import datetime
+from typing import Optional, List, Dict
+from src.dao.base import BaseDAO
 
-    def total_revenue_last_month(self) -> float:
-        import datetime
+
+def _flatten(row: Dict, embedded: str) -> Dict:
+    """Merge an embedded resource (e.g. products(*)) into the rollup columns."""
+    out = dict(row.pop(embedded, None) or {})
+    out.update(row)
+    return out
+
+
+def _sum_paid(rows: List[Dict]) -> float:
+    return float(sum(float(d["paid_revenue"]) for d in rows))
+
+
+class ReportingDAO(BaseDAO):
+    """
+    DAO for reporting queries.
+    Reads the sales_by_* rollups maintained by sql/004_sales_rollups.sql,
+    so each report costs O(result) rather than a scan of the raw tables.
+    """
+
+    # ------------------------
+    # Request builders (shared with AsyncReportingDAO)
+    # ------------------------
+    @staticmethod
+    def _top_selling_query(sb, limit: int, date_from: Optional[str], date_to: Optional[str], category: Optional[str]):
+        # rows of both requests go through _flatten(row, "products")
+        if date_from or date_to:
+            params = {"p_limit": limit, "p_from": date_from, "p_to": date_to, "p_category": category}
+            return sb.rpc("top_selling_products", params)
+
+        embed = "products!inner(*)" if category else "products(*)"
+        q = (
+            sb.table("sales_by_product")
+            .select(f"total_sold:units_sold, revenue, {embed}")
+            .gt("units_sold", 0)
+            .order("units_sold", desc=True)
+            .limit(limit)
+        )
+        return q.eq("products.category", category) if category else q
+
+    @staticmethod
+    def _last_month_query(sb):
         today = datetime.date.today()
         first_day_last_month = (today.replace(day=1) - datetime.timedelta(days=1)).replace(day=1)
         last_day_last_month = today.replace(day=1) - datetime.timedelta(days=1)
+        return (
+            sb.table("sales_by_day")
+            .select("paid_revenue")
+            .gte("day", str(first_day_last_month))
+            .lte("day", str(last_day_last_month))
+        )
+
+    @staticmethod
+    def _revenue_by_bucket_rpc(sb, date_from: str, date_to: str, bucket: str, group_by: Optional[str]):
+        params = {"p_from": date_from, "p_to": date_to, "p_bucket": bucket, "p_group_by": group_by}
+        return sb.rpc("revenue_by_bucket", params)
+
+    @staticmethod
+    def _orders_per_customer_query(sb, min_orders: int, limit: Optional[int], offset: int):
+        q = (
+            sb.table("sales_by_customer")
+            .select("total_orders:order_count, total_spent, customers(*)")
+            .gt("order_count", min_orders)
+            .order("order_count", desc=True)
+            .order("cust_id", desc=False)
+        )
+        if limit:
+            q = q.range(offset, offset + limit - 1)
+        elif offset:
+            q = q.offset(offset)
+        return q
+
+    # ------------------------
+    # Reports
+    # ------------------------
+    def top_selling_products(
+        self,
+        limit: int = 5,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+        category: Optional[str] = None,
+    ) -> List[Dict]:
+        """
+        Top products by quantity sold. date_to is exclusive.
+        All-time reports come from sales_by_product; date-ranged ones are
+        aggregated server-side (see sql/003_top_selling_products.sql).
+        """
+        resp = self._top_selling_query(self.sb, limit, date_from, date_to, category).execute()
+        return [_flatten(r, "products") for r in resp.data or []]
+
+    def total_revenue_last_month(self) -> float:
+        return _sum_paid(self._last_month_query(self.sb).execute().data or [])
+
+    def revenue_by_bucket(
+        self, date_from: str, date_to: str, bucket: str = "day", group_by: Optional[str] = None
+    ) -> List[Dict]:
+        """
+        Paid revenue and order count per day/week/month in [date_from, date_to),
+        optionally per payment method or category. Aggregated in SQL over the
+        payments(status, paid_at) index (see sql/008_revenue_analytics.sql).
+        """
+        return self._revenue_by_bucket_rpc(self.sb, date_from, date_to, bucket, group_by).execute().data or []
+
+    def orders_per_customer(
+        self, min_orders: int = 0, limit: Optional[int] = None, offset: int = 0
+    ) -> List[Dict]:
+        """
+        Customers with more than min_orders (non-cancelled) orders, most
+        orders first. Reads the sales_by_customer rollup, i.e. the
+        GROUP BY cust_id HAVING count(*) > min_orders result kept up to date
+        by triggers, joined to customers in the same request.
+        """
+        resp = self._orders_per_customer_query(self.sb, min_orders, limit, offset).execute()
+        return [_flatten(r, "customers") for r in resp.data or []]
+
+    def frequent_customers(self, min_orders: int = 2, limit: Optional[int] = None, offset: int = 0) -> List[Dict]:
+        """
+        Customers who placed more than min_orders orders (spec: more than 2).
+        """
+        return self.orders_per_customer(min_orders=min_orders, limit=limit, offset=offset)
 
-        resp = self.sb.table("payments").select("amount").gte("created_at", str(first_day_last_month)) \
-            .lte("created_at", str(last_day_last_month)).eq("status", "PAID").execute()
-        data = resp.data or []
-        return sum(item["amount"] for item in data)
-
-    def orders_per_customer(self) -> List[Dict]:
-        resp = self.sb.table("orders").select("customer_id").execute()
-        counts = {}
-        for o in resp.data or []:
-            cid = o["customer_id"]
-            counts[cid] = counts.get(cid, 0) + 1
-
-        result = []
-        for cid, total_orders in counts.items():
-            cust_resp = self.sb.table("customers").select("*").eq("id", cid).limit(1).execute()
-            if cust_resp.data:
-                customer = cust_resp.data[0]
-                customer["total_orders"] = total_orders
-                result.append(customer)
-        return result
-
-    def frequent_customers(self, min_orders: int = 3) -> List[Dict]:
-        all_customers = self.orders_per_customer()
-        return [c for c in all_customers if c.get("total_orders", 0) >= min_orders]
+    def rebuild_rollups(self) -> None:
+        """
+        Recompute every sales_by_* table from the raw order/payment rows.
+        """
+        self.sb.rpc("rebuild_sales_rollups", {}).execute()
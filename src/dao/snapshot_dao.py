@@ -0,0 +1,352 @@
+# src/dao/snapshot_dao.py
+import datetime
+import json
+import os
+from typing import Dict, List, Optional
+
+try:
+    import numpy as np
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError as e:  # optional dependency, only needed for snapshot reporting
+    raise ImportError("Snapshot reporting requires numpy and pyarrow (pip install numpy pyarrow)") from e
+
+from src.dao.base import BaseDAO
+
+# table -> [(column, type)]; the first column is the keyset pagination key
+SNAPSHOT_TABLES = {
+    "products": [
+        ("prod_id", "int"), ("name", "str"), ("sku", "str"), ("price", "float"),
+        ("stock", "int"), ("category", "str"), ("created_at", "ts"),
+    ],
+    "customers": [
+        ("cust_id", "int"), ("name", "str"), ("email", "str"), ("phone", "str"),
+        ("city", "str"), ("created_at", "ts"),
+    ],
+    "orders": [
+        ("order_id", "int"), ("cust_id", "int"), ("order_date", "ts"),
+        ("status", "str"), ("total_amount", "float"),
+    ],
+    "order_items": [
+        ("item_id", "int"), ("order_id", "int"), ("prod_id", "int"),
+        ("quantity", "int"), ("price", "float"),
+    ],
+    "payments": [
+        ("payment_id", "int"), ("order_id", "int"), ("amount", "float"),
+        ("method", "str"), ("paid_at", "ts"), ("status", "str"),
+    ],
+}
+
+_ARROW_TYPES = {
+    "int": pa.int64(),
+    "float": pa.float64(),
+    "str": pa.string(),
+    "ts": pa.timestamp("us", tz="UTC"),
+}
+
+
+def snapshot_schema(table: str) -> "pa.Schema":
+    return pa.schema([(col, _ARROW_TYPES[kind]) for col, kind in SNAPSHOT_TABLES[table]])
+
+
+def write_table(path: str, table: "pa.Table") -> None:
+    """
+    Write an Arrow table as an uncompressed IPC file (memory-mappable).
+    """
+    tmp = path + ".tmp"
+    with pa.OSFile(tmp, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    os.replace(tmp, path)
+
+
+def _group(keys: "np.ndarray"):
+    """
+    Sort-based group-by key factorisation: (unique keys, inverse index).
+    """
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+    first = np.empty(len(keys), dtype=bool)
+    first[:1] = True
+    np.not_equal(sorted_keys[1:], sorted_keys[:-1], out=first[1:])
+    inverse = np.empty(len(keys), dtype=np.int64)
+    inverse[order] = np.cumsum(first) - 1
+    return sorted_keys[first], inverse
+
+
+def _distinct(keys: "np.ndarray") -> "np.ndarray":
+    sorted_keys = np.sort(keys)
+    if not len(sorted_keys):
+        return sorted_keys
+    return sorted_keys[np.concatenate(([True], sorted_keys[1:] != sorted_keys[:-1]))]
+
+
+def _parse_ts(value):
+    if value is None or isinstance(value, datetime.datetime):
+        return value
+    return datetime.datetime.fromisoformat(value)
+
+
+class SnapshotExporter(BaseDAO):
+    """
+    Dumps the reporting tables into <directory>/<table>.arrow (Arrow IPC),
+    streaming each table with keyset pagination so memory holds one page.
+    """
+
+    def export(self, directory: str, page_size: Optional[int] = None) -> Dict[str, int]:
+        os.makedirs(directory, exist_ok=True)
+        counts = {}
+        for table, columns in SNAPSHOT_TABLES.items():
+            counts[table] = self._export_table(directory, table, columns, page_size)
+        manifest = {
+            "exported_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "rows": counts,
+        }
+        with open(os.path.join(directory, "manifest.json"), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        return counts
+
+    def _export_table(self, directory: str, table: str, columns, page_size: Optional[int]) -> int:
+        schema = snapshot_schema(table)
+        names = [col for col, _ in columns]
+        ts_cols = [col for col, kind in columns if kind == "ts"]
+        path = os.path.join(directory, f"{table}.arrow")
+        tmp = path + ".tmp"
+        rows = self._iter_pages(lambda: self.sb.table(table).select(",".join(names)), names[0], page_size)
+        count = 0
+        page: List[Dict] = []
+        with pa.OSFile(tmp, "wb") as sink, pa.ipc.new_file(sink, schema) as writer:
+            for row in rows:
+                for col in ts_cols:
+                    row[col] = _parse_ts(row.get(col))
+                page.append(row)
+                if len(page) >= 10000:
+                    writer.write_batch(pa.RecordBatch.from_pylist(page, schema=schema))
+                    count += len(page)
+                    page = []
+            if page:
+                writer.write_batch(pa.RecordBatch.from_pylist(page, schema=schema))
+                count += len(page)
+        os.replace(tmp, path)
+        return count
+
+
+class SnapshotReportingDAO:
+    """
+    ReportingDAO over an exported snapshot instead of the live database.
+    Tables are memory-mapped Arrow IPC files; every report is a vectorized
+    group-by (np.bincount / dictionary encoding) over whole columns.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._tables: Dict[str, "pa.Table"] = {}
+        self._cache: Dict[str, object] = {}
+
+    # ------------------------
+    # Loading
+    # ------------------------
+    def table(self, name: str) -> "pa.Table":
+        if name not in self._tables:
+            path = os.path.join(self.directory, f"{name}.arrow")
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"No snapshot of '{name}' in {self.directory} (run: report snapshot)")
+            self._tables[name] = pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+        return self._tables[name]
+
+    def _np(self, table: str, col: str, fill=None) -> "np.ndarray":
+        key = f"{table}.{col}"
+        if key not in self._cache:
+            arr = self.table(table).column(col)
+            if fill is not None:
+                arr = pc.fill_null(arr, fill)
+            self._cache[key] = arr.to_numpy()
+        return self._cache[key]
+
+    def _codes(self, table: str, col: str):
+        """
+        Dictionary-encode a string column: (int codes with -1 for null, labels).
+        """
+        key = f"{table}.{col}#codes"
+        if key not in self._cache:
+            encoded = pc.dictionary_encode(self.table(table).column(col)).combine_chunks()
+            codes = pc.fill_null(encoded.indices, -1).to_numpy()
+            self._cache[key] = (codes.astype(np.int64), encoded.dictionary.to_pylist())
+        return self._cache[key]
+
+    def _positions(self, table: str, key_col: str, ids: "np.ndarray") -> "np.ndarray":
+        """
+        Row positions of ids in table (sorted by key_col, as exported); -1 if missing.
+        """
+        keys = self._np(table, key_col)
+        if len(keys) and keys[-1] - keys[0] == len(keys) - 1:
+            # gap-free SERIAL ids: position is a subtraction
+            pos = ids - keys[0]
+            return np.where((pos >= 0) & (pos < len(keys)), pos, -1)
+        pos = np.searchsorted(keys, ids)
+        pos = np.clip(pos, 0, max(len(keys) - 1, 0))
+        found = keys[pos] == ids if len(keys) else np.zeros(len(ids), dtype=bool)
+        return np.where(found, pos, -1)
+
+    def _active_orders(self) -> "np.ndarray":
+        if "orders#active" not in self._cache:
+            status = pc.fill_null(self.table("orders").column("status"), "PLACED")
+            self._cache["orders#active"] = pc.not_equal(status, "CANCELLED").to_numpy()
+        return self._cache["orders#active"]
+
+    def _row(self, table: str, pos: int) -> Dict:
+        row = self.table(table).slice(int(pos), 1).to_pylist()[0]
+        return {k: v.isoformat() if isinstance(v, datetime.datetime) else v for k, v in row.items()}
+
+    @staticmethod
+    def _ts(value: str) -> "np.datetime64":
+        return np.datetime64(value, "us")
+
+    # ------------------------
+    # Reports (same signatures as ReportingDAO)
+    # ------------------------
+    def top_selling_products(
+        self,
+        limit: int = 5,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+        category: Optional[str] = None,
+    ) -> List[Dict]:
+        order_pos = self._positions("orders", "order_id", self._np("order_items", "order_id"))
+        mask = order_pos >= 0
+        mask &= self._active_orders()[np.maximum(order_pos, 0)]
+        if date_from or date_to:
+            order_date = self._np("orders", "order_date")[np.maximum(order_pos, 0)]
+            if date_from:
+                mask &= order_date >= self._ts(date_from)
+            if date_to:
+                mask &= order_date < self._ts(date_to)
+
+        prod_pos = self._positions("products", "prod_id", self._np("order_items", "prod_id"))
+        mask &= prod_pos >= 0
+        if category:
+            codes, labels = self._codes("products", "category")
+            wanted = labels.index(category) if category in labels else -2
+            mask &= codes[np.maximum(prod_pos, 0)] == wanted
+
+        quantity = self._np("order_items", "quantity")[mask]
+        n_products = self.table("products").num_rows
+        totals = np.bincount(prod_pos[mask], weights=quantity, minlength=n_products)
+        amounts = quantity * self._np("order_items", "price")[mask]
+        revenue = np.bincount(prod_pos[mask], weights=amounts, minlength=n_products)
+        top = np.argsort(-totals, kind="stable")[:limit]
+        result = []
+        for pos in top:
+            if totals[pos] <= 0:
+                break
+            prod = self._row("products", pos)
+            prod["total_sold"] = int(totals[pos])
+            prod["revenue"] = round(float(revenue[pos]), 2)
+            result.append(prod)
+        return result
+
+    def total_revenue_last_month(self) -> float:
+        today = datetime.date.today()
+        first_day_this_month = today.replace(day=1)
+        first_day_last_month = (first_day_this_month - datetime.timedelta(days=1)).replace(day=1)
+        paid = self._paid_mask(str(first_day_last_month), str(first_day_this_month))
+        return float(self._np("payments", "amount", fill=0.0)[paid].sum())
+
+    def _paid_mask(self, date_from: str, date_to: str) -> "np.ndarray":
+        paid_at = self._np("payments", "paid_at")
+        status = pc.fill_null(self.table("payments").column("status"), "")
+        mask = pc.equal(status, "PAID").to_numpy()
+        mask &= ~np.isnat(paid_at)
+        mask &= (paid_at >= self._ts(date_from)) & (paid_at < self._ts(date_to))
+        return mask
+
+    @staticmethod
+    def _truncate(ts: "np.ndarray", bucket: str) -> "np.ndarray":
+        days = ts.astype("datetime64[D]")
+        if bucket == "day":
+            return days
+        if bucket == "month":
+            return ts.astype("datetime64[M]").astype("datetime64[D]")
+        # ISO weeks start on Monday; 1970-01-01 was a Thursday
+        weekday = (days.astype(np.int64) + 3) % 7
+        return days - weekday.astype("timedelta64[D]")
+
+    def revenue_by_bucket(
+        self, date_from: str, date_to: str, bucket: str = "day", group_by: Optional[str] = None
+    ) -> List[Dict]:
+        paid = self._paid_mask(date_from, date_to)
+        buckets = self._truncate(self._np("payments", "paid_at")[paid], bucket)
+        order_ids = self._np("payments", "order_id", fill=-1)[paid]
+
+        if group_by == "category":
+            # explode paid payments into their order lines
+            item_orders = self._np("order_items", "order_id")
+            sort = np.argsort(order_ids)
+            idx = np.searchsorted(order_ids[sort], item_orders)
+            idx = np.clip(idx, 0, max(len(sort) - 1, 0))
+            hit = order_ids[sort][idx] == item_orders if len(sort) else np.zeros(len(item_orders), dtype=bool)
+            pay_idx = sort[idx[hit]]
+            buckets = buckets[pay_idx]
+            order_ids = order_ids[pay_idx]
+            amounts = (self._np("order_items", "quantity") * self._np("order_items", "price"))[hit]
+            prod_pos = self._positions("products", "prod_id", self._np("order_items", "prod_id")[hit])
+            codes, labels = self._codes("products", "category")
+            groups = np.where(prod_pos >= 0, codes[np.maximum(prod_pos, 0)], -1)
+        elif group_by == "method":
+            amounts = self._np("payments", "amount", fill=0.0)[paid]
+            codes, labels = self._codes("payments", "method")
+            groups = codes[paid]
+        else:
+            amounts = self._np("payments", "amount", fill=0.0)[paid]
+            labels = []
+            groups = np.full(len(amounts), -1, dtype=np.int64)
+
+        if not len(amounts):
+            return []
+        # one integer key per (bucket, group); group codes are shifted so -1 (null) fits
+        width = len(labels) + 1
+        keys = buckets.astype(np.int64) * width + (groups + 1)
+        uniq, inverse = _group(keys)
+        revenue = np.bincount(inverse, weights=amounts, minlength=len(uniq))
+        # distinct orders per group: unique (group, order_id) pairs packed in one int64
+        stride = int(order_ids.max()) + 2
+        pairs = _distinct(inverse * stride + (order_ids + 1))
+        order_count = np.bincount(pairs // stride, minlength=len(uniq))
+
+        result = []
+        for i, key in enumerate(uniq):
+            day, group = divmod(int(key), width)
+            result.append({
+                "bucket": str(np.datetime64(day, "D")),
+                "group_key": labels[group - 1] if group_by and group else None,
+                "revenue": round(float(revenue[i]), 2),
+                "order_count": int(order_count[i]),
+            })
+        return result
+
+    def orders_per_customer(self, min_orders: int = 0, limit: Optional[int] = None, offset: int = 0) -> List[Dict]:
+        active = self._active_orders()
+        cust_pos = self._positions("customers", "cust_id", self._np("orders", "cust_id", fill=-1))
+        mask = active & (cust_pos >= 0)
+        n = self.table("customers").num_rows
+        counts = np.bincount(cust_pos[mask], minlength=n)
+        spent = np.bincount(cust_pos[mask], weights=self._np("orders", "total_amount", fill=0.0)[mask], minlength=n)
+
+        selected = np.nonzero(counts > min_orders)[0]
+        cust_ids = self._np("customers", "cust_id")
+        # most orders first, then cust_id (same order as the live report)
+        selected = selected[np.lexsort((cust_ids[selected], -counts[selected]))]
+        selected = selected[offset:offset + limit] if limit else selected[offset:]
+
+        result = []
+        for pos in selected:
+            customer = self._row("customers", pos)
+            customer["total_orders"] = int(counts[pos])
+            customer["total_spent"] = round(float(spent[pos]), 2)
+            result.append(customer)
+        return result
+
+    def frequent_customers(self, min_orders: int = 2, limit: Optional[int] = None, offset: int = 0) -> List[Dict]:
+        return self.orders_per_customer(min_orders=min_orders, limit=limit, offset=offset)
+
+    def rebuild_rollups(self) -> None:
+        raise RuntimeError("Snapshots are read-only; re-export with: report snapshot")
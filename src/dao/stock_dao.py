@@ -0,0 +1,93 @@
+# src/dao/stock_dao.py
+import threading
+from typing import Optional, List, Dict
+from postgrest.exceptions import APIError
+from src.dao.base import BaseDAO
+
+# errcode raised by reserve_stock when a line cannot be covered
+INSUFFICIENT_STOCK = "P0001"
+
+
+def _totals(items: List[Dict]) -> Dict[int, int]:
+    """Collapse basket lines into {prod_id: quantity}, sorted by prod_id."""
+    totals: Dict[int, int] = {}
+    for it in items:
+        totals[it["prod_id"]] = totals.get(it["prod_id"], 0) + it["quantity"]
+    return dict(sorted(totals.items()))
+
+
+class StockDAO(BaseDAO):
+    """Atomic stock changes backed by the functions in sql/002_stock.sql"""
+
+    def reserve(self, items: List[Dict]) -> bool:
+        """
+        Decrement stock for every line, or for none of them.
+        Returns False if any product does not have enough stock.
+        """
+        lines = [{"prod_id": pid, "quantity": qty} for pid, qty in _totals(items).items()]
+        try:
+            self.sb.rpc("reserve_stock", {"p_items": lines}).execute()
+        except APIError as e:
+            if e.code == INSUFFICIENT_STOCK:
+                return False
+            raise
+        return True
+
+    def release(self, items: List[Dict]) -> None:
+        lines = [{"prod_id": pid, "quantity": qty} for pid, qty in _totals(items).items()]
+        self.sb.rpc("release_stock", {"p_items": lines}).execute()
+
+    def adjust(self, prod_id: int, delta: int) -> Optional[Dict]:
+        """
+        Add delta (may be negative) to a product's stock and return the row.
+        Returns None if the product does not exist or stock would go negative.
+        """
+        resp = self.sb.rpc("adjust_stock", {"p_prod_id": prod_id, "p_delta": delta}).execute()
+        return resp.data[0] if resp.data else None
+
+
+class LocalStockDAO:
+    """
+    In-process stand-in for StockDAO with the same semantics.
+    Each product has its own lock, taken in prod_id order, so reservations
+    on disjoint products never wait on each other.
+    """
+
+    def __init__(self, stock: Optional[Dict[int, int]] = None):
+        self.stock: Dict[int, int] = dict(stock or {})
+        self._locks: Dict[int, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    def _lock_for(self, prod_id: int) -> threading.Lock:
+        lock = self._locks.get(prod_id)
+        if lock is None:
+            with self._locks_guard:
+                lock = self._locks.setdefault(prod_id, threading.Lock())
+        return lock
+
+    def reserve(self, items: List[Dict]) -> bool:
+        totals = _totals(items)
+        locks = [self._lock_for(pid) for pid in totals]
+        for lock in locks:
+            lock.acquire()
+        try:
+            if any(self.stock.get(pid, 0) < qty for pid, qty in totals.items()):
+                return False
+            for pid, qty in totals.items():
+                self.stock[pid] -= qty
+            return True
+        finally:
+            for lock in reversed(locks):
+                lock.release()
+
+    def release(self, items: List[Dict]) -> None:
+        for pid, qty in _totals(items).items():
+            with self._lock_for(pid):
+                self.stock[pid] = self.stock.get(pid, 0) + qty
+
+    def adjust(self, prod_id: int, delta: int) -> Optional[Dict]:
+        with self._lock_for(prod_id):
+            if prod_id not in self.stock or self.stock[prod_id] + delta < 0:
+                return None
+            self.stock[prod_id] += delta
+            return {"prod_id": prod_id, "stock": self.stock[prod_id]}
@@ -0,0 +1,85 @@
+# src/dao/storage.py
+# Storage backends behind BaseDAO, chosen with RETAIL_STORAGE_BACKEND:
+#
+#   supabase (default)  PostgREST over HTTPS through the pooled supabase client
+#   postgres            direct connections from a psycopg pool to DATABASE_URL
+#                       (src/dao/postgres.py), for workers next to the database
+#
+# Both hand the DAOs a client with the same table()/rpc() query-builder API,
+# so DAO code is backend-agnostic. The postgres backend additionally supports
+# transaction() and COPY-based copy_rows(). The asyncio DAOs
+# (src/dao/async_dao.py) always use the supabase client.
+import threading
+from typing import ContextManager, Dict, List, Optional
+
+from src.config import STORAGE_BACKEND, get_pg_pool, get_supabase
+
+
+class StorageBackend:
+    """Interface every storage backend implements."""
+
+    name = ""
+    supports_transactions = False
+
+    def client(self):
+        """Query-builder client (table()/from_()/rpc()) for the DAOs."""
+        raise NotImplementedError
+
+    def transaction(self) -> ContextManager[None]:
+        """
+        Run the DAO calls inside the `with` block atomically.
+        Only available when supports_transactions is true.
+        """
+        raise NotImplementedError(
+            f"the {self.name} backend has no multi-statement transactions; "
+            "use an RPC (sql/) or RETAIL_STORAGE_BACKEND=postgres"
+        )
+
+    def copy_rows(self, table: str, rows: List[Dict]) -> List[Dict]:
+        """Bulk-insert rows into table; returns the inserted rows."""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class SupabaseBackend(StorageBackend):
+    """PostgREST through the shared supabase client (or the one given)."""
+
+    name = "supabase"
+
+    def __init__(self, sb=None):
+        self._sb = sb
+
+    def client(self):
+        return self._sb if self._sb is not None else get_supabase()
+
+    def copy_rows(self, table: str, rows: List[Dict]) -> List[Dict]:
+        # PostgREST has no COPY; one multi-row INSERT is the closest
+        if not rows:
+            return []
+        return self.client().table(table).insert(rows).execute().data or []
+
+
+_backend: Optional[StorageBackend] = None
+_backend_lock = threading.Lock()
+
+
+def get_backend() -> StorageBackend:
+    """
+    Return the process-wide backend selected by RETAIL_STORAGE_BACKEND.
+    Raises RuntimeError for an unknown backend name.
+    """
+    global _backend
+    if _backend is not None:
+        return _backend
+    with _backend_lock:
+        if _backend is None:
+            if STORAGE_BACKEND == "supabase":
+                _backend = SupabaseBackend()
+            elif STORAGE_BACKEND == "postgres":
+                from src.dao.postgres import PostgresBackend
+                _backend = PostgresBackend(get_pg_pool())
+            else:
+                raise RuntimeError(f"Unknown RETAIL_STORAGE_BACKEND: {STORAGE_BACKEND} (expected supabase or postgres)")
+        return _backend
@@ -0,0 +1,97 @@
+# src/server/client.py
+# Minimal client for src/server/main.py, used by the CLI's --server option.
+# Only the standard library is imported, so forwarding a command stays as
+# cheap as parsing it.
+import http.client
+import json
+import socket
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+from src.config import SERVER_TIMEOUT
+
+
+class ServerUnavailable(Exception):
+    """No retail server is listening at the given URL."""
+
+
+class ServerError(RuntimeError):
+    """The server took the request but dropped the connection or did not reply in time."""
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path: str, timeout: Optional[float] = None):
+        super().__init__("localhost", timeout=timeout)
+        self._path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self._path)
+
+
+def _connection(url: str, timeout: Optional[float]) -> http.client.HTTPConnection:
+    parts = urlsplit(url)
+    if parts.scheme == "unix":
+        return _UnixHTTPConnection(parts.path, timeout=timeout)
+    if parts.scheme == "http":
+        return http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=timeout)
+    raise ValueError(f"Unsupported server URL (expected http://host:port or unix:///path): {url}")
+
+
+def request(
+    url: str, method: str, path: str, payload: Optional[Dict] = None, timeout: Optional[float] = SERVER_TIMEOUT
+) -> Tuple[int, Any]:
+    """
+    Send one request and return (status, decoded JSON body).
+    Raises ServerUnavailable if nothing accepts the connection, ServerError
+    if the server resets it or does not answer within timeout (the request
+    may have run, so callers must not simply retry it elsewhere).
+    """
+    conn = _connection(url, timeout)
+    body = json.dumps(payload).encode() if payload is not None else None
+    headers = {"Content-Type": "application/json"} if body is not None else {}
+    try:
+        conn.connect()
+    except (ConnectionRefusedError, FileNotFoundError, socket.gaierror, socket.timeout) as e:
+        conn.close()
+        raise ServerUnavailable(f"no retail server at {url}: {e}")
+    try:
+        conn.request(method, path, body=body, headers=headers)
+        resp = conn.getresponse()
+        data = resp.read()
+    except socket.timeout:
+        raise ServerError(f"retail server at {url} did not reply within {timeout}s")
+    except (ConnectionResetError, BrokenPipeError) as e:
+        raise ServerError(f"retail server at {url} closed the connection: {e or type(e).__name__}")
+    finally:
+        conn.close()
+    ctype = resp.getheader("Content-Type", "")
+    return resp.status, json.loads(data) if ctype.startswith("application/json") else data.decode()
+
+
+def call(url: str, service: str, method: str, **params) -> Any:
+    """
+    Call a service operation, e.g. call(url, "orders", "get_order_details", order_id=7).
+    Raises RuntimeError carrying the server's error message on failure.
+    """
+    status, body = request(url, "POST", f"/api/{service}/{method}", params)
+    if status != 200:
+        raise RuntimeError(body.get("error") if isinstance(body, dict) else body)
+    return body["result"]
+
+
+def forward_command(url: str, command: str, args: Dict) -> Dict:
+    """
+    Run a CLI handler (e.g. "order_show") with parsed args on the server.
+    Returns {"output": captured stdout, "error": message or None}, also when
+    the server fails (ServerUnavailable is still raised).
+    """
+    try:
+        status, body = request(url, "POST", "/cli", {"command": command, "args": args})
+    except ServerError as e:
+        return {"output": "", "error": str(e)}
+    if status == 200 and isinstance(body, dict):
+        return {"output": body.get("output") or "", "error": body.get("error")}
+    error = body.get("error") if isinstance(body, dict) else None
+    return {"output": "", "error": error or f"server returned {status}: {body}"}
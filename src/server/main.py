@@ -0,0 +1,322 @@
+# src/server/main.py
+# Long-running retail service. One process keeps the imported stack, the
+# storage backend's connection pool, the product cache and the services
+# warm, and serves requests from a fixed pool of worker threads:
+#
+#   python -m src.server.main --listen 127.0.0.1:8765 --workers 16
+#   python -m src.server.main --listen unix:///run/retail.sock
+#   python -m src.server.main --outbox-workers 0    (dispatch elsewhere)
+#   retail-cli serve ...                       (same thing)
+#
+# HTTP/JSON API:
+#   GET  /health                        {"status": "ok", "backend", "workers", "uptime_s"}
+#   GET  /metrics                       DAO request metrics, Prometheus text format
+#   POST /api/<service>/<method>        body: keyword arguments as a JSON object
+#        service: products, customers, orders, payments, reports
+#        -> {"result": ...}; service errors -> 400 {"error", "type"}
+#   POST /cli                           {"command": "order_show", "args": {...}}
+#        -> {"output": captured stdout, "error": null | message}
+#
+# `retail-cli --server URL ...` (or RETAIL_SERVER_URL) uses /cli, so every
+# CLI command can be forwarded without paying process start-up.
+#
+# Unless --outbox-workers is 0, the server also runs the outbox dispatcher
+# (src/services/outbox_service.py) on its own thread pool, so payments for
+# new orders and cancellations follow within a poll interval.
+import argparse
+import contextlib
+import inspect
+import io
+import json
+import logging
+import os
+import re
+import signal
+import socketserver
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from typing import Any, Dict, Tuple
+from urllib.parse import urlsplit
+
+from postgrest.exceptions import APIError
+
+from src import config
+from src.cli.main import CLIApp
+from src.dao.instrumentation import METRICS
+from src.dao.storage import get_backend
+from src.services.customer_service import CustomerError
+from src.services.order_service import OrderError
+from src.services.payment_service import PaymentError
+from src.services.product_service import ProductError
+from src.services.reporting_service import ReportingError
+
+log = logging.getLogger("retail.server")
+
+# /api/<service>/... -> CLIApp attribute holding the shared service instance
+SERVICES = {
+    "products": "prod_service",
+    "customers": "cust_service",
+    "orders": "order_service",
+    "payments": "payment_service",
+    "reports": "report_service",
+}
+# operations that never return (they would pin a worker forever)
+EXCLUDED_METHODS = {"watch_low_stock"}
+SERVICE_ERRORS = (ProductError, CustomerError, OrderError, PaymentError, ReportingError)
+# CLI handlers that /cli may run
+_COMMAND = re.compile(r"^(product|customer|order|payment|report|outbox)_[a-z_]+$")
+_API_PATH = re.compile(r"^/api/(\w+)/(\w+)$")
+MAX_BODY = 64 * 1024 * 1024
+
+
+class RequestError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class _ThreadOutput:
+    """
+    sys.stdout stand-in: while a worker thread is capturing, its writes go
+    to that request's buffer; everything else reaches the real stream.
+    """
+
+    def __init__(self, stream):
+        self._stream = stream
+        self._local = threading.local()
+
+    @contextlib.contextmanager
+    def capture(self):
+        buffer = self._local.buffer = io.StringIO()
+        try:
+            yield buffer
+        finally:
+            self._local.buffer = None
+
+    def write(self, text: str) -> int:
+        return (getattr(self._local, "buffer", None) or self._stream).write(text)
+
+    def flush(self) -> None:
+        (getattr(self._local, "buffer", None) or self._stream).flush()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._stream, name)
+
+
+class ServiceHost:
+    """The warm CLIApp (and through it every service) shared by all workers."""
+
+    def __init__(self, workers: int, outbox_workers: int = 0):
+        self.app = CLIApp()
+        self.workers = workers
+        self.outbox_workers = outbox_workers
+        self.started = time.monotonic()
+        if not isinstance(sys.stdout, _ThreadOutput):
+            sys.stdout = _ThreadOutput(sys.stdout)
+        self.output = sys.stdout
+
+    def warm(self) -> None:
+        """Build every service and open the backend's pool before the first request."""
+        for attr in SERVICES.values():
+            getattr(self.app, attr)
+        get_backend().client()
+
+    def health(self) -> Dict:
+        return {
+            "status": "ok",
+            "backend": get_backend().name,
+            "workers": self.workers,
+            "outbox_workers": self.outbox_workers,
+            "uptime_s": round(time.monotonic() - self.started, 1),
+        }
+
+    def call(self, service: str, method: str, params: Dict) -> Any:
+        """Run one service operation; generators are drained into a list."""
+        attr = SERVICES.get(service)
+        if attr is None or method.startswith("_") or method in EXCLUDED_METHODS:
+            raise RequestError(404, f"Unknown operation: {service}.{method}")
+        target = getattr(getattr(self.app, attr), method, None)
+        if not inspect.ismethod(target):
+            raise RequestError(404, f"Unknown operation: {service}.{method}")
+        try:
+            inspect.signature(target).bind(**params)
+        except TypeError as e:
+            raise RequestError(400, f"{service}.{method}: {e}")
+        result = target(**params)
+        return list(result) if inspect.isgenerator(result) else result
+
+    def run_command(self, command: str, args: Dict) -> Dict:
+        """Run a CLI handler on parsed arguments and return its stdout."""
+        handler = getattr(self.app, command, None) if _COMMAND.match(command or "") else None
+        if not inspect.ismethod(handler):
+            raise RequestError(404, f"Unknown command: {command}")
+        error = None
+        with self.output.capture() as out:
+            try:
+                handler(argparse.Namespace(**args))
+            except APIError as e:
+                error = f"Error: {e.message}"
+            except Exception as e:
+                log.exception("command %s failed", command)
+                error = "".join(traceback.format_exception_only(type(e), e)).strip()
+        return {"output": out.getvalue(), "error": error}
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+    server_version = "retail-server/1"
+
+    @property
+    def host(self) -> ServiceHost:
+        return self.server.host
+
+    def do_GET(self):
+        path = urlsplit(self.path).path
+        if path == "/health":
+            self._send_json(200, self.host.health())
+        elif path == "/metrics":
+            self._send(200, METRICS.prometheus().encode(), "text/plain; version=0.0.4")
+        else:
+            self._send_json(404, {"error": f"Not found: {path}"})
+
+    def do_POST(self):
+        path = urlsplit(self.path).path
+        try:
+            body = self._read_json()
+            if path == "/cli":
+                self._send_json(200, self.host.run_command(body.get("command"), body.get("args") or {}))
+                return
+            m = _API_PATH.match(path)
+            if not m:
+                raise RequestError(404, f"Not found: {path}")
+            self._send_json(200, {"result": self.host.call(m.group(1), m.group(2), body)})
+        except RequestError as e:
+            self._send_json(e.status, {"error": str(e)})
+        except SERVICE_ERRORS as e:
+            self._send_json(400, {"error": str(e), "type": type(e).__name__})
+        except APIError as e:
+            self._send_json(502, {"error": e.message, "code": e.code})
+        except Exception as e:
+            log.exception("%s failed", path)
+            self._send_json(500, {"error": f"{type(e).__name__}: {e}"})
+
+    def _read_json(self) -> Dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY:
+            raise RequestError(413, "Request body too large")
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError as e:
+            raise RequestError(400, f"Invalid JSON: {e}")
+        if not isinstance(body, dict):
+            raise RequestError(400, "Request body must be a JSON object")
+        return body
+
+    def _send_json(self, status: int, payload: Any) -> None:
+        self._send(status, json.dumps(payload, default=str).encode(), "application/json")
+
+    def _send(self, status: int, body: bytes, content_type: str) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, fmt, *args):
+        # client_address is empty on Unix sockets, so skip address_string()
+        log.debug("%s %s", self.requestline, fmt % args)
+
+
+class _PooledServerMixin:
+    """Serve each connection on a fixed ThreadPoolExecutor instead of a new thread."""
+
+    # POS terminals connect in bursts; the socketserver default of 5 resets them
+    request_queue_size = 128
+
+    def __init__(self, address, host: ServiceHost):
+        self.host = host
+        self.executor = ThreadPoolExecutor(max_workers=host.workers, thread_name_prefix="retail-worker")
+        super().__init__(address, RequestHandler)
+
+    def process_request(self, request, client_address):
+        self.executor.submit(self._process, request, client_address)
+
+    def _process(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self.executor.shutdown(wait=True)
+
+
+class RetailHTTPServer(_PooledServerMixin, HTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class RetailUnixServer(_PooledServerMixin, socketserver.UnixStreamServer):
+    def server_bind(self):
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(self.server_address)
+        super().server_bind()
+
+    def server_close(self):
+        super().server_close()
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(self.server_address)
+
+
+def _parse_listen(listen: str) -> Tuple[str, Any]:
+    """'host:port', 'http://host:port' or 'unix:///path' -> (kind, address)."""
+    if listen.startswith("unix://"):
+        return "unix", urlsplit(listen).path
+    parts = urlsplit(listen if "://" in listen else f"http://{listen}")
+    return "http", (parts.hostname or "127.0.0.1", parts.port or 8765)
+
+
+def build_server(
+    listen: str = config.SERVER_LISTEN, workers: int = config.SERVER_WORKERS, outbox_workers: int = 0
+):
+    kind, address = _parse_listen(listen)
+    host = ServiceHost(workers, outbox_workers)
+    host.warm()
+    return (RetailUnixServer if kind == "unix" else RetailHTTPServer)(address, host)
+
+
+def _terminate(signum, frame):
+    raise KeyboardInterrupt
+
+
+def serve(
+    listen: str = config.SERVER_LISTEN,
+    workers: int = config.SERVER_WORKERS,
+    outbox_workers: int = config.OUTBOX_WORKERS,
+) -> None:
+    """Run until SIGINT/SIGTERM, then drain the workers and close the pools."""
+    server = build_server(listen, workers, outbox_workers)
+    dispatcher = server.host.app.outbox_service.start(outbox_workers) if outbox_workers > 0 else None
+    signal.signal(signal.SIGTERM, _terminate)
+    print(f"retail server listening on {listen} ({workers} workers, {outbox_workers} outbox workers, "
+          f"{get_backend().name} backend)", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if dispatcher is not None:
+            dispatcher.stop()
+        config.close_supabase()
+        config.close_pg_pool()
+
+
+if __name__ == "__main__":
+    CLIApp().run(["serve", *sys.argv[1:]])
@@ -0,0 +1,163 @@
+# src/services/async_services.py
+import asyncio
+import weakref
+from typing import Dict, List, Optional
+from postgrest.exceptions import APIError
+from src.config import ASYNC_CONCURRENCY
+from src.dao.async_dao import (
+    AsyncCustomerDAO,
+    AsyncOrderDAO,
+    AsyncPaymentDAO,
+    AsyncProductDAO,
+    AsyncReportingDAO,
+)
+from src.services.order_service import OrderError, check_basket, validate_items
+from src.services.payment_service import PaymentError, PAYMENT_METHODS
+
+# ids per IN (...) request when a batch lookup is split across requests
+IN_BATCH_SIZE = 200
+
+
+def run_sync(coro):
+    """
+    Run a coroutine from synchronous code, e.g.
+    run_sync(AsyncRetailService().reports()).
+    """
+    return asyncio.run(coro)
+
+
+def _chunks(ids: List[int], size: int) -> List[List[int]]:
+    ids = list(dict.fromkeys(ids))
+    return [ids[i:i + size] for i in range(0, len(ids), size)]
+
+
+class AsyncRetailService:
+    """
+    Async service facade over the async DAOs.
+    Independent lookups run concurrently, with at most `concurrency` requests
+    in flight per facade and event loop (bounded by a semaphore created in
+    the loop, so a facade can be reused across run_sync() calls).
+    """
+
+    def __init__(
+        self,
+        product_dao: Optional[AsyncProductDAO] = None,
+        customer_dao: Optional[AsyncCustomerDAO] = None,
+        order_dao: Optional[AsyncOrderDAO] = None,
+        payment_dao: Optional[AsyncPaymentDAO] = None,
+        reporting_dao: Optional[AsyncReportingDAO] = None,
+        concurrency: int = ASYNC_CONCURRENCY,
+    ):
+        self.product_dao = product_dao or AsyncProductDAO()
+        self.customer_dao = customer_dao or AsyncCustomerDAO()
+        self.order_dao = order_dao or AsyncOrderDAO()
+        self.payment_dao = payment_dao or AsyncPaymentDAO()
+        self.reporting_dao = reporting_dao or AsyncReportingDAO()
+        self.concurrency = concurrency
+        self._sems: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        sem = self._sems.get(loop)
+        if sem is None:
+            sem = self._sems[loop] = asyncio.Semaphore(self.concurrency)
+        return sem
+
+    async def _bounded(self, coro):
+        async with self._semaphore():
+            return await coro
+
+    async def _gather(self, *coros) -> List:
+        return await asyncio.gather(*(self._bounded(c) for c in coros))
+
+    # ------------------------
+    # Products / Customers
+    # ------------------------
+    async def get_product(self, prod_id: int) -> Optional[Dict]:
+        return await self._bounded(self.product_dao.get_product_by_id(prod_id))
+
+    async def get_products(self, prod_ids: List[int]) -> List[Dict]:
+        pages = await self._gather(*(self.product_dao.get_products_by_ids(c) for c in _chunks(prod_ids, IN_BATCH_SIZE)))
+        return [p for page in pages for p in page]
+
+    async def get_customer(self, cust_id: int) -> Optional[Dict]:
+        return await self._bounded(self.customer_dao.get_by_id(cust_id))
+
+    async def get_customers(self, cust_ids: List[int]) -> List[Dict]:
+        pages = await self._gather(*(self.customer_dao.get_many(c) for c in _chunks(cust_ids, IN_BATCH_SIZE)))
+        return [c for page in pages for c in page]
+
+    # ------------------------
+    # Orders
+    # ------------------------
+    async def create_order(self, customer_id: int, items: List[Dict]) -> Dict:
+        """
+        Same rules as OrderService.create_order; the customer and product
+        lookups run concurrently before the single place_order RPC.
+        """
+        validate_items(items)
+        customer, products = await asyncio.gather(
+            self.get_customer(customer_id),
+            self.get_products([it["prod_id"] for it in items]),
+        )
+        if not customer:
+            raise OrderError(f"No customer found with id {customer_id}")
+        requested = check_basket({p["prod_id"]: p for p in products}, items)
+        try:
+            return await self._bounded(self.order_dao.place_order(customer_id, items))
+        except APIError as e:
+            raise OrderError(e.message)
+        finally:
+            self.product_dao.invalidate(*requested)
+
+    async def get_order_details(self, order_id: int) -> Dict:
+        details = await self._bounded(self.order_dao.get_order_details(order_id))
+        if not details:
+            raise OrderError(f"No order found with id {order_id}")
+        return details
+
+    async def get_orders_details(self, order_ids: List[int]) -> List[Dict]:
+        pages = await self._gather(
+            *(self.order_dao.get_order_details_many(c) for c in _chunks(order_ids, IN_BATCH_SIZE))
+        )
+        by_id = {d["order"]["order_id"]: d for page in pages for d in page}
+        return [by_id[i] for i in order_ids if i in by_id]
+
+    # ------------------------
+    # Payments
+    # ------------------------
+    async def process_payment(self, order_id: int, method: str, idempotency_key: Optional[str] = None) -> Dict:
+        if method not in PAYMENT_METHODS:
+            raise PaymentError("Invalid payment method")
+        try:
+            payment = await self._bounded(self.payment_dao.mark_paid(order_id, method, idempotency_key))
+        except APIError as e:
+            raise PaymentError(e.message)
+        if not payment:
+            raise PaymentError(f"No payment found for order {order_id}")
+        return payment
+
+    async def get_payment_status(self, order_id: int) -> Optional[Dict]:
+        return await self._bounded(self.payment_dao.get_payment(order_id))
+
+    # ------------------------
+    # Reports
+    # ------------------------
+    async def reports(self, limit: int = 5, min_orders: int = 2) -> Dict:
+        """
+        All dashboard reports, fetched concurrently.
+        """
+        top, revenue, per_customer, frequent = await self._gather(
+            self.reporting_dao.top_selling_products(limit=limit),
+            self.reporting_dao.total_revenue_last_month(),
+            self.reporting_dao.orders_per_customer(),
+            self.reporting_dao.frequent_customers(min_orders=min_orders),
+        )
+        return {
+            "top_selling_products": top,
+            "total_revenue_last_month": revenue,
+            "orders_per_customer": per_customer,
+            "frequent_customers": frequent,
+        }
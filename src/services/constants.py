@@ -0,0 +1,11 @@
+# src/services/constants.py
+# Values shared by the services and the CLI parser. This module must stay
+# free of imports so building the CLI never loads the service stack.
+
+LOW_STOCK_THRESHOLD = 5
+
+PAYMENT_METHODS = ("Cash", "Card", "UPI")
+SETTLE_BATCH_SIZE = 1000
+
+REVENUE_BUCKETS = ("day", "week", "month")
+REVENUE_GROUPS = ("method", "category")
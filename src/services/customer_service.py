@@ -1,6 +1,6 @@
 # src/services/customer_service.py
 from src.dao.customer_dao import CustomerDAO
-from typing import Optional, List, Dict
+from typing import Iterator, Optional, List, Dict
 
 class CustomerError(Exception):
     pass
@@ -36,8 +36,24 @@ class CustomerService:
         #     raise CustomerError("Cannot delete customer with orders")
         return self.dao.delete_customer(email)
 
+    def get_customer(self, cust_id: int) -> Optional[Dict]:
+        return self.dao.get_by_id(cust_id)
+
+    def get_customers(self, cust_ids: List[int]) -> List[Dict]:
+        return self.dao.get_many(cust_ids)
+
     def list_customers(self) -> List[Dict]:
         return self.dao.list_customers()
 
-    def search_customers(self, email: Optional[str] = None, city: Optional[str] = None) -> List[Dict]:
-        return self.dao.search_customers(email=email, city=city)
+    def iter_customers(self, page_size: Optional[int] = None) -> Iterator[Dict]:
+        return self.dao.iter_customers(page_size=page_size)
+
+    def search_customers(
+        self,
+        email: Optional[str] = None,
+        city: Optional[str] = None,
+        name: Optional[str] = None,
+        phone: Optional[str] = None,
+        limit: int = 100,
+    ) -> List[Dict]:
+        return self.dao.search_customers(email=email, city=city, name=name, phone=phone, limit=limit)
@@ -1,88 +1,105 @@
 # src/services/order_service.py
 from src.services.customer_service import CustomerService, CustomerError
 from src.services.product_service import ProductService, ProductError
+from src.dao.order_dao import OrderDAO
+from postgrest.exceptions import APIError
 
 class OrderError(Exception):
     pass
 
+
+def validate_items(items):
+    """
+    Reject empty baskets and non-positive quantities.
+    """
+    if not items:
+        raise OrderError("Order must contain at least one item")
+    for it in items:
+        if it["quantity"] <= 0:
+            raise OrderError(f"Quantity for product id {it['prod_id']} must be positive")
+
+
+def check_basket(products, items):
+    """
+    Check every line against the fetched products ({prod_id: row}).
+    Returns the requested quantity per prod_id.
+    """
+    requested = {}
+    for it in items:
+        requested[it["prod_id"]] = requested.get(it["prod_id"], 0) + it["quantity"]
+    for prod_id, quantity in requested.items():
+        prod = products.get(prod_id)
+        if not prod:
+            raise OrderError(f"Product id {prod_id} does not exist")
+        if prod["stock"] < quantity:
+            raise OrderError(f"Not enough stock for '{prod['name']}'")
+    return requested
+
+
 class OrderService:
     """Business logic for order management"""
 
-    def __init__(self, customer_dao=None, product_dao=None):
+    def __init__(self, customer_dao=None, product_dao=None, order_dao=None):
         self.customer_service = CustomerService(dao=customer_dao)
         self.product_service = ProductService(dao=product_dao)
-        self.orders = []
-        self.next_id = 1
+        self.order_dao = order_dao or OrderDAO()
 
     def create_order(self, customer_id, items):
-        # Check customer exists
-        customer = None
-        for c in self.customer_service.list_customers():
-            if c["id"] == customer_id:
-                customer = c
-                break
+        validate_items(items)
+
+        # Check customer exists (primary key lookup)
+        customer = self.customer_service.get_customer(customer_id)
         if not customer:
             raise OrderError(f"No customer found with id {customer_id}")
 
-        # Validate stock and calculate total
-        total_amount = 0
-        for it in items:
-            prod = self.product_service.get_product(it["prod_id"])
-            if not prod:
-                raise OrderError(f"Product id {it['prod_id']} does not exist")
-            if prod["stock"] < it["quantity"]:
-                raise OrderError(f"Not enough stock for '{prod['name']}'")
-            total_amount += prod["price"] * it["quantity"]
-
-        # Deduct stock
-        for it in items:
-            prod = self.product_service.get_product(it["prod_id"])
-            prod["stock"] -= it["quantity"]
-
-        # Save order
-        order = {
-            "id": self.next_id,
-            "customer_id": customer_id,
-            "items": items,
-            "total_amount": total_amount,
-            "status": "PLACED"
-        }
-        self.next_id += 1
-        self.orders.append(order)
-        customer["orders"].append(order["id"])
+        # Validate stock for the whole basket with a single query
+        products = {p["prod_id"]: p for p in self.product_service.get_products([it["prod_id"] for it in items])}
+        requested = check_basket(products, items)
+
+        # Deduct stock, save order + items in one transaction. The pending
+        # payment is created off the request path from the order.placed
+        # outbox event (see src/services/outbox_service.py).
+        # The stock check is repeated server-side, so a concurrent checkout that
+        # wins the race surfaces here as an APIError.
+        try:
+            order = self.order_dao.place_order(customer_id, items)
+        except APIError as e:
+            raise OrderError(e.message)
+        finally:
+            self.product_service.stock_changed(list(requested))
         return order
 
     def get_order_details(self, order_id):
-        for o in self.orders:
-            if o["id"] == order_id:
-                customer = None
-                for c in self.customer_service.list_customers():
-                    if c["id"] == o["customer_id"]:
-                        customer = c
-                        break
-                return {"order": o, "customer": customer}
-        raise OrderError(f"No order found with id {order_id}")
-
-    def list_orders_of_customer(self, customer_id):
-        return [o for o in self.orders if o["customer_id"] == customer_id]
+        """
+        Return {"order" (with items), "customer", "payment"} in one round trip.
+        """
+        details = self.order_dao.get_order_details(order_id)
+        if not details:
+            raise OrderError(f"No order found with id {order_id}")
+        return details
+
+    def get_orders_details(self, order_ids):
+        """
+        Batched get_order_details; missing orders are left out.
+        """
+        return self.order_dao.get_order_details_many(order_ids)
+
+    def list_orders_of_customer(self, customer_id, limit=None):
+        return self.order_dao.list_orders_by_customer(customer_id, limit=limit)
 
     def cancel_order(self, order_id):
-        order = next((o for o in self.orders if o["id"] == order_id), None)
+        order = self.order_dao.cancel_order(order_id)
         if not order:
-            raise OrderError(f"No order found with id {order_id}")
-        if order["status"] != "PLACED":
+            if not self.order_dao.get_order(order_id):
+                raise OrderError(f"No order found with id {order_id}")
             raise OrderError("Can cancel only orders with status = PLACED")
-        for it in order["items"]:
-            prod = self.product_service.get_product(it["prod_id"])
-            prod["stock"] += it["quantity"]
-        order["status"] = "CANCELLED"
+        self.product_service.stock_changed([it["prod_id"] for it in order["items"]])
         return order
 
     def complete_order(self, order_id):
-        order = next((o for o in self.orders if o["id"] == order_id), None)
+        order = self.order_dao.update_status(order_id, "PLACED", "COMPLETED")
         if not order:
-            raise OrderError(f"No order found with id {order_id}")
-        if order["status"] != "PLACED":
+            if not self.order_dao.get_order(order_id):
+                raise OrderError(f"No order found with id {order_id}")
             raise OrderError("Can complete only orders with status = PLACED")
-        order["status"] = "COMPLETED"
         return order
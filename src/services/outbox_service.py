@@ -0,0 +1,184 @@
+# src/services/outbox_service.py
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+from src.config import (
+    OUTBOX_BATCH_SIZE,
+    OUTBOX_LEASE_SECONDS,
+    OUTBOX_MAX_ATTEMPTS,
+    OUTBOX_POLL_INTERVAL,
+    OUTBOX_RETRY_SECONDS,
+)
+from src.dao.outbox_dao import OutboxDAO
+from src.dao.payment_dao import PaymentDAO
+from src.dao.product_dao import ProductDAO
+from src.services.constants import LOW_STOCK_THRESHOLD
+
+log = logging.getLogger("retail.outbox")
+
+
+class OutboxError(Exception):
+    pass
+
+
+def log_low_stock(products: List[Dict]) -> None:
+    """Default low-stock notifier: one warning per batch."""
+    log.warning(
+        "low stock: %s", ", ".join(f"{p['name']} [{p['sku']}] {p['stock']} left" for p in products)
+    )
+
+
+class OutboxService:
+    """
+    Applies the side effects of order changes recorded in the outbox
+    (sql/012_outbox.sql), a batch at a time:
+
+        order.placed     create the PENDING payments, notify on_low_stock of
+                         ordered products at or below low_stock_threshold
+        order.cancelled  cancel the PENDING payments / refund the PAID ones
+
+    Each batch costs one claim, one set-based call per event type and one
+    acknowledgement, whatever its size. A failing event type is retried
+    with backoff and parked as DEAD after max_attempts; the others in the
+    batch are still acknowledged.
+    """
+
+    def __init__(
+        self,
+        dao=None,
+        payment_dao=None,
+        product_dao=None,
+        batch_size: int = OUTBOX_BATCH_SIZE,
+        lease_seconds: int = OUTBOX_LEASE_SECONDS,
+        retry_seconds: int = OUTBOX_RETRY_SECONDS,
+        max_attempts: int = OUTBOX_MAX_ATTEMPTS,
+        low_stock_threshold: int = LOW_STOCK_THRESHOLD,
+        on_low_stock: Callable[[List[Dict]], None] = log_low_stock,
+    ):
+        self.dao = dao or OutboxDAO()
+        self.payment_dao = payment_dao or PaymentDAO()
+        self.product_dao = product_dao or ProductDAO()
+        self.batch_size = batch_size
+        self.lease_seconds = lease_seconds
+        self.retry_seconds = retry_seconds
+        self.max_attempts = max_attempts
+        self.low_stock_threshold = low_stock_threshold
+        self.on_low_stock = on_low_stock
+        self.handlers: Dict[str, Callable[[List[Dict]], None]] = {
+            "order.placed": self._order_placed,
+            "order.cancelled": self._order_cancelled,
+        }
+
+    # ------------------------
+    # Effects
+    # ------------------------
+    def _order_placed(self, events: List[Dict]) -> None:
+        self.payment_dao.create_for_orders(sorted({e["order_id"] for e in events}))
+        prod_ids = {pid for e in events for pid in (e.get("payload") or {}).get("prod_ids", [])}
+        low = self.product_dao.low_stock_among(list(prod_ids), self.low_stock_threshold)
+        if low:
+            self.on_low_stock(low)
+
+    def _order_cancelled(self, events: List[Dict]) -> None:
+        self.payment_dao.close_cancelled(sorted({e["order_id"] for e in events}))
+
+    # ------------------------
+    # Dispatch
+    # ------------------------
+    def dispatch_once(self, limit: Optional[int] = None) -> Dict:
+        """
+        Claim up to limit (default batch_size) events and apply them.
+        Returns {"claimed", "done", "failed"}.
+        """
+        events = self.dao.claim(limit or self.batch_size, self.lease_seconds)
+        groups: Dict[str, List[Dict]] = {}
+        for event in events:
+            groups.setdefault(event["event_type"], []).append(event)
+
+        done: List[int] = []
+        failed = 0
+        for event_type, group in groups.items():
+            ids = [e["event_id"] for e in group]
+            handler = self.handlers.get(event_type)
+            try:
+                if handler is None:
+                    raise OutboxError(f"No handler for event type {event_type}")
+                handler(group)
+            except Exception as e:
+                log.warning("%d %s events failed: %s", len(ids), event_type, e)
+                self.dao.fail(ids, f"{type(e).__name__}: {e}", self.retry_seconds, self.max_attempts)
+                failed += len(ids)
+            else:
+                done.extend(ids)
+        self.dao.complete(done)
+        return {"claimed": len(events), "done": len(done), "failed": failed}
+
+    def drain(self, max_batches: Optional[int] = None) -> Dict:
+        """
+        Dispatch until no deliverable event is left (or max_batches ran).
+        Events that failed are not retried before their backoff expires.
+        """
+        total = {"claimed": 0, "done": 0, "failed": 0}
+        batches = 0
+        while max_batches is None or batches < max_batches:
+            report = self.dispatch_once()
+            batches += 1
+            for key in total:
+                total[key] += report[key]
+            if report["claimed"] < self.batch_size:
+                break
+        return total
+
+    def run(self, stop: threading.Event, poll_interval: float = OUTBOX_POLL_INTERVAL) -> None:
+        """
+        Dispatch until stop is set. Full batches are followed immediately by
+        the next claim; the loop only sleeps once the queue is drained or the
+        database is unreachable.
+        """
+        while not stop.is_set():
+            try:
+                report = self.dispatch_once()
+            except Exception:
+                log.exception("outbox dispatch failed")
+                stop.wait(poll_interval)
+                continue
+            if report["claimed"] < self.batch_size:
+                stop.wait(poll_interval)
+
+    def start(self, workers: int, poll_interval: float = OUTBOX_POLL_INTERVAL) -> "OutboxDispatcher":
+        """Run `workers` dispatch loops on a background thread pool."""
+        return OutboxDispatcher(self, workers, poll_interval)
+
+    # ------------------------
+    # Operations
+    # ------------------------
+    def stats(self) -> Dict[str, Dict]:
+        return self.dao.stats()
+
+    def list_dead(self, limit: int = 100) -> List[Dict]:
+        return self.dao.list_dead(limit)
+
+    def requeue_dead(self, event_type: Optional[str] = None) -> int:
+        return self.dao.requeue_dead(event_type)
+
+    def purge(self, keep_days: int = 7) -> int:
+        if keep_days < 0:
+            raise OutboxError("keep_days cannot be negative")
+        return self.dao.purge(keep_days)
+
+
+class OutboxDispatcher:
+    """Background dispatch loops of an OutboxService; stop() ends them."""
+
+    def __init__(self, service: OutboxService, workers: int, poll_interval: float = OUTBOX_POLL_INTERVAL):
+        self.workers = workers
+        self._stop = threading.Event()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="retail-outbox")
+        for _ in range(workers):
+            self._executor.submit(service.run, self._stop, poll_interval)
+
+    def stop(self, wait: bool = True) -> None:
+        """Finish the batches in flight and stop claiming new ones."""
+        self._stop.set()
+        self._executor.shutdown(wait=wait)
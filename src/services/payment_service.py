@@ -1,5 +1,18 @@
 # src/services/payment_service.py
+from typing import Dict, Iterable, List, Optional
+from postgrest.exceptions import APIError
 from src.dao.payment_dao import PaymentDAO
+from src.services.constants import PAYMENT_METHODS, SETTLE_BATCH_SIZE
+
+# every mismatch report row carries these keys, so it also works as CSV
+MISMATCH_FIELDS = ("row", "order_id", "method", "amount", "expected", "status", "reason", "error")
+
+# target status -> the status a payment must be in to move there
+PAYMENT_TRANSITIONS = {
+    "PAID": "PENDING",
+    "REFUNDED": "PAID",
+    "CANCELLED": "PENDING",
+}
 
 class PaymentError(Exception):
     pass
@@ -11,13 +24,134 @@ class PaymentService:
     def create_payment(self, order_id: int, amount: float):
         return self.dao.create_payment(order_id, amount)
 
-    def process_payment(self, order_id: int, method: str):
-        if method not in ["Cash", "Card", "UPI"]:
+    def transition(
+        self, order_id: int, status: str, method: Optional[str] = None, idempotency_key: Optional[str] = None
+    ) -> Dict:
+        """
+        Apply one state-machine step to the order's payment.
+        Retrying with the same idempotency_key is a no-op that returns the
+        payment; an illegal step raises PaymentError.
+        """
+        if status not in PAYMENT_TRANSITIONS:
+            raise PaymentError(f"Unknown payment status: {status}")
+        try:
+            payment = self.dao.transition(order_id, PAYMENT_TRANSITIONS[status], status, method, idempotency_key)
+        except APIError as e:
+            raise PaymentError(e.message)
+        if not payment:
+            raise PaymentError(f"No payment found for order {order_id}")
+        return payment
+
+    def process_payment(self, order_id: int, method: str, idempotency_key: Optional[str] = None):
+        """
+        PENDING -> PAID; the order is marked COMPLETED in the same transaction.
+        """
+        if method not in PAYMENT_METHODS:
             raise PaymentError("Invalid payment method")
-        return self.dao.mark_paid(order_id, method)
+        return self.transition(order_id, "PAID", method, idempotency_key)
+
+    def refund_payment(self, order_id: int, idempotency_key: Optional[str] = None):
+        return self.transition(order_id, "REFUNDED", idempotency_key=idempotency_key)
+
+    def cancel_payment(self, order_id: int, idempotency_key: Optional[str] = None):
+        return self.transition(order_id, "CANCELLED", idempotency_key=idempotency_key)
+
+    # ------------------------
+    # Batch settlement / refunds
+    # ------------------------
+    @staticmethod
+    def _parse_settlement_row(row: Dict) -> Dict:
+        """
+        Normalise one settlement row into {order_id, method, amount}.
+        Raises PaymentError if the row is invalid.
+        """
+        try:
+            order_id = int(row.get("order_id"))
+            amount = round(float(row.get("amount")), 2)
+        except (TypeError, ValueError):
+            raise PaymentError("order_id and amount must be numeric")
+        method = (row.get("method") or "").strip()
+        if method not in PAYMENT_METHODS:
+            raise PaymentError(f"Invalid payment method: {method}")
+        return {"order_id": order_id, "method": method, "amount": amount}
+
+    def settle_payments(self, rows: Iterable[Dict], batch_size: int = SETTLE_BATCH_SIZE) -> Dict:
+        """
+        Apply processor confirmations (order_id, method, amount) in batches
+        of set-based updates, reconciling each amount against payments.amount.
+        Returns {"settled", "completed", "already_paid", "mismatched",
+        "mismatches": [{"row", "order_id", "reason", ...}]}; a mismatching
+        row is reported and left untouched, never fatal.
+        """
+        report = {"settled": 0, "completed": 0, "already_paid": 0, "mismatched": 0, "mismatches": []}
+        line_of: Dict[int, int] = {}
+        batch: List[Dict] = []
+
+        def mismatch(entry: Dict):
+            report["mismatched"] += 1
+            report["mismatches"].append({f: entry.get(f) for f in MISMATCH_FIELDS})
+
+        def flush():
+            result = self.dao.settle(batch)
+            for key in ("settled", "completed", "already_paid"):
+                report[key] += result[key]
+            sent = {p["order_id"]: p for p in batch}
+            for m in result["mismatches"]:
+                mismatch({**m, "row": line_of[m["order_id"]], "method": sent[m["order_id"]]["method"]})
+            batch.clear()
+
+        for line_no, row in enumerate(rows, start=1):
+            try:
+                payment = self._parse_settlement_row(row)
+            except PaymentError as e:
+                mismatch({"row": line_no, "order_id": row.get("order_id"), "reason": "invalid", "error": str(e)})
+                continue
+            if payment["order_id"] in line_of:
+                mismatch({"row": line_no, **payment, "reason": "duplicate"})
+                continue
+            line_of[payment["order_id"]] = line_no
+            batch.append(payment)
+            if len(batch) >= batch_size:
+                flush()
+        if batch:
+            flush()
+        report["mismatches"].sort(key=lambda m: m["row"])
+        return report
+
+    @staticmethod
+    def _parse_order_id(value) -> int:
+        """A positive integer order id (int or numeric string); raises PaymentError otherwise."""
+        try:
+            order_id = int(str(value).strip())
+        except ValueError:
+            raise PaymentError(f"Invalid order_id: {value!r}")
+        if order_id <= 0:
+            raise PaymentError(f"Invalid order_id: {value!r}")
+        return order_id
 
-    def refund_payment(self, order_id: int):
-        return self.dao.mark_refunded(order_id)
+    def refund_payments(self, order_ids: Iterable, batch_size: int = SETTLE_BATCH_SIZE) -> Dict:
+        """
+        Refund every PAID payment of order_ids, batch_size orders per
+        set-based update. Returns {"refunded", "already_refunded",
+        "skipped": [{"order_id", "status", "reason"}]}; ids that are not
+        positive integers (e.g. from a file) are skipped as "invalid".
+        Like refund_payment, this refunds the payments only: the orders stay
+        COMPLETED and no stock is released.
+        """
+        report = {"refunded": 0, "already_refunded": 0, "skipped": []}
+        ids = []
+        for value in order_ids:
+            try:
+                ids.append(self._parse_order_id(value))
+            except PaymentError:
+                report["skipped"].append({"order_id": value, "status": None, "reason": "invalid"})
+        ids = list(dict.fromkeys(ids))
+        for i in range(0, len(ids), batch_size):
+            result = self.dao.refund_many(ids[i:i + batch_size])
+            report["refunded"] += result["refunded"]
+            report["already_refunded"] += result["already_refunded"]
+            report["skipped"].extend(result["skipped"])
+        return report
 
     def get_payment_status(self, order_id: int):
         return self.dao.get_payment(order_id)
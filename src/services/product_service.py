@@ -32,8 +32,18 @@
  
 
 # src/services/product_service.py
-from typing import List, Dict, Optional
+import datetime
+import time
+from typing import Callable, Iterable, Iterator, List, Dict, Optional
+from postgrest.exceptions import APIError
 from src.dao.product_dao import ProductDAO
+from src.dao.stock_dao import StockDAO
+from src.services.constants import LOW_STOCK_THRESHOLD
+
+IMPORT_CHUNK_SIZE = 1000
+# How far back each watch poll looks past its cursor, to catch updates from
+# transactions that started before the previous poll but committed after it.
+WATCH_OVERLAP = datetime.timedelta(seconds=60)
 
 
 class ProductError(Exception):
@@ -47,9 +57,10 @@ class ProductService:
     Uses ProductDAO for data access.
     """
 
-    def __init__(self, dao: Optional[ProductDAO] = None):
+    def __init__(self, dao: Optional[ProductDAO] = None, stock_dao: Optional[StockDAO] = None):
         # Dependency Injection (default to new DAO if none passed)
         self.dao = dao or ProductDAO()
+        self.stock_dao = stock_dao or StockDAO()
 
     def add_product(self, name: str, sku: str, price: float, stock: int = 0, category: Optional[str] = None) -> Dict:
         """
@@ -65,26 +76,124 @@ class ProductService:
 
         return self.dao.create_product(name, sku, price, stock, category)
 
+    def get_product(self, prod_id: int) -> Optional[Dict]:
+        """
+        Return a single product by id, or None.
+        """
+        return self.dao.get_product_by_id(prod_id)
+
+    def get_products(self, prod_ids: List[int]) -> List[Dict]:
+        """
+        Return all products whose id is in prod_ids, using one query.
+        """
+        return self.dao.get_products_by_ids(prod_ids)
+
     def restock_product(self, prod_id: int, delta: int) -> Dict:
         """
-        Increase stock of a product by delta.
+        Increase stock of a product by delta (single atomic update).
         """
         if delta <= 0:
             raise ProductError("Delta must be positive")
 
-        p = self.dao.get_product_by_id(prod_id)
+        p = self.stock_dao.adjust(prod_id, delta)
+        self.dao.invalidate(prod_id)
         if not p:
             raise ProductError("Product not found")
+        return p
 
-        new_stock = (p.get("stock") or 0) + delta
-        return self.dao.update_product(prod_id, {"stock": new_stock})
+    def reserve_stock(self, items: List[Dict]) -> None:
+        """
+        Take stock for every {prod_id, quantity} line, all or nothing.
+        Raises ProductError if any line cannot be covered.
+        """
+        reserved = self.stock_dao.reserve(items)
+        self.dao.invalidate(*{it["prod_id"] for it in items})
+        if not reserved:
+            raise ProductError("Not enough stock to reserve all items")
+
+    def release_stock(self, items: List[Dict]) -> None:
+        """
+        Return previously reserved stock (e.g. on order cancellation).
+        """
+        self.stock_dao.release(items)
+        self.dao.invalidate(*{it["prod_id"] for it in items})
+
+    def stock_changed(self, prod_ids: List[int]) -> None:
+        """
+        Tell the product cache that stock changed outside this service
+        (e.g. server-side in place_order).
+        """
+        self.dao.invalidate(*prod_ids)
+
+    def cache_stats(self) -> Dict[str, int]:
+        """
+        Hit/miss/eviction counters of the product cache.
+        """
+        return self.dao.cache_stats()
+
+    def iter_low_stock(
+        self,
+        threshold: int = LOW_STOCK_THRESHOLD,
+        thresholds: Optional[Dict[str, int]] = None,
+        page_size: Optional[int] = None,
+        after_id: Optional[int] = None,
+        changed_since: Optional[str] = None,
+    ) -> Iterator[Dict]:
+        """
+        Stream every product with stock <= threshold (or its category's
+        threshold from thresholds), filtered server-side, in prod_id order.
+        """
+        if threshold < 0 or any(t < 0 for t in (thresholds or {}).values()):
+            raise ProductError("Thresholds cannot be negative")
+        return self.dao.iter_low_stock(
+            threshold, thresholds=thresholds, page_size=page_size, after_id=after_id, changed_since=changed_since
+        )
 
-    def get_low_stock(self, threshold: int = 5) -> List[Dict]:
+    def get_low_stock(
+        self,
+        threshold: int = LOW_STOCK_THRESHOLD,
+        thresholds: Optional[Dict[str, int]] = None,
+        limit: int = 100,
+        after_id: Optional[int] = None,
+    ) -> List[Dict]:
         """
-        Return products with stock <= threshold.
+        One page of low-stock products. Pass the last prod_id as after_id
+        to get the next page.
         """
-        all_products = self.dao.list_products(limit=1000)
-        return [p for p in all_products if (p.get("stock") or 0) <= threshold]
+        rows = self.iter_low_stock(threshold, thresholds, page_size=limit, after_id=after_id)
+        return [p for _, p in zip(range(limit), rows)]
+
+    def watch_low_stock(
+        self,
+        threshold: int = LOW_STOCK_THRESHOLD,
+        thresholds: Optional[Dict[str, int]] = None,
+        interval: float = 60.0,
+        page_size: Optional[int] = None,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> Iterator[List[Dict]]:
+        """
+        Poll for low-stock products forever, yielding one batch per poll.
+        The first batch is every low-stock product; later batches only hold
+        products whose stock changed since the previous poll (tracked by
+        products.stock_changed_at), so each poll is an index range scan over
+        recent changes instead of a catalog scan.
+        """
+        cursor: Optional[datetime.datetime] = None
+        reported: Dict[int, datetime.datetime] = {}
+        while True:
+            since = (cursor - WATCH_OVERLAP).isoformat() if cursor else None
+            batch = []
+            for p in self.iter_low_stock(threshold, thresholds, page_size=page_size, changed_since=since):
+                changed_at = datetime.datetime.fromisoformat(p["stock_changed_at"])
+                cursor = max(cursor, changed_at) if cursor else changed_at
+                if reported.get(p["prod_id"]) != changed_at:
+                    reported[p["prod_id"]] = changed_at
+                    batch.append(p)
+            if cursor:
+                horizon = cursor - WATCH_OVERLAP
+                reported = {k: v for k, v in reported.items() if v >= horizon}
+            yield batch
+            sleep(interval)
 
     def delete_product(self, prod_id: int) -> Optional[Dict]:
         """
@@ -97,3 +206,99 @@ class ProductService:
         List all products, optionally filtered by category.
         """
         return self.dao.list_products(limit=limit, category=category)
+
+    def iter_products(self, page_size: Optional[int] = None, category: Optional[str] = None) -> Iterator[Dict]:
+        """
+        Stream the whole catalog (optionally one category) page by page.
+        """
+        return self.dao.iter_products(page_size=page_size, category=category)
+
+    # ------------------------
+    # Bulk import / export
+    # ------------------------
+    @staticmethod
+    def _parse_import_row(row: Dict) -> Dict:
+        """
+        Normalise one import row into a products payload.
+        Raises ProductError if the row is invalid.
+        """
+        name = (row.get("name") or "").strip()
+        sku = (row.get("sku") or "").strip()
+        if not name:
+            raise ProductError("Name is required")
+        if not sku:
+            raise ProductError("SKU is required")
+        try:
+            price = float(row.get("price"))
+            stock = int(row.get("stock") or 0)
+        except (TypeError, ValueError):
+            raise ProductError("Price and stock must be numeric")
+        if price <= 0:
+            raise ProductError("Price must be greater than 0")
+        if stock < 0:
+            raise ProductError("Stock cannot be negative")
+        payload = {"name": name, "sku": sku, "price": price, "stock": stock}
+        if row.get("category"):
+            payload["category"] = row["category"]
+        return payload
+
+    def import_products(self, rows: Iterable[Dict], chunk_size: int = IMPORT_CHUNK_SIZE, upsert: bool = False) -> Dict:
+        """
+        Load products from an iterable of dicts (name, sku, price, stock, category).
+        Rows are validated in memory, checked against the DB one chunk at a
+        time and written with multi-row inserts (or upserts on sku). Invalid
+        rows are reported, not fatal. Returns
+        {"written": n, "failed": n, "errors": [{"row": i, "sku": ..., "error": ...}]}.
+        """
+        report = {"written": 0, "failed": 0, "errors": []}
+        seen_skus = set()
+        chunk: List[tuple] = []
+
+        def fail(line_no: int, sku, error: str):
+            report["failed"] += 1
+            report["errors"].append({"row": line_no, "sku": sku, "error": error})
+
+        def flush():
+            if not upsert:
+                existing = self.dao.find_existing_skus([p["sku"] for _, p in chunk])
+                for line_no, p in chunk:
+                    if p["sku"] in existing:
+                        fail(line_no, p["sku"], f"SKU already exists: {p['sku']}")
+                pending = [(n, p) for n, p in chunk if p["sku"] not in existing]
+            else:
+                pending = list(chunk)
+            write = self.dao.bulk_upsert_products if upsert else self.dao.bulk_create_products
+            try:
+                report["written"] += len(write([p for _, p in pending]))
+            except APIError:
+                # One bad row fails the whole statement; retry row by row so
+                # only the offending rows are reported.
+                for line_no, p in pending:
+                    try:
+                        report["written"] += len(write([p]))
+                    except APIError as e:
+                        fail(line_no, p["sku"], e.message)
+            chunk.clear()
+
+        for line_no, row in enumerate(rows, start=1):
+            try:
+                payload = self._parse_import_row(row)
+            except ProductError as e:
+                fail(line_no, row.get("sku"), str(e))
+                continue
+            if payload["sku"] in seen_skus:
+                fail(line_no, payload["sku"], f"Duplicate SKU in input: {payload['sku']}")
+                continue
+            seen_skus.add(payload["sku"])
+            chunk.append((line_no, payload))
+            if len(chunk) >= chunk_size:
+                flush()
+        if chunk:
+            flush()
+        return report
+
+    def export_products(self, page_size: Optional[int] = None, category: Optional[str] = None) -> Iterator[Dict]:
+        """
+        Stream the catalog for export (same as iter_products).
+        """
+        return self.iter_products(page_size=page_size, category=category)
@@ -1,6 +1,12 @@
 # src/services/reporting_service.py
+import datetime
 from typing import Optional, List, Dict
 from src.dao.reporting_dao import ReportingDAO
+from src.services.constants import REVENUE_BUCKETS, REVENUE_GROUPS
+
+
+class ReportingError(Exception):
+    pass
 
 class ReportingService:
     """Business logic for reports"""
@@ -8,14 +14,56 @@ class ReportingService:
     def __init__(self, dao: Optional[ReportingDAO] = None):
         self.dao = dao or ReportingDAO()
 
-    def top_selling_products(self, limit: int = 5) -> List[Dict]:
-        return self.dao.top_selling_products(limit=limit)
+    @staticmethod
+    def _parse_date(name: str, value: Optional[str]) -> Optional[datetime.date]:
+        """value (YYYY-MM-DD) as a date, None passes through; raises ReportingError otherwise."""
+        if value is None:
+            return None
+        try:
+            return datetime.date.fromisoformat(str(value).strip())
+        except ValueError:
+            raise ReportingError(f"Invalid {name}: {value!r} (expected YYYY-MM-DD)")
+
+    def _date_range(self, date_from: Optional[str], date_to: Optional[str]):
+        """
+        Validated (date_from, date_to) as YYYY-MM-DD strings. Either may be
+        None, but a range with both ends must not be empty or reversed.
+        """
+        start, end = self._parse_date("start date", date_from), self._parse_date("end date", date_to)
+        if start and end and start >= end:
+            raise ReportingError(f"Start date {start} must be before end date {end}")
+        return start and start.isoformat(), end and end.isoformat()
+
+    def top_selling_products(
+        self,
+        limit: int = 5,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+        category: Optional[str] = None,
+    ) -> List[Dict]:
+        date_from, date_to = self._date_range(date_from, date_to)
+        return self.dao.top_selling_products(limit=limit, date_from=date_from, date_to=date_to, category=category)
 
     def total_revenue_last_month(self) -> float:
         return self.dao.total_revenue_last_month()
 
-    def orders_per_customer(self) -> List[Dict]:
-        return self.dao.orders_per_customer()
+    def revenue_by_bucket(
+        self, date_from: str, date_to: str, bucket: str = "day", group_by: Optional[str] = None
+    ) -> List[Dict]:
+        if bucket not in REVENUE_BUCKETS:
+            raise ReportingError(f"bucket must be one of {', '.join(REVENUE_BUCKETS)}")
+        if group_by is not None and group_by not in REVENUE_GROUPS:
+            raise ReportingError(f"group_by must be one of {', '.join(REVENUE_GROUPS)}")
+        if date_from is None or date_to is None:
+            raise ReportingError("Both a start date and an end date are required")
+        date_from, date_to = self._date_range(date_from, date_to)
+        return self.dao.revenue_by_bucket(date_from, date_to, bucket=bucket, group_by=group_by)
+
+    def orders_per_customer(self, min_orders: int = 0, limit: Optional[int] = None, offset: int = 0) -> List[Dict]:
+        return self.dao.orders_per_customer(min_orders=min_orders, limit=limit, offset=offset)
+
+    def frequent_customers(self, min_orders: int = 2, limit: Optional[int] = None, offset: int = 0) -> List[Dict]:
+        return self.dao.frequent_customers(min_orders=min_orders, limit=limit, offset=offset)
 
-    def frequent_customers(self) -> List[Dict]:
-        return self.dao.frequent_customers()
+    def rebuild_rollups(self) -> None:
+        self.dao.rebuild_rollups()
@@ -0,0 +1,69 @@
+# tests/test_async_services.py
+# AsyncRetailService against the SQLite PostgREST stand-in
+# (benchmarks/fake_supabase.py), behind an async client that, like
+# supabase's AsyncClient, only works on the event loop that created it.
+import asyncio
+
+from benchmarks.fake_supabase import FakeSupabase
+from src.dao import async_dao
+from src.dao.async_dao import AsyncProductDAO
+from src.dao.cache import NullCache
+from src.services.async_services import AsyncRetailService, run_sync
+
+
+class _LoopBoundQuery:
+    def __init__(self, builder, loop):
+        self._builder = builder
+        self._loop = loop
+
+    def __getattr__(self, name):
+        attr = getattr(self._builder, name)
+        if not callable(attr):
+            return attr
+        return lambda *args, **kwargs: _LoopBoundQuery(attr(*args, **kwargs), self._loop)
+
+    async def execute(self):
+        assert asyncio.get_running_loop() is self._loop, "client used on a different event loop"
+        await asyncio.sleep(0)  # let other requests in, so the semaphore is contended
+        return self._builder.execute()
+
+
+class _LoopBoundClient:
+    def __init__(self, sb: FakeSupabase):
+        self._sb = sb
+        self._loop = asyncio.get_running_loop()
+
+    def table(self, name):
+        return _LoopBoundQuery(self._sb.table(name), self._loop)
+
+    def rpc(self, fn, params=None):
+        return _LoopBoundQuery(self._sb.rpc(fn, params or {}), self._loop)
+
+
+def test_facade_is_reusable_across_event_loops(monkeypatch):
+    sb = FakeSupabase()
+    sb.conn.execute("insert into customers (name, email, phone) values ('Ann', 'ann@x', '1')")
+    sb.conn.executemany(
+        "insert into products (name, sku, price, stock) values (?, ?, 5, 10)",
+        [(f"P{i}", f"S{i}") for i in range(1, 21)],
+    )
+    clients = []
+
+    async def get_async_supabase():
+        clients.append(_LoopBoundClient(sb))
+        return clients[-1]
+
+    monkeypatch.setattr(async_dao, "get_async_supabase", get_async_supabase)
+    service = AsyncRetailService(product_dao=AsyncProductDAO(cache=NullCache()), concurrency=1)
+
+    async def lookups():
+        products, customer = await asyncio.gather(
+            service.get_products(list(range(1, 21))),
+            service.get_customer(1),
+        )
+        return len(products), customer["name"]
+
+    assert run_sync(lookups()) == (20, "Ann")
+    assert run_sync(lookups()) == (20, "Ann")
+    # each DAO resolved a client on each loop
+    assert len({c._loop for c in clients}) == 2
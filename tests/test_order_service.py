@@ -0,0 +1,89 @@
+# tests/test_order_service.py
+# OrderService over InMemoryOrderDAO + LocalStockDAO: the order lifecycle
+# (place, complete, cancel) and its stock bookkeeping, without a database.
+# Customers and products come from the SQLite PostgREST stand-in
+# (benchmarks/fake_supabase.py).
+import threading
+
+import pytest
+
+from benchmarks.fake_supabase import FakeSupabase
+from src.dao.cache import NullCache
+from src.dao.customer_dao import CustomerDAO
+from src.dao.order_dao import InMemoryOrderDAO
+from src.dao.product_dao import ProductDAO
+from src.dao.stock_dao import LocalStockDAO
+from src.services.order_service import OrderError, OrderService
+
+
+def _service(stock):
+    sb = FakeSupabase()
+    sb.conn.execute("insert into customers (name, email, phone) values ('Ann', 'ann@x', '1')")
+    sb.conn.executemany(
+        "insert into products (prod_id, name, sku, price, stock) values (?, ?, ?, 5, ?)",
+        [(pid, f"P{pid}", f"S{pid}", qty) for pid, qty in stock.items()],
+    )
+    stock_dao = LocalStockDAO(stock)
+    order_dao = InMemoryOrderDAO(prices=dict.fromkeys(stock, 5.0), stock_dao=stock_dao)
+    service = OrderService(
+        customer_dao=CustomerDAO(sb=sb), product_dao=ProductDAO(sb=sb, cache=NullCache()), order_dao=order_dao
+    )
+    return service, stock_dao
+
+
+def test_place_and_complete():
+    service, stock = _service({1: 10, 2: 10})
+    order = service.create_order(1, [{"prod_id": 1, "quantity": 2}, {"prod_id": 2, "quantity": 1}])
+
+    assert order["status"] == "PLACED"
+    assert order["total_amount"] == 15.0
+    assert stock.stock == {1: 8, 2: 9}
+    assert [o["order_id"] for o in service.list_orders_of_customer(1)] == [order["order_id"]]
+    assert len(service.get_order_details(order["order_id"])["order"]["items"]) == 2
+
+    assert service.complete_order(order["order_id"])["status"] == "COMPLETED"
+    with pytest.raises(OrderError, match="only orders with status = PLACED"):
+        service.complete_order(order["order_id"])
+    with pytest.raises(OrderError, match="only orders with status = PLACED"):
+        service.cancel_order(order["order_id"])
+    assert stock.stock == {1: 8, 2: 9}
+
+
+def test_cancel_returns_stock_once():
+    service, stock = _service({1: 10})
+    order = service.create_order(1, [{"prod_id": 1, "quantity": 4}])
+
+    cancelled = service.cancel_order(order["order_id"])
+    assert cancelled["status"] == "CANCELLED"
+    assert stock.stock == {1: 10}
+    with pytest.raises(OrderError, match="only orders with status = PLACED"):
+        service.cancel_order(order["order_id"])
+    assert stock.stock == {1: 10}
+    with pytest.raises(OrderError, match="No order found"):
+        service.cancel_order(999)
+
+
+def test_concurrent_checkouts_do_not_oversell():
+    service, stock = _service({1: 5})
+    outcomes = []
+    start = threading.Barrier(20)
+
+    def checkout():
+        start.wait()
+        try:
+            service.create_order(1, [{"prod_id": 1, "quantity": 1}])
+            outcomes.append("placed")
+        except OrderError as e:
+            outcomes.append(str(e))
+
+    threads = [threading.Thread(target=checkout) for _ in range(20)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    # the pre-check reads the product table (still 5 in stock), so the
+    # losers are turned away by the reservation, not by check_basket
+    assert outcomes.count("placed") == 5
+    assert set(outcomes) == {"placed", "Not enough stock"}
+    assert stock.stock == {1: 0}
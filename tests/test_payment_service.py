@@ -0,0 +1,50 @@
+# tests/test_payment_service.py
+# Paying orders whose outbox events have not been dispatched yet, against the
+# SQLite PostgREST stand-in (benchmarks/fake_supabase.py), whose RPCs port
+# sql/012_outbox.sql.
+import pytest
+
+from benchmarks.fake_supabase import FakeSupabase
+from src.dao.order_dao import OrderDAO
+from src.dao.payment_dao import PaymentDAO
+from src.services.payment_service import PaymentError, PaymentService
+
+
+def _setup():
+    sb = FakeSupabase()
+    sb.conn.execute("insert into customers (name, email, phone) values ('Ann', 'ann@x', '1')")
+    sb.conn.execute("insert into products (name, sku, price, stock) values ('Kettle', 'K1', 25, 10)")
+    return OrderDAO(sb=sb), PaymentService(dao=PaymentDAO(sb=sb))
+
+
+def test_order_placed_before_dispatch_can_be_paid():
+    orders, payments = _setup()
+    order = orders.place_order(1, [{"prod_id": 1, "quantity": 1}])
+
+    assert payments.process_payment(order["order_id"], "Card")["status"] == "PAID"
+    assert orders.get_order(order["order_id"])["status"] == "COMPLETED"
+
+
+def test_order_cancelled_before_dispatch_is_not_charged():
+    orders, payments = _setup()
+    order_id = orders.place_order(1, [{"prod_id": 1, "quantity": 1}])["order_id"]
+    orders.cancel_order(order_id)
+
+    with pytest.raises(PaymentError, match=f"Order {order_id} is cancelled"):
+        payments.process_payment(order_id, "Card", idempotency_key="k1")
+    # nothing was written: the payment is still left to the queued events
+    assert payments.dao.get_payment(order_id) is None
+    assert orders.get_order(order_id)["status"] == "CANCELLED"
+
+
+def test_settlement_skips_orders_cancelled_before_dispatch():
+    orders, payments = _setup()
+    order_id = orders.place_order(1, [{"prod_id": 1, "quantity": 1}])["order_id"]
+    payments.dao.create_for_orders([order_id])  # order.placed dispatched
+    orders.cancel_order(order_id)  # order.cancelled still queued: payment PENDING
+
+    report = payments.settle_payments([{"order_id": order_id, "method": "Card", "amount": 25}])
+
+    assert report["settled"] == 0
+    assert [(m["order_id"], m["reason"]) for m in report["mismatches"]] == [(order_id, "invalid_status")]
+    assert payments.dao.get_payment(order_id)["status"] == "PENDING"
@@ -0,0 +1,66 @@
+# tests/test_product_dao.py
+# Product cache coherence against the SQLite PostgREST stand-in
+# (benchmarks/fake_supabase.py): sku lookups must follow sku changes.
+import pytest
+
+from benchmarks.fake_supabase import FakeSupabase
+from src.dao.cache import LRUCache
+from src.dao.product_dao import ProductDAO
+from src.services.product_service import ProductError, ProductService
+
+
+def _service():
+    dao = ProductDAO(sb=FakeSupabase(), cache=LRUCache())
+    return ProductService(dao=dao), dao
+
+
+def test_renamed_sku_is_not_served_from_the_cache():
+    service, dao = _service()
+    prod = service.add_product("Kettle", "OLD", 25.0, 5)
+    assert dao.get_product_by_sku("OLD")["prod_id"] == prod["prod_id"]  # alias cached
+
+    dao.update_product(prod["prod_id"], {"sku": "NEW"})
+
+    assert dao.get_product_by_sku("OLD") is None
+    assert dao.get_product_by_sku("NEW")["prod_id"] == prod["prod_id"]
+    # the old sku is free again
+    assert service.add_product("Teapot", "OLD", 15.0)["sku"] == "OLD"
+
+
+def test_deleted_product_frees_its_sku():
+    service, dao = _service()
+    prod = service.add_product("Kettle", "K1", 25.0)
+    dao.get_product_by_sku("K1")
+    dao.delete_product(prod["prod_id"])
+
+    assert dao.get_product_by_sku("K1") is None
+    service.add_product("Kettle", "K1", 25.0)
+    with pytest.raises(ProductError, match="SKU already exists"):
+        service.add_product("Kettle", "K1", 25.0)
+
+
+
+class _RacingProductDAO(ProductDAO):
+    """Another reader looks the product up while each write is in flight."""
+
+    def _update(self, table, fields, **filters):
+        self.get_product_by_id(filters["prod_id"])  # caches the row as it was
+        return super()._update(table, fields, **filters)
+
+    def _delete(self, table, **filters):
+        self.get_product_by_id(filters["prod_id"])
+        return super()._delete(table, **filters)
+
+
+def test_read_during_a_write_does_not_leave_a_stale_row():
+    dao = _RacingProductDAO(sb=FakeSupabase(), cache=LRUCache())
+    service = ProductService(dao=dao)
+    kettle = service.add_product("Kettle", "K1", 25.0)
+    teapot = service.add_product("Teapot", "T1", 15.0)
+
+    dao.update_product(kettle["prod_id"], {"price": 30.0})
+    dao.delete_product(teapot["prod_id"])
+
+    assert dao.get_product_by_id(kettle["prod_id"])["price"] == 30.0
+    assert dao.get_product_by_id(teapot["prod_id"]) is None
+    assert dao.get_product_by_sku("T1") is None
@@ -0,0 +1,54 @@
+# tests/test_reporting_service.py
+# Date-range validation in ReportingService, against the SQLite PostgREST
+# stand-in (benchmarks/fake_supabase.py): bad input is a ReportingError, not
+# a database error.
+import pytest
+
+from benchmarks.fake_supabase import FakeSupabase
+from src.dao.reporting_dao import ReportingDAO
+from src.services.reporting_service import ReportingError, ReportingService
+
+
+def _service():
+    return ReportingService(dao=ReportingDAO(sb=FakeSupabase()))
+
+
+@pytest.mark.parametrize(
+    "date_from, date_to, message",
+    [
+        ("garbage", None, "Invalid start date: 'garbage'"),
+        (None, "2025-02-30", "Invalid end date: '2025-02-30'"),
+        ("2025-02-01", "2025-01-01", "must be before end date"),
+        ("2025-01-01", "2025-01-01", "must be before end date"),
+    ],
+)
+def test_top_products_rejects_bad_ranges(date_from, date_to, message):
+    with pytest.raises(ReportingError, match=message):
+        _service().top_selling_products(date_from=date_from, date_to=date_to)
+
+
+def test_top_products_accepts_open_ranges():
+    service = _service()
+    assert service.top_selling_products(date_from="2025-01-01") == []
+    assert service.top_selling_products(date_to="2025-01-01") == []
+    assert service.top_selling_products(date_from="2025-01-01", date_to="2025-02-01") == []
+
+
+@pytest.mark.parametrize(
+    "date_from, date_to, message",
+    [
+        ("2025-1-5", "2025-02-01", "Invalid start date"),
+        ("2025-02-01", "2025-01-15", "must be before end date"),
+        ("2025-01-01", None, "Both a start date and an end date are required"),
+    ],
+)
+def test_revenue_rejects_bad_ranges(date_from, date_to, message):
+    with pytest.raises(ReportingError, match=message):
+        _service().revenue_by_bucket(date_from, date_to)
+
+
+def test_revenue_parses_dates_before_comparing():
+    # compared as strings, "2025-10-01" < "2025-9-30" passed as a valid range
+    with pytest.raises(ReportingError, match="Invalid end date"):
+        _service().revenue_by_bucket("2025-10-01", "2025-9-30")
+    assert _service().revenue_by_bucket("2025-09-30", "2025-10-01") == []
@@ -0,0 +1,78 @@
+# tests/test_server_client.py
+# How src/server/client.py reports a misbehaving server: error replies keep
+# the {"output", "error"} shape the CLI prints, dropped or silent
+# connections raise ServerError, and only a refused connection is
+# ServerUnavailable (the one case where the CLI may run the command locally).
+import json
+import socket
+import threading
+
+import pytest
+
+from src.server.client import ServerError, ServerUnavailable, forward_command, request
+
+
+def _serve_once(handle):
+    """Listen on a free port, pass the first connection to handle(conn); return the URL."""
+    listener = socket.socket()
+    listener.bind(("127.0.0.1", 0))
+    listener.listen(1)
+
+    def run():
+        conn, _ = listener.accept()
+        with conn:
+            conn.recv(65536)
+            handle(conn)
+        listener.close()
+
+    threading.Thread(target=run, daemon=True).start()
+    return f"http://127.0.0.1:{listener.getsockname()[1]}"
+
+
+def _reply(status, body):
+    payload = json.dumps(body).encode()
+
+    def handle(conn):
+        conn.sendall(
+            f"HTTP/1.1 {status} X\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(payload)}\r\nConnection: close\r\n\r\n".encode() + payload
+        )
+    return handle
+
+
+def test_error_reply_is_normalised():
+    url = _serve_once(_reply(500, {"error": "KeyError: 'boom'"}))
+    assert forward_command(url, "order_show", {}) == {"output": "", "error": "KeyError: 'boom'"}
+
+
+def test_reply_without_error_message():
+    url = _serve_once(_reply(404, ["not", "a", "dict"]))
+    reply = forward_command(url, "order_show", {})
+    assert reply["output"] == ""
+    assert reply["error"].startswith("server returned 404")
+
+
+def test_dropped_connection_is_an_error_not_a_fallback():
+    url = _serve_once(lambda conn: None)  # closes without replying
+    reply = forward_command(url, "order_show", {})
+    assert reply["output"] == ""
+    assert "closed the connection" in reply["error"]
+
+
+def test_silent_server_times_out():
+    done = threading.Event()
+    url = _serve_once(lambda conn: done.wait(5))
+    try:
+        with pytest.raises(ServerError, match="did not reply within 0.2s"):
+            request(url, "POST", "/cli", {}, timeout=0.2)
+    finally:
+        done.set()
+
+
+def test_nothing_listening_is_unavailable():
+    s = socket.socket()
+    s.bind(("127.0.0.1", 0))
+    port = s.getsockname()[1]
+    s.close()
+    with pytest.raises(ServerUnavailable):
+        forward_command(f"http://127.0.0.1:{port}", "order_show", {})
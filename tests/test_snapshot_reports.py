@@ -0,0 +1,48 @@
+# tests/test_snapshot_reports.py
+# Reports over an exported snapshot (src/dao/snapshot_dao.py) against the
+# live rollups, both built from the SQLite PostgREST stand-in
+# (benchmarks/fake_supabase.py).
+import os
+
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from benchmarks import datasets
+from benchmarks.fake_supabase import FakeSupabase
+from src.cli.main import CLIApp
+from src.dao.reporting_dao import ReportingDAO
+from src.dao.snapshot_dao import SnapshotExporter, SnapshotReportingDAO
+
+
+@pytest.fixture(scope="module")
+def snapshot(tmp_path_factory):
+    sb = FakeSupabase()
+    datasets.load(sb, 200)
+    directory = str(tmp_path_factory.mktemp("snapshot"))
+    SnapshotExporter(sb=sb).export(directory)
+    live = ReportingDAO(sb=sb)
+    live.rebuild_rollups()
+    return live, directory
+
+
+def test_top_products_match_the_live_rollups(snapshot):
+    live, directory = snapshot
+    expected = live.top_selling_products(limit=5)
+    got = SnapshotReportingDAO(directory).top_selling_products(limit=5)
+
+    def key(rows):
+        return [(r["prod_id"], r["total_sold"], round(r["revenue"], 2)) for r in rows]
+
+    assert key(got) == key(expected)
+
+
+def test_incomplete_snapshot_is_an_error_line(snapshot, tmp_path, capsys):
+    _, directory = snapshot
+    for name in os.listdir(directory):
+        if name != "orders.arrow":
+            os.link(os.path.join(directory, name), tmp_path / name)
+
+    CLIApp().run(["--local", "report", "--source", "snapshot", "--snapshot-dir", str(tmp_path), "frequent-customers"])
+
+    assert capsys.readouterr().out == f"Error: No snapshot of 'orders' in {tmp_path} (run: report snapshot)\n"